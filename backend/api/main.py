@@ -8,6 +8,7 @@ import logging
 
 from backend.core.config import get_settings
 from backend.api.routes import incident, health
+from backend.ingestion.parallel_parser import shutdown_ingestion_executor
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -25,6 +26,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down InfraMind API...")
+    await incident.shutdown_analysis_queue()
+    shutdown_ingestion_executor()
 
 
 # Create FastAPI application
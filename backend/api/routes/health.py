@@ -5,7 +5,9 @@ from fastapi import APIRouter, status
 from datetime import datetime
 
 from backend.core.config import get_settings
-from backend.models.schemas import HealthCheckResponse
+from backend.core.job_queue import get_analysis_queue
+from backend.models.schemas import CacheStatsResponse, HealthCheckResponse, QueueStatsResponse
+from backend.reasoning.response_cache import get_response_cache
 
 router = APIRouter()
 settings = get_settings()
@@ -48,6 +50,37 @@ async def health_check():
     return HealthCheckResponse(**health_status)
 
 
+@router.get(
+    "/cache/stats",
+    response_model=CacheStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="LLM cache statistics",
+    description="Hit/miss statistics for the Gemini response cache"
+)
+async def cache_stats():
+    """
+    Get LLM response cache statistics.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return CacheStatsResponse(enabled=False)
+    return CacheStatsResponse(**cache.stats())
+
+
+@router.get(
+    "/queue/stats",
+    response_model=QueueStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Analysis queue statistics",
+    description="Depth and counters for the background analysis queue"
+)
+async def queue_stats():
+    """
+    Get background analysis queue statistics.
+    """
+    return QueueStatsResponse(**get_analysis_queue().stats())
+
+
 @router.get(
     "/ready",
     status_code=status.HTTP_200_OK,
@@ -1,8 +1,10 @@
 """
 Incident analysis endpoints.
 """
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
 from typing import List, Optional
+import asyncio
 import logging
 import json
 from datetime import datetime
@@ -10,115 +12,219 @@ from datetime import datetime
 from backend.models.schemas import (
     AnalyzeIncidentRequest,
     AnalyzeIncidentResponse,
-    IncidentStatus
+    IncidentStatus,
+    LogTemplatesResponse,
+    DependencyGraphResponse,
+    LatencyBreakdownResponse,
+    MetricSeriesResponse
+)
+from backend.models import (
+    ConfigChange,
+    DeploymentEvent,
+    LogBatch,
+    LogLevel,
+    LogTemplate,
+    MetricBatch,
+    MetricDataPoint,
+    MetricSeries,
+    OperationLatency,
+    ServiceEdgeStats,
+    TraceCriticalPath,
+    TraceSpan,
+    UnifiedContext,
 )
-from backend.models import DeploymentEvent
 from backend.models.rca import ConfidenceLevel
 from backend.reasoning import ReasoningEngine
-from backend.ingestion import DataUnifier
-from backend.core.exceptions import GeminiAPIError, ParsingError, ValidationError
+from backend.ingestion import ConfigParser, DataUnifier, MetricsParser, TraceParser
+from backend.ingestion.decompression import adecompress_stream, strip_compression_suffix
+from backend.core.exceptions import FileSizeError, GeminiAPIError, ParsingError, QueueFullError, ValidationError
+from backend.core.job_queue import get_analysis_queue
+from backend.api.uploads import (
+    MultipartStream,
+    iter_spooled_lines,
+    iter_spooled_text,
+    read_spooled_text,
+    spool_upload
+)
+from backend.storage import get_incident_store
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# In-memory storage for demo (replace with database in production)
-incidents_db = {}
-
 
 @router.post(
     "/incidents/analyze",
     response_model=AnalyzeIncidentResponse,
     status_code=status.HTTP_200_OK,
     summary="Analyze incident",
-    description="Submit incident data and get AI-powered root cause analysis"
+    description="Submit incident data and get AI-powered root cause analysis",
+    responses={202: {"description": "Queued for background analysis (async_mode=true)"}}
 )
-async def analyze_incident(request: AnalyzeIncidentRequest):
+async def analyze_incident(
+    request: AnalyzeIncidentRequest,
+    response: Response,
+    async_mode: bool = False
+):
     """
     Analyze an incident using Gemini AI.
     
     Accepts logs, metrics, traces, config changes, and deployments.
     Returns comprehensive root cause analysis with fix suggestions.
+    
+    With async_mode=true the analysis is queued and 202 Accepted is returned
+    immediately; poll GET /incidents/{incident_id} for the result.
+    """
+    if async_mode:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return _enqueue_analysis(request)
+    return await _analyze(request)
+
+
+def _request_record(request: AnalyzeIncidentRequest) -> dict:
+    """
+    The request as stored with its incident.
+    
+    File contents are replaced by their size, so the record does not hold
+    another copy of every upload.
+    """
+    record = request.model_dump(exclude={"log_files", "metric_files", "trace_files", "config_files"})
+    record["log_files"] = [
+        {"source": log_file.source, "size": len(log_file.content)} for log_file in request.log_files or []
+    ]
+    record["metric_files"] = [{"size": len(metric_file.content)} for metric_file in request.metric_files or []]
+    record["trace_files"] = [{"size": len(trace_file)} for trace_file in request.trace_files or []]
+    record["config_files"] = [
+        {"path": config_file.path, "format": config_file.format, "size": len(config_file.content)}
+        for config_file in request.config_files or []
+    ]
+    return record
+
+
+def _enqueue_analysis(
+    request: AnalyzeIncidentRequest,
+    parsed_logs: Optional[List[LogBatch]] = None,
+    parsed_metrics: Optional[List[MetricBatch]] = None,
+    parsed_traces: Optional[List[TraceSpan]] = None,
+    parsed_configs: Optional[List[List[ConfigChange]]] = None
+) -> AnalyzeIncidentResponse:
+    """
+    Queue a request for background analysis.
+    
+    Args:
+        request: Incident analysis request
+        parsed_logs: Log batches already parsed from streamed uploads
+        parsed_metrics: Metric batches already parsed from spooled uploads, one per file
+        parsed_traces: Spans already parsed from streamed uploads
+        parsed_configs: Config changes already parsed from spooled uploads, one list per file
+    """
+    incident_id = request.incident_id
+    store = get_incident_store()
+    existing = store.get(incident_id)
+    if existing and existing["status"] in (IncidentStatus.PENDING, IncidentStatus.ANALYZING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Incident {incident_id} is already being analyzed"
+        )
+    
+    # Submit before writing the record so a rejected request leaves any
+    # stored result untouched; the job cannot start until we yield.
+    try:
+        get_analysis_queue().submit(
+            incident_id,
+            lambda: _analyze(
+                request,
+                parsed_logs=parsed_logs,
+                parsed_metrics=parsed_metrics,
+                parsed_traces=parsed_traces,
+                parsed_configs=parsed_configs
+            )
+        )
+    except QueueFullError as e:
+        logger.warning(f"Rejected incident {incident_id}: {e.message}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.message
+        )
+    
+    store.create(incident_id, {
+        "status": IncidentStatus.PENDING,
+        "created_at": datetime.now(),
+        "request": _request_record(request)
+    })
+    
+    return AnalyzeIncidentResponse(
+        incident_id=incident_id,
+        status=IncidentStatus.PENDING,
+        rca=None,
+        summary=None
+    )
+
+
+async def shutdown_analysis_queue() -> None:
+    """Cancel queued and running background analyses, marking them failed."""
+    store = get_incident_store()
+    for incident_id in await get_analysis_queue().shutdown():
+        store.update(
+            incident_id,
+            status=IncidentStatus.FAILED,
+            error="Analysis cancelled during shutdown"
+        )
+
+
+async def _analyze(
+    request: AnalyzeIncidentRequest,
+    parsed_logs: Optional[List[LogBatch]] = None,
+    parsed_metrics: Optional[List[MetricBatch]] = None,
+    parsed_traces: Optional[List[TraceSpan]] = None,
+    parsed_configs: Optional[List[List[ConfigChange]]] = None
+) -> AnalyzeIncidentResponse:
+    """
+    Run the analysis pipeline for a request.
+    
+    Args:
+        request: Incident analysis request
+        parsed_logs: Log batches already parsed from streamed uploads
+        parsed_metrics: Metric batches already parsed from spooled uploads, one per file
+        parsed_traces: Spans already parsed from streamed uploads
+        parsed_configs: Config changes already parsed from spooled uploads, one list per file
     """
     incident_id = request.incident_id
     logger.info(f"Analyzing incident {incident_id}")
+    store = get_incident_store()
     
     try:
-        # Store incident in database
-        incidents_db[incident_id] = {
-            "status": IncidentStatus.ANALYZING,
-            "created_at": datetime.now(),
-            "request": request.model_dump()
-        }
+        # Store incident in database; queued incidents keep their creation time
+        if not store.update(incident_id, status=IncidentStatus.ANALYZING):
+            store.create(incident_id, {
+                "status": IncidentStatus.ANALYZING,
+                "created_at": datetime.now(),
+                "request": _request_record(request)
+            })
         
-        # Parse and unify data
+        # Parse and unify data off the event loop
         logger.info("Parsing incident data...")
-        unifier = DataUnifier()
-        
-        # Parse logs
-        all_logs = []
-        if request.log_files:
-            for log_file in request.log_files:
-                logs = unifier.log_parser.parse_file(
-                    log_file.content,
-                    source=log_file.source or "unknown"
-                )
-                all_logs.extend(logs)
-        
-        # Parse metrics
-        all_metrics = []
-        if request.metric_files:
-            for metric_file in request.metric_files:
-                metrics = unifier.metrics_parser.parse_file(metric_file.content)
-                summaries = unifier.metrics_parser.create_summaries(metrics)
-                all_metrics.extend(summaries)
-        
-        # Parse traces
-        all_traces = []
-        if request.trace_files:
-            for trace_content in request.trace_files:
-                # trace_files is List[str], not objects with .content
-                traces = unifier.trace_parser.parse_file(trace_content)
-                all_traces.extend(traces)
-        
-        # Parse configs
-        config_changes = []
-        if request.config_files:
-            for config_file in request.config_files:
-                changes = unifier.config_parser.parse_file(
-                    config_file.content,
-                    file_format=config_file.format or "auto",
-                    file_path=config_file.path or "config"
-                )
-                config_changes.extend(changes)
-            
-            # If old and new configs provided, compare them
-            if len(request.config_files) >= 2:
-                old_configs = unifier.config_parser.parse_file(
-                    request.config_files[0].content,
-                    file_format=request.config_files[0].format or "auto",
-                    file_path=request.config_files[0].path or "config"
-                )
-                new_configs = unifier.config_parser.parse_file(
-                    request.config_files[1].content,
-                    file_format=request.config_files[1].format or "auto",
-                    file_path=request.config_files[1].path or "config"
-                )
-                config_changes = unifier.config_parser.compare_configs(old_configs, new_configs)
-        
-        # Create unified context
-        logger.info("Creating unified context...")
-        context = unifier.create_unified_context(
-            logs=all_logs,
-            metrics=all_metrics,
-            traces=all_traces,
-            configs=config_changes,
-            deployments=request.deployments or [],
-            time_window_minutes=request.time_window_minutes
+        context = await asyncio.to_thread(
+            _build_context, request, parsed_logs, parsed_metrics, parsed_traces, parsed_configs
         )
         
         # Override incident ID if provided
         context.incident_id = incident_id
         
+        # Keep mined log templates and trace analyses for their endpoints
+        store.update(
+            incident_id,
+            log_templates=[template.model_dump() for template in context.log_templates],
+            total_logs=len(context.logs),
+            service_edges=[edge.model_dump() for edge in context.service_edges],
+            latency={
+                "operations": [op.model_dump() for op in context.operation_latency],
+                "critical_paths": [path.model_dump() for path in context.critical_paths]
+            },
+            metric_series=[
+                series.model_dump() for series in MetricsParser.to_series(context.metric_data_points)
+            ]
+        )
+        
         logger.info(f"Context created: {len(context.logs)} logs, {len(context.metrics)} metrics, {len(context.traces)} traces")
         
         # Use Gemini AI for real-time analysis
@@ -130,9 +236,12 @@ async def analyze_incident(request: AnalyzeIncidentRequest):
             focus_area=request.focus_area
         )
         
-        incidents_db[incident_id]["status"] = IncidentStatus.COMPLETED
-        incidents_db[incident_id]["rca"] = rca.model_dump()
-        incidents_db[incident_id]["completed_at"] = datetime.now()
+        store.update(
+            incident_id,
+            status=IncidentStatus.COMPLETED,
+            rca=rca.model_dump(),
+            completed_at=datetime.now()
+        )
         
         logger.info(f"✅ Analysis completed for incident {incident_id}")
         
@@ -159,10 +268,13 @@ async def analyze_incident(request: AnalyzeIncidentRequest):
             # Generate demo response as fallback
             demo_rca = _generate_demo_rca(context, incident_id)
             
-            incidents_db[incident_id]["status"] = IncidentStatus.COMPLETED
-            incidents_db[incident_id]["rca"] = demo_rca.model_dump()
-            incidents_db[incident_id]["completed_at"] = datetime.now()
-            incidents_db[incident_id]["demo_mode"] = True
+            store.update(
+                incident_id,
+                status=IncidentStatus.COMPLETED,
+                rca=demo_rca.model_dump(),
+                completed_at=datetime.now(),
+                demo_mode=True
+            )
             
             logger.info(f"✅ Fallback demo analysis provided for incident {incident_id}")
             
@@ -173,8 +285,7 @@ async def analyze_incident(request: AnalyzeIncidentRequest):
                 summary="⚠️ FALLBACK MODE: This analysis uses demo data due to API rate limits. Please try again in a few moments for real-time AI analysis."
             )
         else:
-            incidents_db[incident_id]["status"] = IncidentStatus.FAILED
-            incidents_db[incident_id]["error"] = str(e)
+            store.update(incident_id, status=IncidentStatus.FAILED, error=str(e))
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Gemini API error: {str(e)}. The AI service is temporarily unavailable."
@@ -182,8 +293,7 @@ async def analyze_incident(request: AnalyzeIncidentRequest):
     
     except (ParsingError, ValidationError) as e:
         logger.error(f"Data processing error: {e}")
-        incidents_db[incident_id]["status"] = IncidentStatus.FAILED
-        incidents_db[incident_id]["error"] = str(e)
+        store.update(incident_id, status=IncidentStatus.FAILED, error=str(e))
         
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -192,8 +302,7 @@ async def analyze_incident(request: AnalyzeIncidentRequest):
     
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        incidents_db[incident_id]["status"] = IncidentStatus.FAILED
-        incidents_db[incident_id]["error"] = str(e)
+        store.update(incident_id, status=IncidentStatus.FAILED, error=str(e))
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -201,6 +310,85 @@ async def analyze_incident(request: AnalyzeIncidentRequest):
         )
 
 
+def _build_context(
+    request: AnalyzeIncidentRequest,
+    parsed_logs: Optional[List[LogBatch]] = None,
+    parsed_metrics: Optional[List[MetricBatch]] = None,
+    parsed_traces: Optional[List[TraceSpan]] = None,
+    parsed_configs: Optional[List[List[ConfigChange]]] = None
+) -> UnifiedContext:
+    """
+    Parse all request data and build the unified context.
+    
+    CPU-bound, so callers run it in a worker thread to keep the event loop free.
+    
+    Args:
+        request: Incident analysis request
+        parsed_logs: Log batches already parsed from streamed uploads
+        parsed_metrics: Metric batches already parsed from spooled uploads, one per file
+        parsed_traces: Spans already parsed from streamed uploads
+        parsed_configs: Config changes already parsed from spooled uploads, one list per file
+    """
+    unifier = DataUnifier()
+
+    # Parse logs
+    all_logs = list(parsed_logs or [])
+    if request.log_files:
+        for log_file in request.log_files:
+            logs = unifier.parse_logs(
+                log_file.content,
+                source=log_file.source or "unknown"
+            )
+            all_logs.append(logs)
+    
+    # Parse metrics, keeping a downsampled copy of each series for charts.
+    # Each file's points join the baselines once per incident, however often it is re-analyzed.
+    all_metrics = []
+    metric_points = []
+    metric_batches = list(parsed_metrics or [])
+    metric_batches.extend(unifier.parse_metrics(metric_file.content) for metric_file in request.metric_files or [])
+    for number, metrics in enumerate(metric_batches):
+        summaries = unifier.metrics_parser.create_summaries(metrics)
+        unifier.metrics_parser.record_baseline(f"{request.incident_id}/{number}", metrics)
+        all_metrics.extend(summaries)
+        metric_points.extend(unifier.metrics_parser.downsample(metrics))
+    
+    # Parse traces
+    all_traces = list(parsed_traces or [])
+    if request.trace_files:
+        for trace_content in request.trace_files:
+            # trace_files is List[str], not objects with .content
+            traces = unifier.trace_parser.parse_file(trace_content)
+            all_traces.extend(traces)
+    
+    # Parse configs
+    config_files = list(parsed_configs or [])
+    for config_file in request.config_files or []:
+        config_files.append(unifier.config_parser.parse_file(
+            config_file.content,
+            file_format=config_file.format or "auto",
+            file_path=config_file.path or "config"
+        ))
+    config_changes = [change for changes in config_files for change in changes]
+    
+    # If old and new configs provided, compare them
+    if len(config_files) >= 2:
+        config_changes = unifier.config_parser.compare_configs(config_files[0], config_files[1])
+    
+    # Create unified context
+    logger.info("Creating unified context...")
+    context = unifier.create_unified_context(
+        logs=LogBatch.concat(all_logs),
+        metrics=all_metrics,
+        traces=all_traces,
+        configs=config_changes,
+        deployments=request.deployments or [],
+        time_window_minutes=request.time_window_minutes,
+        metric_points=metric_points
+    )
+    return unifier.enrich_context(context)
+
+
 @router.get(
     "/incidents/{incident_id}",
     response_model=AnalyzeIncidentResponse,
@@ -212,24 +400,23 @@ async def get_incident(incident_id: str):
     """
     Get incident analysis by ID.
     """
-    if incident_id not in incidents_db:
+    incident = get_incident_store().get(incident_id)
+    if incident is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Incident {incident_id} not found"
         )
     
-    incident = incidents_db[incident_id]
-    
     if incident["status"] == IncidentStatus.FAILED:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Incident analysis failed: {incident.get('error', 'Unknown error')}"
         )
     
-    if incident["status"] == IncidentStatus.ANALYZING:
+    if incident["status"] in (IncidentStatus.PENDING, IncidentStatus.ANALYZING):
         return AnalyzeIncidentResponse(
             incident_id=incident_id,
-            status=IncidentStatus.ANALYZING,
+            status=incident["status"],
             rca=None,
             summary=None
         )
@@ -246,6 +433,152 @@ async def get_incident(incident_id: str):
     )
 
 
+@router.get(
+    "/incidents/{incident_id}/log-templates",
+    response_model=LogTemplatesResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get log templates",
+    description="Retrieve the log message templates mined for an incident"
+)
+async def get_log_templates(
+    incident_id: str,
+    limit: int = 100,
+    min_level: Optional[LogLevel] = None
+):
+    """
+    Get mined log templates, most severe and frequent first.
+    """
+    incident = get_incident_store().get(incident_id)
+    if incident is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident {incident_id} not found"
+        )
+    templates = [LogTemplate(**data) for data in incident.get("log_templates", [])]
+    
+    if min_level:
+        severity = list(LogLevel)
+        templates = [t for t in templates if severity.index(t.level) >= severity.index(min_level)]
+    
+    return LogTemplatesResponse(
+        incident_id=incident_id,
+        total_templates=len(templates),
+        total_logs=incident.get("total_logs", 0),
+        templates=templates[:limit]
+    )
+
+
+@router.get(
+    "/incidents/{incident_id}/dependency-graph",
+    response_model=DependencyGraphResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get service dependency graph",
+    description="Retrieve service-to-service edges with call counts, error rates and latency percentiles"
+)
+async def get_dependency_graph(
+    incident_id: str,
+    anomalous_only: bool = False
+):
+    """
+    Get the weighted service dependency graph, busiest edges first.
+    """
+    incident = get_incident_store().get(incident_id)
+    if incident is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident {incident_id} not found"
+        )
+    edges = [ServiceEdgeStats(**data) for data in incident.get("service_edges", [])]
+    anomalous = [edge for edge in edges if edge.anomaly_detected]
+    
+    return DependencyGraphResponse(
+        incident_id=incident_id,
+        total_edges=len(edges),
+        anomalous_edges=len(anomalous),
+        edges=anomalous if anomalous_only else edges
+    )
+
+
+@router.get(
+    "/incidents/{incident_id}/latency",
+    response_model=LatencyBreakdownResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get latency breakdown",
+    description="Retrieve self-time and critical-path latency per service operation, with the slowest traces' critical paths"
+)
+async def get_latency_breakdown(
+    incident_id: str,
+    limit: int = 50
+):
+    """
+    Get latency attributed to (service, operation), most critical-path time first.
+    """
+    incident = get_incident_store().get(incident_id)
+    if incident is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident {incident_id} not found"
+        )
+    latency = incident.get("latency", {})
+    operations = [OperationLatency(**data) for data in latency.get("operations", [])]
+    
+    return LatencyBreakdownResponse(
+        incident_id=incident_id,
+        total_operations=len(operations),
+        operations=operations[:limit],
+        critical_paths=[TraceCriticalPath(**data) for data in latency.get("critical_paths", [])]
+    )
+
+
+@router.get(
+    "/incidents/{incident_id}/metric-series",
+    response_model=MetricSeriesResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get metric series",
+    description="Retrieve each metric's downsampled points for charting"
+)
+async def get_metric_series(
+    incident_id: str,
+    metric: Optional[List[str]] = Query(None),
+    max_points: Optional[int] = Query(None, ge=3)
+):
+    """
+    Get downsampled metric series, optionally only those matching a metric
+    name or a full series key such as cpu_usage{host=web-1}.
+    
+    Series are stored with metric_series_points points each; a smaller
+    max_points reduces them further with the same LTTB algorithm.
+    """
+    incident = get_incident_store().get(incident_id)
+    if incident is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident {incident_id} not found"
+        )
+    stored = [MetricSeries(**data) for data in incident.get("metric_series", [])]
+    series = [item for item in stored if not metric or item.metric_name in metric or item.series_key in metric]
+    
+    if max_points:
+        series = [_reduce_series(item, max_points) for item in series]
+    
+    return MetricSeriesResponse(
+        incident_id=incident_id,
+        total_series=len(stored),
+        series=series
+    )
+
+
+def _reduce_series(series: MetricSeries, max_points: int) -> MetricSeries:
+    """Downsample one stored series further."""
+    points = [
+        MetricDataPoint(
+            timestamp=timestamp, metric_name=series.metric_name, value=value, unit=series.unit, tags=series.tags
+        )
+        for timestamp, value in zip(series.timestamps, series.values)
+    ]
+    return MetricsParser.to_series(MetricsParser().downsample(points, max_points))[0] if points else series
+
+
 @router.get(
     "/incidents",
     status_code=status.HTTP_200_OK,
@@ -255,128 +588,221 @@ async def get_incident(incident_id: str):
 async def list_incidents(
     limit: int = 10,
     offset: int = 0,
-    status_filter: Optional[IncidentStatus] = None
+    status_filter: Optional[IncidentStatus] = None,
+    cursor: Optional[str] = None
 ):
     """
-    List all incidents with pagination.
-    """
-    incidents = list(incidents_db.items())
-    
-    # Filter by status if provided
-    if status_filter:
-        incidents = [
-            (id, data) for id, data in incidents
-            if data["status"] == status_filter
-        ]
+    List incidents, oldest first, with pagination.
     
-    # Pagination
-    total = len(incidents)
-    incidents = incidents[offset:offset + limit]
+    Pass the returned next_cursor as cursor to fetch the following page;
+    cursor paging stays fast however many incidents are stored. offset is
+    still accepted when no cursor is given.
+    """
+    store = get_incident_store()
+    try:
+        incidents, next_cursor = store.list(
+            limit=limit,
+            status=status_filter,
+            cursor=cursor,
+            offset=offset
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     return {
-        "total": total,
+        "total": store.count(status_filter),
         "limit": limit,
         "offset": offset,
+        "next_cursor": next_cursor,
         "incidents": [
             {
-                "incident_id": id,
+                "incident_id": data["incident_id"],
                 "status": data["status"],
                 "created_at": data["created_at"],
                 "completed_at": data.get("completed_at")
             }
-            for id, data in incidents
+            for data in incidents
         ]
     }
 
 
+# Multipart fields accepted by /incidents/analyze-files, for the OpenAPI docs
+_UPLOAD_FORM_SCHEMA = {
+    "type": "object",
+    "required": ["incident_id"],
+    "properties": {
+        "incident_id": {"type": "string"},
+        "log_files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+        "metric_files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+        "trace_files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+        "config_files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+        "deployments_json": {"type": "string"},
+        "time_window_minutes": {"type": "integer"},
+        "focus_area": {"type": "string"},
+        "include_summary": {"type": "boolean", "default": True},
+        "async_mode": {"type": "boolean", "default": False},
+    },
+}
+
+# Upload fields that are spooled, then parsed once the body has been read
+_SPOOLED_UPLOAD_FIELDS = ("metric_files", "trace_files", "config_files")
+
+
 @router.post(
     "/incidents/analyze-files",
     response_model=AnalyzeIncidentResponse,
     status_code=status.HTTP_200_OK,
     summary="Analyze incident from file uploads",
-    description="Upload log/metric/trace files and get analysis"
+    description="Upload log/metric/trace files and get analysis",
+    responses={202: {"description": "Queued for background analysis (async_mode=true)"}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"multipart/form-data": {"schema": _UPLOAD_FORM_SCHEMA}},
+        }
+    }
 )
-async def analyze_incident_from_files(
-    incident_id: str = Form(...),
-    log_files: List[UploadFile] = File(default=[]),
-    metric_files: List[UploadFile] = File(default=[]),
-    trace_files: List[UploadFile] = File(default=[]),
-    config_files: List[UploadFile] = File(default=[]),
-    deployments_json: Optional[str] = Form(default=None),
-    time_window_minutes: Optional[int] = Form(default=None),
-    focus_area: Optional[str] = Form(default=None),
-    include_summary: bool = Form(default=True)
-):
+async def analyze_incident_from_files(request: Request, response: Response):
     """
     Analyze incident from uploaded files.
     
     This endpoint accepts file uploads instead of JSON.
-    Useful for web UI integration.
+    Useful for web UI integration. Files may be gzip, bz2, xz or zstd
+    compressed; they are decompressed on the fly.
+    
+    The multipart body is read part by part as it arrives: log files are
+    parsed while they stream in, and other files are spooled (spilling to
+    disk when large), so no upload is ever held in memory whole. Metric and
+    trace files are parsed from their spool incrementally; config files are
+    small single documents and are decoded whole to parse them. Only the
+    parsed data reaches the analysis and the stored incident.
     """
-    logger.info(f"Analyzing incident {incident_id} from file uploads")
+    fields = {}
+    parsed_logs = []
+    spooled = {name: [] for name in _SPOOLED_UPLOAD_FIELDS}
     
     try:
-        # Read file contents
-        log_data = []
-        for log_file in log_files:
-            content = await log_file.read()
-            log_data.append({
-                "content": content.decode('utf-8'),
-                "source": log_file.filename
-            })
+        log_parser = DataUnifier().log_parser
+        async for part in MultipartStream(request).parts():
+            if part.filename is None:
+                fields[part.field_name] = await part.read_field()
+            elif part.field_name == "log_files":
+                # Stream log files straight into the parser
+                source = strip_compression_suffix(part.filename or "unknown")
+                batch = await log_parser.aparse_stream_batch(
+                    adecompress_stream(part.iter_chunks(), name=source),
+                    source=source
+                )
+                parsed_logs.append(batch)
+                logger.info(f"Streamed {len(batch)} log entries from {source}")
+            elif part.field_name in spooled:
+                spool = await spool_upload(
+                    adecompress_stream(part.iter_chunks(), name=part.filename or "upload")
+                )
+                spooled[part.field_name].append((part.filename, spool))
         
-        metric_data = []
-        for metric_file in metric_files:
-            content = await metric_file.read()
-            metric_data.append({
-                "content": content.decode('utf-8')
-            })
+        incident_id = fields.get("incident_id")
+        if not incident_id:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Form field 'incident_id' is required"
+            )
+        logger.info(f"Analyzing incident {incident_id} from file uploads")
         
-        trace_data = []
-        for trace_file in trace_files:
-            content = await trace_file.read()
-            trace_data.append(content.decode('utf-8'))
+        # Parse spooled files off the event loop; only the parsed data is kept
+        parsed_metrics = []
+        for filename, spool in spooled["metric_files"]:
+            batch = await asyncio.to_thread(_parse_spooled_metrics, spool)
+            parsed_metrics.append(batch)
+            logger.info(f"Parsed {len(batch)} metric points from {filename}")
         
-        config_data = []
-        for config_file in config_files:
-            content = await config_file.read()
-            config_data.append({
-                "content": content.decode('utf-8'),
-                "path": config_file.filename,
-                "format": "auto"
-            })
+        parsed_traces = []
+        for filename, spool in spooled["trace_files"]:
+            spans = await asyncio.to_thread(_parse_spooled_traces, spool)
+            parsed_traces.extend(spans)
+            logger.info(f"Streamed {len(spans)} spans from {filename}")
+        
+        parsed_configs = []
+        for filename, spool in spooled["config_files"]:
+            path = strip_compression_suffix(filename or "config")
+            changes = await asyncio.to_thread(_parse_spooled_config, spool, path)
+            parsed_configs.append(changes)
+            logger.info(f"Parsed {len(changes)} config entries from {path}")
         
         # Parse deployments if provided
         deployments = []
-        if deployments_json:
-            deployment_list = json.loads(deployments_json)
+        if fields.get("deployments_json"):
+            deployment_list = json.loads(fields["deployments_json"])
             for dep in deployment_list:
                 deployments.append(DeploymentEvent(**dep))
         
         # Create request object
-        from backend.models.schemas import LogFileData, MetricFileData, ConfigFileData
-        
-        request = AnalyzeIncidentRequest(
+        analyze_request = AnalyzeIncidentRequest(
             incident_id=incident_id,
-            log_files=[LogFileData(**log) for log in log_data],
-            metric_files=[MetricFileData(**metric) for metric in metric_data],
-            trace_files=trace_data,
-            config_files=[ConfigFileData(**config) for config in config_data],
             deployments=deployments,
-            time_window_minutes=time_window_minutes,
-            focus_area=focus_area,
-            include_summary=include_summary
+            time_window_minutes=fields.get("time_window_minutes") or None,
+            focus_area=fields.get("focus_area") or None,
+            include_summary=fields.get("include_summary", True)
         )
         
-        # Call the main analysis endpoint
-        return await analyze_incident(request)
+        # Run the main analysis pipeline
+        parsed = {
+            "parsed_logs": parsed_logs,
+            "parsed_metrics": parsed_metrics,
+            "parsed_traces": parsed_traces,
+            "parsed_configs": parsed_configs
+        }
+        if TypeAdapter(bool).validate_python(fields.get("async_mode", False)):
+            response.status_code = status.HTTP_202_ACCEPTED
+            return _enqueue_analysis(analyze_request, **parsed)
+        return await _analyze(analyze_request, **parsed)
         
+    except HTTPException:
+        raise
+    except FileSizeError as e:
+        logger.error(f"File upload rejected: {e.message}")
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=e.message
+        )
     except Exception as e:
         logger.error(f"File upload error: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File upload error: {str(e)}"
         )
+    finally:
+        for uploads in spooled.values():
+            for _, spool in uploads:
+                spool.close()
+
+
+def _parse_spooled_metrics(spool) -> MetricBatch:
+    """Parse a spooled metrics upload without decoding it into one string."""
+    parser = MetricsParser()
+    batch = parser.parse_csv_columns(spool)
+    if batch is None:
+        spool.seek(0)
+        batch = parser.to_batch(parser.parse_stream(iter_spooled_lines(spool)))
+    return batch
+
+
+def _parse_spooled_traces(spool) -> List[TraceSpan]:
+    """Parse a spooled trace upload without decoding it into one string."""
+    return list(TraceParser().parse_stream(iter_spooled_text(spool)))
+
+
+def _parse_spooled_config(spool, path: str) -> List[ConfigChange]:
+    """
+    Parse a spooled config upload.
+    
+    YAML and JSON configs are single documents, and format detection parses
+    the content, so the file is decoded whole; the text is dropped once parsed.
+    """
+    return ConfigParser().parse_file(read_spooled_text(spool), file_path=path)
 
 
 @router.delete(
@@ -389,13 +815,12 @@ async def delete_incident(incident_id: str):
     """
     Delete an incident.
     """
-    if incident_id not in incidents_db:
+    if not get_incident_store().delete(incident_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Incident {incident_id} not found"
         )
     
-    del incidents_db[incident_id]
     logger.info(f"Deleted incident {incident_id}")
     
     return None
@@ -418,8 +843,8 @@ def _generate_demo_rca(context, incident_id: str):
     error_rate = 0.0
     
     # Analyze logs for specific patterns
-    for log in context.logs:
-        log_msg = log.message.lower()
+    for message in context.logs.iter_messages():
+        log_msg = message.lower()
         if 'payment' in log_msg or 'fraud' in log_msg:
             is_payment_incident = True
         if 'connection' in log_msg and ('exhausted' in log_msg or 'pool' in log_msg):
@@ -0,0 +1,237 @@
+"""
+Streaming multipart uploads for InfraMind.
+Reads multipart/form-data request bodies part by part without buffering whole files.
+"""
+import codecs
+from collections import deque
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterable, AsyncIterator, Deque, Iterator, List, Optional, Tuple
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+from backend.core.config import get_settings
+from backend.core.exceptions import FileSizeError, ValidationError
+
+# Limit on plain (non-file) form fields
+MAX_FIELD_SIZE = 1024 * 1024
+
+# Read size used when decoding spooled uploads
+SPOOL_READ_SIZE = 64 * 1024
+
+_Event = Tuple[str, object]
+
+
+class UploadPart:
+    """One part of a multipart body, readable once as a stream of chunks."""
+    
+    def __init__(self, stream: "MultipartStream", field_name: str, filename: Optional[str]):
+        self.field_name = field_name
+        self.filename = filename
+        self.size = 0
+        self.done = False
+        self._stream = stream
+    
+    async def iter_chunks(self, max_bytes: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Yield the part's body as it arrives from the client.
+        
+        Args:
+            max_bytes: Limit on the raw part size. Falls back to max_file_size_bytes.
+        
+        Raises:
+            FileSizeError: If the part exceeds max_bytes
+        """
+        max_bytes = max_bytes or get_settings().max_file_size_bytes
+        while not self.done:
+            kind, data = await self._stream._next_event()
+            if kind == "end":
+                self.done = True
+                return
+            self.size += len(data)
+            if self.size > max_bytes:
+                raise FileSizeError(
+                    message=f"File {self.filename or self.field_name} exceeds {max_bytes / (1024 * 1024):g}MB",
+                    details={"file": self.filename or self.field_name, "max_bytes": max_bytes}
+                )
+            yield data
+    
+    async def read_field(self) -> str:
+        """Read a plain form field as text."""
+        data = bytearray()
+        async for chunk in self.iter_chunks(MAX_FIELD_SIZE):
+            data += chunk
+        return data.decode(self._stream.charset, errors='replace')
+    
+    async def drain(self) -> None:
+        """Discard whatever the caller did not read."""
+        while not self.done:
+            kind, _ = await self._stream._next_event()
+            self.done = kind == "end"
+
+
+class MultipartStream:
+    """
+    Incremental multipart/form-data reader over a request body.
+    
+    Parts are handed out in the order the client sent them, and each part's
+    body is pulled from the connection only as the caller reads it. Memory
+    use is bounded by the network chunk size regardless of file sizes.
+    """
+    
+    def __init__(self, request: Request):
+        """
+        Initialize multipart reader.
+        
+        Args:
+            request: Incoming request with a multipart/form-data body
+        
+        Raises:
+            ValidationError: If the request is not multipart/form-data
+        """
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise ValidationError(
+                message="Expected a multipart/form-data request body",
+                details={"content_type": request.headers.get("content-type")}
+            )
+        
+        charset = params.get(b"charset", b"utf-8").decode('latin-1')
+        try:
+            self.charset = codecs.lookup(charset).name
+        except LookupError:
+            self.charset = "latin-1"
+        
+        self._body = request.stream()
+        self._events: Deque[_Event] = deque()
+        self._finished = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+    
+    async def parts(self) -> AsyncIterator[UploadPart]:
+        """Yield each part; unread data of a part is skipped when moving on."""
+        while True:
+            kind, part = await self._next_event(allow_eof=True)
+            if kind == "eof":
+                return
+            if kind != "part":
+                continue
+            yield part
+            await part.drain()
+    
+    async def _next_event(self, allow_eof: bool = False) -> _Event:
+        """Return the next parser event, reading more of the body as needed."""
+        while not self._events:
+            if self._finished:
+                if allow_eof:
+                    return ("eof", None)
+                raise ValidationError(message="Multipart body ended in the middle of a part")
+            try:
+                chunk = await self._body.__anext__()
+            except StopAsyncIteration:
+                self._parser.finalize()
+                self._finished = True
+                continue
+            if chunk:
+                self._parser.write(chunk)
+        return self._events.popleft()
+    
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+    
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._events.append(("data", data[start:end]))
+    
+    def _on_part_end(self) -> None:
+        self._events.append(("end", None))
+    
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+    
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+    
+    def _on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+    
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise ValidationError(message="Multipart part is missing a Content-Disposition name")
+        filename = options.get(b"filename")
+        self._events.append(("part", UploadPart(
+            self,
+            field_name=options[b"name"].decode(self.charset, errors='replace'),
+            filename=filename.decode(self.charset, errors='replace') if filename is not None else None
+        )))
+
+
+async def spool_upload(chunks: AsyncIterable[bytes], max_memory: Optional[int] = None) -> SpooledTemporaryFile:
+    """
+    Copy a byte stream into a temporary file that spills to disk when large.
+    
+    Args:
+        chunks: Async iterable of byte chunks
+        max_memory: Bytes kept in memory before spilling. Falls back to upload_spool_threshold_mb.
+    
+    Returns:
+        SpooledTemporaryFile positioned at the start; the caller closes it
+    """
+    if max_memory is None:
+        max_memory = get_settings().upload_spool_threshold_bytes
+    spool = SpooledTemporaryFile(max_size=max_memory)
+    try:
+        async for chunk in chunks:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def iter_spooled_text(spool: SpooledTemporaryFile, encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a spooled upload chunk by chunk, replacing invalid bytes."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    for chunk in iter(lambda: spool.read(SPOOL_READ_SIZE), b""):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def iter_spooled_lines(spool: SpooledTemporaryFile, encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a spooled upload line by line, keeping the newlines."""
+    pending: List[str] = []
+    for text in iter_spooled_text(spool, encoding):
+        lines = text.split('\n')
+        if len(lines) > 1:
+            pending.append(lines[0])
+            yield "".join(pending) + '\n'
+            for line in lines[1:-1]:
+                yield line + '\n'
+            pending = []
+        pending.append(lines[-1])
+    tail = "".join(pending)
+    if tail:
+        yield tail
+
+
+def read_spooled_text(spool: SpooledTemporaryFile, encoding: str = "utf-8") -> str:
+    """
+    Decode a whole spooled upload, replacing invalid bytes.
+    
+    Only the decoded text is built up, never a second full copy of the bytes.
+    """
+    return "".join(iter_spooled_text(spool, encoding))
@@ -9,6 +9,7 @@ from .exceptions import (
     FileSizeError,
     ContextLengthError,
     AnalysisError,
+    QueueFullError,
 )
 
 __all__ = [
@@ -22,4 +23,5 @@ __all__ = [
     "FileSizeError",
     "ContextLengthError",
     "AnalysisError",
+    "QueueFullError",
 ]
@@ -3,7 +3,7 @@ Core configuration management for InfraMind.
 Loads settings from environment variables and provides centralized config access.
 """
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 
@@ -26,13 +26,35 @@ class Settings(BaseSettings):
     api_workers: int = 1
     
     # Processing Limits
-    max_file_size_mb: int = 10
-    max_context_length: int = 100000
+    max_file_size_mb: int = 10  # Applies to decompressed size for compressed uploads
+    max_decompression_ratio: int = 250  # Guard against decompression bombs
+    max_context_length: int = 100000  # Token budget for a prompt, incident context included
     request_timeout_seconds: int = 30
     
+    # Ingestion Settings
+    ingestion_workers: int = 0  # 0 = one worker process per CPU core
+    parallel_ingestion_threshold_mb: int = 8
+    ingestion_chunk_size_mb: int = 4
+    upload_spool_threshold_mb: int = 1  # Non-log uploads beyond this spill to a temp file
+    metric_series_points: int = 200  # Points kept per metric series (LTTB) for charts and prompts
+    metric_group_by: Optional[List[str]] = None  # Tags metric summaries are rolled up to; None keeps all
+    metric_types: Dict[str, str] = {}  # gauge/counter/histogram by metric name; others are inferred from the name
+    metric_detectors: bool = True  # Rolling anomaly and change-point detection; most of the summarization cost
+    
+    # Background Analysis Settings
+    analysis_workers: int = 2  # Analyses run concurrently in async mode
+    analysis_queue_size: int = 100  # Analyses allowed to wait before submissions get 503
+    
     # Cache Settings
     enable_cache: bool = True
     cache_ttl_seconds: int = 3600
+    cache_max_entries: int = 256
+    cache_db_path: str = ""  # SQLite file for a persistent cache tier; empty = memory only
+    
+    # Storage Settings
+    incident_db_path: str = "data/incidents.db"  # Shared by all workers; empty = in-memory only
+    metric_baseline_db_path: str = "data/metric_baselines.db"  # Per-series history; empty = in-memory only
+    metric_baseline_days: int = 30  # Days of history a metric baseline covers
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -46,6 +68,16 @@ class Settings(BaseSettings):
         """Convert MB to bytes for file size validation."""
         return self.max_file_size_mb * 1024 * 1024
     
+    @property
+    def upload_spool_threshold_bytes(self) -> int:
+        """Convert MB to bytes for upload spooling."""
+        return self.upload_spool_threshold_mb * 1024 * 1024
+    
+    @property
+    def ingestion_worker_count(self) -> int:
+        """Resolve the number of ingestion worker processes."""
+        return self.ingestion_workers or os.cpu_count() or 1
+    
     @property
     def is_production(self) -> bool:
         """Check if running in production environment."""
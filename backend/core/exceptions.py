@@ -67,3 +67,10 @@ class AnalysisError(InfraMindException):
     
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(message, details, status_code=500)
+
+
+class QueueFullError(InfraMindException):
+    """Raised when the background job queue cannot accept more work."""
+    
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, details, status_code=503)
@@ -0,0 +1,154 @@
+"""
+Background job queue for InfraMind.
+Runs submitted coroutines on a bounded pool of asyncio workers.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+
+from backend.core.config import get_settings
+from backend.core.exceptions import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+JobFactory = Callable[[], Awaitable[Any]]
+
+
+class JobQueue:
+    """
+    Bounded FIFO of background jobs served by a fixed number of workers.
+    
+    Jobs are zero-argument callables returning a coroutine, so nothing runs
+    until a worker picks the job up. Workers start lazily on the first
+    submission, inside the running event loop.
+    """
+    
+    def __init__(self, max_concurrency: int, max_queue_size: int, name: str = "jobs"):
+        """
+        Initialize job queue.
+        
+        Args:
+            max_concurrency: Number of jobs that may run at once
+            max_queue_size: Maximum jobs waiting to start
+            name: Name used in log messages
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_size = max_queue_size
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._completed = 0
+        self._failed = 0
+    
+    def submit(self, job_id: str, factory: JobFactory) -> int:
+        """
+        Enqueue a job.
+        
+        Args:
+            job_id: Identifier used in logs and when reporting unfinished jobs
+            factory: Callable returning the coroutine to run
+        
+        Returns:
+            Number of jobs waiting ahead of this one
+        
+        Raises:
+            QueueFullError: If max_queue_size jobs are already waiting
+        """
+        self._ensure_workers()
+        position = self._queue.qsize()
+        try:
+            self._queue.put_nowait((job_id, factory))
+        except asyncio.QueueFull:
+            raise QueueFullError(
+                f"The {self.name} queue is full ({self.max_queue_size} jobs waiting)",
+                details={"queue": self.name, "max_queue_size": self.max_queue_size}
+            )
+        logger.info(f"Queued {self.name} job {job_id} (position {position + 1})")
+        return position
+    
+    async def shutdown(self) -> List[str]:
+        """
+        Cancel running jobs, drop waiting ones and stop the workers.
+        
+        Returns:
+            IDs of jobs that were cancelled or never started
+        """
+        unfinished = list(self._running)
+        while self._queue is not None and not self._queue.empty():
+            job_id, _ = self._queue.get_nowait()
+            unfinished.append(job_id)
+        
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._running = {}
+        self._queue = None
+        
+        if unfinished:
+            logger.warning(f"Stopped {self.name} queue with {len(unfinished)} unfinished jobs")
+        return unfinished
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and job counters."""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._running),
+            "completed": self._completed,
+            "failed": self._failed,
+            "max_concurrency": self.max_concurrency,
+            "max_queue_size": self.max_queue_size,
+        }
+    
+    def _ensure_workers(self) -> None:
+        """Create the queue and worker tasks on first use."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(index), name=f"{self.name}-worker-{index}")
+                for index in range(self.max_concurrency)
+            ]
+    
+    async def _worker(self, index: int) -> None:
+        """Run jobs one at a time until cancelled."""
+        queue = self._queue
+        while True:
+            job_id, factory = await queue.get()
+            task = asyncio.current_task()
+            self._running[job_id] = task
+            try:
+                await factory()
+                self._completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"{self.name} job {job_id} failed: {e}")
+            finally:
+                self._running.pop(job_id, None)
+                queue.task_done()
+
+
+# Shared queue for background incident analyses
+_analysis_queue: Optional[JobQueue] = None
+
+
+def get_analysis_queue() -> JobQueue:
+    """
+    Get or create the shared analysis job queue.
+    
+    Returns:
+        JobQueue instance sized from settings
+    """
+    global _analysis_queue
+    if _analysis_queue is None:
+        settings = get_settings()
+        _analysis_queue = JobQueue(
+            max_concurrency=settings.analysis_workers,
+            max_queue_size=settings.analysis_queue_size,
+            name="analysis"
+        )
+    return _analysis_queue
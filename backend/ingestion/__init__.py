@@ -4,14 +4,26 @@ Data ingestion and parsing modules for InfraMind.
 
 from backend.ingestion.log_parser import LogParser
 from backend.ingestion.metrics_parser import MetricsParser
+from backend.ingestion.metric_anomalies import MetricAnomalyDetector
+from backend.ingestion.change_points import ChangePointDetector
+from backend.ingestion.series_index import SeriesIndex
 from backend.ingestion.config_parser import ConfigParser
 from backend.ingestion.trace_parser import TraceParser
+from backend.ingestion.trace_index import TraceIndex
 from backend.ingestion.data_unifier import DataUnifier
+from backend.ingestion.timestamp_parser import TimestampParser
+from backend.ingestion.log_templates import LogTemplateMiner
 
 __all__ = [
     'LogParser',
     'MetricsParser', 
+    'MetricAnomalyDetector',
+    'ChangePointDetector',
+    'SeriesIndex',
     'ConfigParser',
     'TraceParser',
-    'DataUnifier'
+    'TraceIndex',
+    'DataUnifier',
+    'TimestampParser',
+    'LogTemplateMiner'
 ]
@@ -0,0 +1,301 @@
+"""
+Change-point detection for InfraMind.
+Finds level shifts in metric and error-rate series and estimates when an incident began.
+"""
+import math
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.models import ChangePoint, LogBatch, TraceSpan
+from backend.models.log_batch import from_epoch_micros, to_epoch_micros
+from backend.ingestion.metric_anomalies import time_array
+
+# Scales a median absolute deviation to a standard deviation for normal data
+MAD_TO_STD = 1.4826
+
+# Floor for a series' noise level, as a fraction of its mean absolute value
+MIN_SIGMA_FRACTION = 1e-3
+
+# Buckets the incident window is cut into for per-service error rates
+ERROR_RATE_BUCKETS = 100
+MIN_BUCKET_MICROS = 1_000_000
+
+# Cap on change scores: past this every shift is unmistakable, and a step in a
+# flat series (σ near zero) would otherwise outrank everything else
+MAX_SCORE = 100.0
+
+# Change points within this fraction of the top score can mark the onset
+ONSET_SCORE_FRACTION = 0.25
+
+
+class ChangePointDetector:
+    """
+    Binary segmentation with a CUSUM statistic, over many series at once.
+    
+    For a segment of n points with partial sums S_k, the standardized CUSUM
+    |S_k - k/n S_n| / (σ sqrt(k (n - k) / n)) is the likelihood-ratio
+    statistic for a shift in mean after point k. The best split of every
+    segment is found with one cumulative sum over the whole array; splits
+    that pass the threshold cut their segment in two and the next round
+    searches the halves. Each round is linear in the total number of
+    points, and there are at most max_depth rounds.
+    
+    σ is estimated per series from first differences, which a level shift
+    barely moves: the larger of the median- and mean-based estimates, so
+    sparse series (mostly zeros, like error rates) are not given σ = 0.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = 6.0,
+        min_shift: float = 2.0,
+        min_segment: int = 5,
+        max_depth: int = 3
+    ):
+        """
+        Initialize the detector.
+        
+        Args:
+            threshold: Standardized CUSUM statistic a split must exceed
+            min_shift: Smallest shift reported, in units of the series' noise σ
+            min_segment: Fewest points on either side of a change
+            max_depth: Rounds of splitting, so at most 2^max_depth - 1 changes per series
+        """
+        self.threshold = threshold
+        self.min_shift = min_shift
+        self.min_segment = min_segment
+        self.max_depth = max_depth
+    
+    def detect(
+        self,
+        series_names: Sequence[str],
+        codes: np.ndarray,
+        micros: np.ndarray,
+        values: np.ndarray,
+        kind: str = "metric"
+    ) -> List[ChangePoint]:
+        """
+        Find change points in every series.
+        
+        Args:
+            series_names: Name of each series code; every code must have points
+            codes: Series code of each point
+            micros: Wall-clock epoch microseconds of each point
+            values: Value of each point
+            kind: Recorded on each change point ("metric" or "error_rate")
+        
+        Returns:
+            Change points, highest score first, then earliest
+        """
+        if not len(values):
+            return []
+        
+        # Put each series in time order, one after another
+        by_time = np.argsort(micros, kind='stable')
+        order = by_time[np.argsort(codes[by_time].astype(np.min_scalar_type(len(series_names))), kind='stable')]
+        x = np.asarray(values, dtype=np.float64)[order]
+        times = micros[order]
+        series_of = codes[order]
+        counts = np.bincount(codes, minlength=len(series_names))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        
+        # Centre each series so the running sums stay small
+        levels = np.repeat(np.add.reduceat(x, starts) / counts, counts)
+        running = np.concatenate(([0.0], np.cumsum(x - levels)))
+        sigmas = np.repeat(_noise_levels(x, starts, counts), counts)
+        
+        change_points = []
+        segments = (starts, starts + counts)
+        for _ in range(self.max_depth):
+            found, segments = self._split(running, sigmas, levels, segments)
+            for index, before, after, score in found:
+                change_points.append(ChangePoint.model_construct(
+                    series=series_names[series_of[index]],
+                    kind=kind,
+                    timestamp=from_epoch_micros(times[index]),
+                    before=before,
+                    after=after,
+                    magnitude=after - before,
+                    score=round(min(score, MAX_SCORE), 2)
+                ))
+            if not len(segments[0]):
+                break
+        
+        change_points.sort(key=lambda point: (-point.score, point.timestamp))
+        return change_points
+    
+    def _split(
+        self,
+        running: np.ndarray,
+        sigmas: np.ndarray,
+        levels: np.ndarray,
+        segments: Tuple[np.ndarray, np.ndarray]
+    ) -> Tuple[List[Tuple[int, float, float, float]], Tuple[np.ndarray, np.ndarray]]:
+        """
+        Find the best split of every segment.
+        
+        Args:
+            running: Running sum of the centred values, with a leading zero
+            sigmas: Noise σ of each point's series
+            levels: Mean of each point's series, removed by the centring
+            segments: (start, end) indexes of the segments to search
+        
+        Returns:
+            ([(first index after the change, mean before, mean after, score)], the halves to search next)
+        """
+        seg_starts, seg_ends = segments
+        lengths = seg_ends - seg_starts
+        searchable = lengths >= 2 * self.min_segment
+        seg_starts, seg_ends, lengths = seg_starts[searchable], seg_ends[searchable], lengths[searchable]
+        if not len(seg_starts):
+            return [], (seg_starts, seg_ends)
+        
+        # Candidate splits: k points on the left, k in [min_segment, n - min_segment]
+        splits = lengths - 2 * self.min_segment + 1
+        segment_of = np.repeat(np.arange(len(seg_starts)), splits)
+        k = np.arange(splits.sum()) - np.repeat(np.cumsum(splits) - splits, splits) + self.min_segment
+        n = lengths[segment_of]
+        first = seg_starts[segment_of]
+        
+        left_sum = running[first + k] - running[first]
+        total = running[seg_ends] - running[seg_starts]
+        cusum = np.abs(left_sum - k / n * total[segment_of])
+        statistic = cusum / (sigmas[first] * np.sqrt(k * (n - k) / n))
+        
+        offsets = np.cumsum(splits) - splits
+        best_score = np.maximum.reduceat(statistic, offsets)
+        is_best = statistic == np.repeat(best_score, splits)
+        best = np.minimum.reduceat(np.where(is_best, np.arange(len(k)), len(k)), offsets)
+        
+        best_k = k[best]
+        left_mean = left_sum[best] / best_k
+        right_mean = (total - left_sum[best]) / (lengths - best_k)
+        shift = np.abs(right_mean - left_mean)
+        accepted = (best_score > self.threshold) & (shift >= self.min_shift * sigmas[seg_starts])
+        
+        found = []
+        for segment in np.flatnonzero(accepted):
+            level = levels[seg_starts[segment]]
+            found.append((
+                int(seg_starts[segment] + best_k[segment]),
+                float(left_mean[segment] + level),
+                float(right_mean[segment] + level),
+                float(best_score[segment])
+            ))
+        
+        cut = seg_starts[accepted] + best_k[accepted]
+        next_starts = np.concatenate((seg_starts[accepted], cut))
+        next_ends = np.concatenate((cut, seg_ends[accepted]))
+        return found, (next_starts, next_ends)
+
+
+def error_rate_series(
+    logs: LogBatch,
+    traces: Sequence[TraceSpan],
+    buckets: int = ERROR_RATE_BUCKETS
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-service error rate over time, from error logs and failing spans.
+    
+    Events are counted in equal time buckets across the data; a bucket with
+    no events for a service has no rate. Services that never fail are left
+    out, since their rate cannot change.
+    
+    Returns:
+        (service names, service code per point, bucket start micros per point, error rate per point)
+    """
+    log_rows = np.flatnonzero(logs.service_codes >= 0) if len(logs) else np.zeros(0, dtype=np.intp)
+    services = list(dict.fromkeys([logs.services[code] for code in np.unique(logs.service_codes[log_rows])]
+                                  + [span.service for span in traces]))
+    if not services:
+        return [], np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.int64), np.zeros(0)
+    service_code = {name: code for code, name in enumerate(services)}
+    
+    log_services = np.array([service_code.get(name, -1) for name in logs.services], dtype=np.intp)
+    event_services = np.concatenate((
+        log_services[logs.service_codes[log_rows]] if len(log_rows) else np.zeros(0, dtype=np.intp),
+        np.fromiter((service_code[span.service] for span in traces), dtype=np.intp, count=len(traces))
+    ))
+    event_micros = np.concatenate((
+        logs.timestamps[log_rows],
+        np.fromiter((to_epoch_micros(span.start_time) for span in traces), dtype=np.int64, count=len(traces))
+    ))
+    event_errors = np.concatenate((
+        logs.error_mask()[log_rows],
+        np.fromiter((span.status != "OK" for span in traces), dtype=bool, count=len(traces))
+    ))
+    
+    start = int(event_micros.min())
+    width = max(math.ceil((int(event_micros.max()) - start + 1) / buckets), MIN_BUCKET_MICROS)
+    bucket = (event_micros - start) // width
+    n_buckets = int(bucket.max()) + 1
+    cell = event_services * n_buckets + bucket
+    totals = np.bincount(cell, minlength=len(services) * n_buckets)
+    errors = np.bincount(cell, weights=event_errors, minlength=len(services) * n_buckets)
+    
+    failing = np.flatnonzero(np.bincount(event_services, weights=event_errors, minlength=len(services)) > 0)
+    renumbered = np.full(len(services), -1)
+    renumbered[failing] = np.arange(len(failing))
+    cells = np.flatnonzero((totals > 0) & (renumbered[np.arange(len(totals)) // n_buckets] >= 0))
+    return (
+        [services[code] for code in failing],
+        renumbered[cells // n_buckets],
+        start + (cells % n_buckets) * width,
+        errors[cells] / totals[cells]
+    )
+
+
+def wall_clock_micros(timestamps: Union[Sequence[datetime], np.ndarray]) -> np.ndarray:
+    """Timestamps as wall-clock epoch microseconds, ignoring any tzinfo like to_epoch_micros."""
+    times = time_array(timestamps)
+    if times.dtype.kind == 'M':
+        return times.astype(np.int64)
+    return np.fromiter(map(to_epoch_micros, times), dtype=np.int64, count=len(times))
+
+
+def estimate_onset(change_points: Sequence[ChangePoint]) -> Optional[datetime]:
+    """
+    Estimate when the incident began from ranked change points.
+    
+    The earliest change among the strongest ones wins, so a weak early
+    wobble does not pull the onset back, but the first of several strong
+    shifts does.
+    """
+    if not change_points:
+        return None
+    top_score = max(point.score for point in change_points)
+    return min(
+        point.timestamp for point in change_points
+        if point.score >= ONSET_SCORE_FRACTION * top_score
+    )
+
+
+def _noise_levels(x: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Per-series σ from absolute first differences, which have scale σ·√2 for white noise."""
+    diffs = np.abs(np.diff(x))
+    # Differences across a series boundary go to an extra group sorted after the rest
+    diff_series = np.repeat(np.arange(len(counts)), counts)[:-1]
+    diff_series[starts[1:] - 1] = len(counts)
+    # Ties between values do not move a median, so only the pass by series needs to be stable
+    order = np.argsort(diffs)
+    order = order[np.argsort(diff_series[order].astype(np.min_scalar_type(len(counts))), kind='stable')]
+    sorted_diffs = diffs[order]
+    
+    valid = counts - 1
+    diff_starts = np.concatenate(([0], np.cumsum(valid)[:-1]))
+    median = np.zeros(len(counts))
+    has = valid > 0
+    lower = diff_starts[has] + (valid[has] - 1) // 2
+    upper = diff_starts[has] + valid[has] // 2
+    median[has] = (sorted_diffs[lower] + sorted_diffs[upper]) / 2
+    sigma = MAD_TO_STD * median / math.sqrt(2)
+    
+    # E|d| = 2σ/√π for white noise
+    within = diff_series < len(counts)
+    sums = np.bincount(diff_series[within], weights=diffs[within], minlength=len(counts))
+    sigma = np.fmax(sigma, math.sqrt(math.pi) / 2 * sums / np.maximum(valid, 1))
+    
+    scale = np.add.reduceat(np.abs(x), starts) / counts
+    return np.fmax(sigma, np.fmax(MIN_SIGMA_FRACTION * scale, 1e-12))
@@ -2,30 +2,84 @@
 Data unifier for InfraMind.
 Combines data from all parsers into unified context for analysis.
 """
-from typing import List, Optional, Dict, Any
+from typing import BinaryIO, List, Optional, Dict, Any, Union
 from datetime import datetime, timedelta
 import logging
 
 from backend.models import (
-    LogEntry, MetricSummary, TraceSpan, ConfigChange, 
-    DeploymentEvent, UnifiedContext
+    LogBatch, LogEntry, LogLevel, MetricBatch, MetricDataPoint, MetricSummary, TraceSpan, ConfigChange, 
+    DeploymentEvent, UnifiedContext, ChangePoint
 )
 from backend.ingestion.log_parser import LogParser
 from backend.ingestion.metrics_parser import MetricsParser
 from backend.ingestion.config_parser import ConfigParser
 from backend.ingestion.trace_parser import TraceParser
+from backend.ingestion.parallel_parser import ParallelParser
+from backend.ingestion.log_templates import LogTemplateMiner
+from backend.ingestion.change_points import error_rate_series, estimate_onset
+from backend.ingestion.decompression import decompress_stream, read_decompressed, strip_compression_suffix
+from backend.storage import get_baseline_store
 
 logger = logging.getLogger(__name__)
 
+# Change points kept on the context, highest score first
+MAX_CHANGE_POINTS = 25
+
 
 class DataUnifier:
     """Unifies data from multiple sources into a single context."""
     
     def __init__(self):
         self.log_parser = LogParser()
-        self.metrics_parser = MetricsParser()
+        self.metrics_parser = MetricsParser(baseline_store=get_baseline_store())
         self.config_parser = ConfigParser()
         self.trace_parser = TraceParser()
+        self.parallel_parser = ParallelParser()
+    
+    def parse_logs(self, content: str, source: str = "unknown") -> LogBatch:
+        """
+        Parse log file content, fanning out to worker processes for large files.
+        
+        Args:
+            content: Raw content of the log file
+            source: Source name for the logs (e.g., service name)
+            
+        Returns:
+            LogBatch of parsed rows
+        """
+        if self.parallel_parser.should_parallelize(len(content)):
+            return self.parallel_parser.parse_logs(content.encode('utf-8'), source)
+        return self.log_parser.parse_file_batch(content, source)
+    
+    def parse_metrics(self, content: str) -> MetricBatch:
+        """
+        Parse metrics file content into columns.
+        
+        CSV files go through the vectorized pandas reader; CSV it cannot
+        handle is parsed row by row, fanning out to worker processes when
+        large. Points are only materialized as objects when a caller asks.
+        
+        Args:
+            content: Raw content of metrics file (JSON or CSV format)
+            
+        Returns:
+            MetricBatch of parsed points
+        """
+        stripped = content.lstrip()
+        is_json = stripped.startswith('{') or stripped.startswith('[')
+        if not is_json:
+            batch = self.metrics_parser.parse_csv_columns(content)
+            if batch is not None:
+                return batch
+            if self.parallel_parser.should_parallelize(len(content)):
+                return self.metrics_parser.to_batch(self.parallel_parser.parse_metrics_csv(content.encode('utf-8')))
+        return self.metrics_parser.to_batch(self.metrics_parser.parse_file(content))
+    
+    def _as_text(self, content: Union[str, bytes, BinaryIO], name: str) -> str:
+        """Return file content as text, decompressing bytes or binary streams if needed."""
+        if isinstance(content, str):
+            return content
+        return read_decompressed(content, name)
     
     def _compare_timestamps(self, dt1: datetime, dt2: datetime) -> bool:
         """Compare two datetimes, handling timezone-aware and naive datetimes."""
@@ -38,41 +92,59 @@ class DataUnifier:
     
     def create_unified_context(
         self,
-        logs: List[LogEntry],
+        logs: Union[LogBatch, List[LogEntry]],
         metrics: List[MetricSummary],
         traces: List[TraceSpan],
         configs: List[ConfigChange],
         deployments: List[DeploymentEvent],
-        time_window_minutes: Optional[int] = None
+        time_window_minutes: Optional[int] = None,
+        metric_points: Optional[List[MetricDataPoint]] = None
     ) -> UnifiedContext:
         """
         Create unified context from all data sources.
         
         Args:
-            logs: Parsed log entries
+            logs: Parsed logs as a LogBatch (a list of LogEntry is converted)
             metrics: Parsed metric summaries
             traces: Parsed trace spans
             configs: Configuration changes
             deployments: Deployment events
-            time_window_minutes: Optional time window to filter data (in minutes from now)
+            time_window_minutes: Optional time window to filter data (in minutes before
+                the estimated onset, or before now if no onset was found)
+            metric_points: Downsampled metric data points, for sparklines and charts
             
         Returns:
             UnifiedContext with all data combined
         """
+        if not isinstance(logs, LogBatch):
+            logs = LogBatch.from_entries(logs)
+        metric_points = metric_points or []
+        
+        # Locate level shifts before filtering, so the onset reflects all the data
+        change_points = self._find_change_points(logs, metrics, traces)
+        estimated_onset = estimate_onset(change_points)
+        if estimated_onset:
+            logger.info(f"Estimated incident onset at {estimated_onset} from {len(change_points)} change points")
+        
         # Filter by time window if specified
         if time_window_minutes:
-            from datetime import timezone
-            cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=time_window_minutes)
+            # Timestamps are compared as wall-clock times, like LogBatch rows, so
+            # "now" is the naive local time rather than UTC
+            if estimated_onset:
+                cutoff_time = estimated_onset - timedelta(minutes=time_window_minutes)
+            else:
+                cutoff_time = datetime.now() - timedelta(minutes=time_window_minutes)
             
-            # Make cutoff_time naive if we have naive timestamps
-            logs = [log for log in logs if self._compare_timestamps(log.timestamp, cutoff_time)]
-            metrics = [metric for metric in metrics if self._compare_timestamps(metric.start_time, cutoff_time)]
+            logs = logs.filter(logs.since(cutoff_time))
+            # A metric series is kept if any of it falls inside the window
+            metrics = [metric for metric in metrics if self._compare_timestamps(metric.end_time, cutoff_time)]
+            metric_points = [point for point in metric_points if self._compare_timestamps(point.timestamp, cutoff_time)]
             traces = [trace for trace in traces if self._compare_timestamps(trace.start_time, cutoff_time)]
             configs = [config for config in configs if self._compare_timestamps(config.timestamp, cutoff_time)]
             deployments = [dep for dep in deployments if self._compare_timestamps(dep.timestamp, cutoff_time)]
         
         # Sort everything by time for coherent narrative (normalize timezones first)
-        logs.sort(key=lambda x: x.timestamp.replace(tzinfo=None) if x.timestamp.tzinfo else x.timestamp)
+        logs = logs.sort_by_time()
         metrics.sort(key=lambda x: x.start_time.replace(tzinfo=None) if x.start_time.tzinfo else x.start_time)
         traces.sort(key=lambda x: x.start_time.replace(tzinfo=None) if x.start_time.tzinfo else x.start_time)
         configs.sort(key=lambda x: x.timestamp.replace(tzinfo=None) if x.timestamp.tzinfo else x.timestamp)
@@ -80,8 +152,8 @@ class DataUnifier:
         
         # Calculate time range (normalize timezones)
         all_timestamps = []
-        if logs:
-            all_timestamps.extend([log.timestamp.replace(tzinfo=None) if log.timestamp.tzinfo else log.timestamp for log in logs])
+        if len(logs):
+            all_timestamps.extend(logs.time_range())
         if metrics:
             all_timestamps.extend([m.start_time.replace(tzinfo=None) if m.start_time.tzinfo else m.start_time for m in metrics])
             all_timestamps.extend([m.end_time.replace(tzinfo=None) if m.end_time.tzinfo else m.end_time for m in metrics])
@@ -102,15 +174,19 @@ class DataUnifier:
         
         # Identify services involved
         services = set()
-        for log in logs:
-            services.add(log.service)
+        services.update(logs.service_names())
         for trace in traces:
             services.add(trace.service)
         for deployment in deployments:
             services.add(deployment.service)
         
+        # Collapse repetitive messages into templates
+        log_templates = LogTemplateMiner().add_batch(logs).templates()
+        if len(logs):
+            logger.info(f"Mined {len(log_templates)} log templates from {len(logs)} entries")
+        
         # Count errors
-        error_count = len([log for log in logs if log.level.value in ["ERROR", "CRITICAL"]])
+        error_count = int(logs.level_in([LogLevel.ERROR, LogLevel.CRITICAL]).sum())
         error_count += len([trace for trace in traces if trace.status in ["ERROR", "TIMEOUT"]])
         
         return UnifiedContext(
@@ -118,19 +194,43 @@ class DataUnifier:
             time_range_start=time_range_start,
             time_range_end=time_range_end,
             logs=logs,
+            log_templates=log_templates,
             metrics=metrics,
+            metric_data_points=metric_points,
             traces=traces,
             config_changes=configs,
             deployment_events=deployments,
+            change_points=change_points[:MAX_CHANGE_POINTS],
+            estimated_onset=estimated_onset,
             services_involved=list(services),
             error_count=error_count
         )
     
+    def _find_change_points(
+        self,
+        logs: LogBatch,
+        metrics: List[MetricSummary],
+        traces: List[TraceSpan]
+    ) -> List[ChangePoint]:
+        """
+        Rank the metric change points with those in per-service error rates.
+        
+        Returns:
+            All change points, highest score first
+        """
+        change_points = [point for metric in metrics for point in metric.change_points]
+        services, codes, micros, rates = error_rate_series(logs, traces)
+        change_points.extend(self.metrics_parser.change_point_detector.detect(
+            services, codes, micros, rates, kind="error_rate"
+        ))
+        change_points.sort(key=lambda point: (-point.score, point.timestamp))
+        return change_points
+    
     def from_files(
         self,
-        log_files: Optional[List[Dict[str, str]]] = None,
-        metric_files: Optional[List[Dict[str, str]]] = None,
-        trace_files: Optional[List[str]] = None,
+        log_files: Optional[List[Dict[str, Any]]] = None,
+        metric_files: Optional[List[Dict[str, Any]]] = None,
+        trace_files: Optional[List[Union[str, bytes]]] = None,
         config_files: Optional[List[Dict[str, Any]]] = None,
         deployment_data: Optional[List[DeploymentEvent]] = None,
         time_window_minutes: Optional[int] = None
@@ -138,8 +238,11 @@ class DataUnifier:
         """
         Create unified context by parsing files.
         
+        Binary content and streams may be gzip, bz2, xz or zstd compressed; they
+        are detected by magic bytes and decompressed incrementally.
+        
         Args:
-            log_files: List of dicts with 'content' and optional 'source'
+            log_files: List of dicts with 'content' (or a binary 'stream') and optional 'source'
             metric_files: List of dicts with 'content'
             trace_files: List of trace file contents
             config_files: List of dicts with 'content', 'format', and 'path'
@@ -149,8 +252,9 @@ class DataUnifier:
         Returns:
             UnifiedContext with parsed data
         """
-        logs = []
+        log_batches = []
         metrics = []
+        metric_points = []
         traces = []
         configs = []
         deployments = deployment_data or []
@@ -159,9 +263,15 @@ class DataUnifier:
         if log_files:
             for log_file in log_files:
                 try:
-                    source = log_file.get('source', 'unknown')
-                    parsed_logs = self.log_parser.parse_file(log_file['content'], source)
-                    logs.extend(parsed_logs)
+                    source = strip_compression_suffix(log_file.get('source', 'unknown'))
+                    raw = log_file.get('stream', log_file.get('content'))
+                    if isinstance(raw, (bytes, bytearray)):
+                        raw = [bytes(raw)]
+                    if not isinstance(raw, str):
+                        parsed_logs = self.log_parser.parse_stream_batch(decompress_stream(raw, source), source)
+                    else:
+                        parsed_logs = self.parse_logs(log_file['content'], source)
+                    log_batches.append(parsed_logs)
                     logger.info(f"Parsed {len(parsed_logs)} log entries from {source}")
                 except Exception as e:
                     logger.error(f"Failed to parse log file: {e}")
@@ -170,9 +280,10 @@ class DataUnifier:
         if metric_files:
             for metric_file in metric_files:
                 try:
-                    parsed_metrics = self.metrics_parser.parse_file(metric_file['content'])
+                    parsed_metrics = self.parse_metrics(self._as_text(metric_file['content'], "metrics"))
                     summaries = self.metrics_parser.create_summaries(parsed_metrics)
                     metrics.extend(summaries)
+                    metric_points.extend(self.metrics_parser.downsample(parsed_metrics))
                     logger.info(f"Parsed {len(summaries)} metric summaries")
                 except Exception as e:
                     logger.error(f"Failed to parse metric file: {e}")
@@ -181,7 +292,7 @@ class DataUnifier:
         if trace_files:
             for trace_content in trace_files:
                 try:
-                    parsed_traces = self.trace_parser.parse_file(trace_content)
+                    parsed_traces = self.trace_parser.parse_file(self._as_text(trace_content, "traces"))
                     traces.extend(parsed_traces)
                     logger.info(f"Parsed {len(parsed_traces)} trace spans")
                 except Exception as e:
@@ -192,9 +303,9 @@ class DataUnifier:
             for config_file in config_files:
                 try:
                     file_format = config_file.get('format', 'auto')
-                    file_path = config_file.get('path', 'config')
+                    file_path = strip_compression_suffix(config_file.get('path', 'config'))
                     parsed_configs = self.config_parser.parse_file(
-                        config_file['content'],
+                        self._as_text(config_file['content'], file_path),
                         file_format,
                         file_path
                     )
@@ -204,12 +315,13 @@ class DataUnifier:
                     logger.error(f"Failed to parse config file: {e}")
         
         return self.create_unified_context(
-            logs=logs,
+            logs=LogBatch.concat(log_batches),
             metrics=metrics,
             traces=traces,
             configs=configs,
             deployments=deployments,
-            time_window_minutes=time_window_minutes
+            time_window_minutes=time_window_minutes,
+            metric_points=metric_points
         )
     
     def filter_by_severity(
@@ -235,10 +347,10 @@ class DataUnifier:
         log_levels = {"DEBUG": 0, "INFO": 1, "WARNING": 2, "ERROR": 3, "CRITICAL": 4}
         min_level = log_levels.get(min_log_level.upper(), 2)
         
-        filtered_logs = [
-            log for log in context.logs
-            if log_levels.get(log.level.value, 0) >= min_level
-        ]
+        filtered_logs = context.logs.filter(context.logs.level_in(
+            level for level in LogLevel
+            if log_levels.get(level.value, 0) >= min_level
+        ))
         
         # Filter metrics to anomalies
         filtered_metrics = context.metrics
@@ -261,10 +373,16 @@ class DataUnifier:
             time_range_start=context.time_range_start,
             time_range_end=context.time_range_end,
             logs=filtered_logs,
+            log_templates=[
+                template for template in context.log_templates
+                if log_levels.get(template.level.value, 0) >= min_level
+            ],
             metrics=filtered_metrics,
             traces=filtered_traces,
             config_changes=context.config_changes,  # Keep all config changes
             deployment_events=context.deployment_events,  # Keep all deployments
+            change_points=context.change_points,
+            estimated_onset=context.estimated_onset,
             services_involved=context.services_involved,
             error_count=len(filtered_logs) + len(filtered_traces)
         )
@@ -283,14 +401,29 @@ class DataUnifier:
         Returns:
             Enriched UnifiedContext with additional metadata
         """
-        # Build dependency graph from traces
         if context.traces:
-            dependency_graph = self.trace_parser.build_dependency_graph(context.traces)
-            logger.info(f"Built dependency graph with {len(dependency_graph)} services")
+            # Index spans once; every trace analysis reuses it
+            trace_index = self.trace_parser.build_index(context.traces)
+            
+            # Build dependency graph from traces
+            context.dependency_graph = self.trace_parser.build_dependency_graph(trace_index)
+            logger.info(f"Built dependency graph with {len(context.dependency_graph)} services")
+            
+            # Weight each edge of the graph with call, error and latency stats
+            context.service_edges = self.trace_parser.build_edge_stats(trace_index)
+            anomalous = sum(edge.anomaly_detected for edge in context.service_edges)
+            logger.info(f"Computed stats for {len(context.service_edges)} service edges ({anomalous} anomalous)")
+            
+            # Attribute latency to operations via self-time and critical paths
+            context.operation_latency, context.critical_paths = self.trace_parser.analyze_latency(trace_index)
+            logger.info(f"Attributed latency to {len(context.operation_latency)} operations")
             
             # Find error chains
-            error_chains = self.trace_parser.find_error_chains(context.traces)
-            logger.info(f"Found {len(error_chains)} error chains")
+            context.error_chains = self.trace_parser.find_error_chains(trace_index)
+            logger.info(f"Found {len(context.error_chains)} error chains")
+            
+            # Merge chains that share ancestors into propagation trees
+            context.error_propagation = self.trace_parser.build_error_propagation(trace_index)
         
         # Find temporal correlations
         # (This is where we could add more sophisticated correlation logic)
@@ -302,7 +435,8 @@ class DataUnifier:
         return {
             "incident_id": context.incident_id,
             "total_logs": len(context.logs),
-            "error_logs": len([log for log in context.logs if log.level.value in ["ERROR", "CRITICAL"]]),
+            "log_templates": len(context.log_templates),
+            "error_logs": int(context.logs.level_in([LogLevel.ERROR, LogLevel.CRITICAL]).sum()),
             "total_metrics": len(context.metrics),
             "anomalous_metrics": len([m for m in context.metrics if m.anomaly_detected]),
             "total_traces": len(context.traces),
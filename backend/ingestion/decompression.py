@@ -0,0 +1,474 @@
+"""
+Streaming decompression for InfraMind.
+Detects gzip, bz2, xz and zstd payloads by magic bytes and inflates them incrementally.
+"""
+import bz2
+import lzma
+import zlib
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Iterable, Iterator, List, Optional, Union
+import logging
+
+from backend.core.config import get_settings
+from backend.core.exceptions import FileSizeError, ParsingError
+
+logger = logging.getLogger(__name__)
+
+
+# Leading bytes that identify each supported format
+MAGIC_BYTES = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+# File name suffixes for the same formats
+COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+}
+
+# Enough leading bytes to recognize every format above
+SNIFF_SIZE = max(len(magic) for magic in MAGIC_BYTES.values())
+
+# Upper bound on each piece of output produced from one input chunk
+OUTPUT_CHUNK_SIZE = 256 * 1024
+
+# Read size used when decompressing from file-like objects
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def detect_compression(head: bytes) -> Optional[str]:
+    """
+    Identify a compressed payload from its leading bytes.
+    
+    Args:
+        head: First bytes of the payload (at least SNIFF_SIZE when available)
+    
+    Returns:
+        "gzip", "bz2", "xz", "zstd", or None for uncompressed data
+    """
+    for name, magic in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def strip_compression_suffix(filename: str) -> str:
+    """Drop a trailing compression extension, e.g. 'app.log.gz' -> 'app.log'."""
+    lowered = filename.lower()
+    for suffix in COMPRESSION_SUFFIXES:
+        if lowered.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+
+class _ZlibAdapter:
+    """Give zlib's decompressobj the same interface as bz2/lzma decompressors."""
+    
+    def __init__(self):
+        # 16 + MAX_WBITS: expect a gzip header and trailer
+        self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._tail = b""
+    
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        out = self._obj.decompress(self._tail + data, max_length)
+        self._tail = self._obj.unconsumed_tail
+        return out
+    
+    @property
+    def eof(self) -> bool:
+        return self._obj.eof
+    
+    @property
+    def needs_input(self) -> bool:
+        return not self._tail
+    
+    @property
+    def unused_data(self) -> bytes:
+        return self._obj.unused_data
+
+
+class _NeedInput(Exception):
+    """Raised by _ZstdInput when the queued input runs out."""
+
+
+class _ZstdInput:
+    """
+    Source for a zstd stream_reader, fed with input as it arrives.
+    
+    The reader stops for good the first time a read returns nothing, so an
+    empty queue raises _NeedInput instead. read1 only reads the source before
+    producing any output, so no output is lost when it does.
+    """
+    
+    def __init__(self):
+        self._buffer = bytearray()
+    
+    def append(self, data: bytes) -> None:
+        self._buffer += data
+    
+    def read(self, size: int = -1) -> bytes:
+        if not self._buffer:
+            raise _NeedInput()
+        size = len(self._buffer) if size < 0 else size
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+class _ZstdFrames:
+    """
+    Follow zstd frame boundaries in the compressed input, without decoding it.
+    
+    The stream_reader never reports the end of a frame, so this walks frame
+    headers, block headers and checksums to tell whether the input ends on a
+    frame boundary.
+    """
+    
+    ZSTD_MAGIC = 0xFD2FB528
+    SKIPPABLE_MAGIC = 0x184D2A50  # Low four bits may vary
+    
+    def __init__(self):
+        self._pending = b""
+        self._skip = 0
+        self._state = "magic"
+        self._checksum = False
+    
+    @property
+    def complete(self) -> bool:
+        """Whether the input so far ends right after a frame."""
+        return self._state == "magic" and not self._skip and not self._pending
+    
+    def feed(self, data: bytes) -> None:
+        data = self._pending + data
+        position = 0
+        while True:
+            if self._skip:
+                taken = min(self._skip, len(data) - position)
+                self._skip -= taken
+                position += taken
+                if self._skip:
+                    break
+            needed = self._needed(data, position)
+            if needed is None or len(data) - position < needed:
+                break
+            position = self._advance(data, position, needed)
+        self._pending = data[position:]
+    
+    def _needed(self, data: bytes, position: int) -> Optional[int]:
+        """Bytes the next header takes, or None if that is not known yet."""
+        if self._state in ("magic", "skippable"):
+            return 4
+        if self._state == "header":
+            if position >= len(data):
+                return None
+            descriptor = data[position]
+            single_segment = bool(descriptor & 0x20)
+            dictionary_id = (0, 1, 2, 4)[descriptor & 0x03]
+            content_size = (1 if single_segment else 0, 2, 4, 8)[descriptor >> 6]
+            return 1 + (0 if single_segment else 1) + dictionary_id + content_size
+        return 3  # Block header
+    
+    def _advance(self, data: bytes, position: int, needed: int) -> int:
+        """Consume one header and set up the bytes that follow it."""
+        field = int.from_bytes(data[position:position + needed], "little") if needed <= 4 else 0
+        if self._state == "magic":
+            if field == self.ZSTD_MAGIC:
+                self._state = "header"
+            elif field & 0xFFFFFFF0 == self.SKIPPABLE_MAGIC:
+                self._state = "skippable"
+            else:
+                raise OSError("Invalid zstd frame magic number")
+        elif self._state == "skippable":
+            self._skip = field
+            self._state = "magic"
+        elif self._state == "header":
+            self._checksum = bool(data[position] & 0x04)
+            self._state = "block"
+        else:
+            last, block_type, size = field & 0x01, (field >> 1) & 0x03, field >> 3
+            if block_type == 3:
+                raise OSError("Reserved zstd block type")
+            self._skip = 1 if block_type == 1 else size
+            if last:
+                self._skip += 4 if self._checksum else 0
+                self._state = "magic"
+        return position + needed
+
+
+class _ZstdAdapter:
+    """
+    Wrap the optional zstandard package.
+    
+    Its decompressobj cannot cap output per call, so input is queued for a
+    stream_reader instead, and each call takes at most max_length bytes of
+    output from it with read1. A stream ends once the reader has used up the
+    input and the input ends on a frame boundary; concatenated frames are
+    decoded by the same reader.
+    """
+    
+    def __init__(self):
+        try:
+            import zstandard
+        except ImportError:
+            raise ParsingError(
+                message="zstd-compressed input requires the 'zstandard' package",
+                details={"compression": "zstd"}
+            )
+        self._input = _ZstdInput()
+        self._frames = _ZstdFrames()
+        self._reader = zstandard.ZstdDecompressor().stream_reader(
+            self._input, read_size=READ_CHUNK_SIZE, read_across_frames=True
+        )
+        self._error = zstandard.ZstdError
+        self._starved = False
+    
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        if data:
+            self._frames.feed(data)
+            self._input.append(data)
+            self._starved = False
+        try:
+            return self._reader.read1(max_length)
+        except _NeedInput:
+            self._starved = True
+            return b""
+        except self._error as e:
+            # Reported like the standard library decompressors' errors
+            raise OSError(str(e)) from e
+    
+    @property
+    def eof(self) -> bool:
+        return self._starved and self._frames.complete
+    
+    @property
+    def needs_input(self) -> bool:
+        return self._starved
+    
+    @property
+    def unused_data(self) -> bytes:
+        return b""
+
+
+def _new_decompressor(compression: str):
+    """Create a fresh decompressor for one stream/member of the given format."""
+    if compression == "gzip":
+        return _ZlibAdapter()
+    if compression == "bz2":
+        return bz2.BZ2Decompressor()
+    if compression == "xz":
+        return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+    if compression == "zstd":
+        return _ZstdAdapter()
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class StreamDecompressor:
+    """
+    Incrementally decompress a byte stream with size and ratio limits.
+    
+    Output is produced in bounded pieces as input arrives, so the plaintext is
+    never held in memory as a whole. Concatenated members (e.g. `cat a.gz b.gz`)
+    are decoded back to back. Uncompressed input passes through unchanged and
+    still counts against the size limit.
+    """
+    
+    def __init__(
+        self,
+        max_output_bytes: Optional[int] = None,
+        max_ratio: Optional[float] = None,
+        name: str = "input"
+    ):
+        """
+        Initialize stream decompressor.
+        
+        Args:
+            max_output_bytes: Limit on decompressed bytes. Falls back to max_file_size_mb.
+            max_ratio: Limit on decompressed/compressed size. Falls back to max_decompression_ratio.
+            name: Name used in log messages and errors
+        """
+        settings = get_settings()
+        self.max_output_bytes = max_output_bytes or settings.max_file_size_bytes
+        self.max_ratio = max_ratio or settings.max_decompression_ratio
+        self.name = name
+        self.compression: Optional[str] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._head = b""
+        self._sniffed = False
+        self._decompressor = None
+    
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        """Consume a chunk of input and yield the output it produced."""
+        if not self._sniffed:
+            self._head += chunk
+            if len(self._head) < SNIFF_SIZE:
+                return
+            chunk, self._head = self._head, b""
+            self._sniff(chunk)
+        
+        self.bytes_in += len(chunk)
+        if self.compression is None:
+            yield from self._emit([chunk])
+        else:
+            yield from self._emit(self._inflate(chunk))
+    
+    def close(self) -> Iterator[bytes]:
+        """Flush remaining input and check the stream ended cleanly."""
+        if not self._sniffed:
+            chunk, self._head = self._head, b""
+            self._sniff(chunk)
+            yield from self.feed(chunk)
+        
+        if self.compression is not None:
+            yield from self._emit(self._inflate(b""))
+            if not self._decompressor.eof:
+                raise ParsingError(
+                    message=f"Truncated {self.compression} stream",
+                    details={"file": self.name, "compressed_bytes": self.bytes_in}
+                )
+            logger.info(
+                f"Decompressed {self.name} ({self.compression}): "
+                f"{self.bytes_in} -> {self.bytes_out} bytes"
+            )
+    
+    def _sniff(self, head: bytes) -> None:
+        self._sniffed = True
+        self.compression = detect_compression(head)
+        if self.compression is not None:
+            self._decompressor = _new_decompressor(self.compression)
+    
+    def _inflate(self, data: bytes) -> Iterator[bytes]:
+        """Decompress data in bounded pieces, moving on to any following member."""
+        try:
+            while True:
+                if self._decompressor.eof:
+                    data = self._decompressor.unused_data + data
+                    if not data:
+                        return
+                    self._decompressor = _new_decompressor(self.compression)
+                
+                out = self._decompressor.decompress(data, OUTPUT_CHUNK_SIZE)
+                data = b""
+                if out:
+                    yield out
+                
+                if self._decompressor.eof:
+                    continue
+                if self._decompressor.needs_input and len(out) < OUTPUT_CHUNK_SIZE:
+                    return
+        except (OSError, EOFError, zlib.error, lzma.LZMAError) as e:
+            raise ParsingError(
+                message=f"Corrupt {self.compression} stream",
+                details={"file": self.name, "error": str(e)}
+            )
+    
+    def _emit(self, pieces: Iterable[bytes]) -> Iterator[bytes]:
+        """Apply the size and ratio limits to output before passing it on."""
+        for piece in pieces:
+            self.bytes_out += len(piece)
+            if self.bytes_out > self.max_output_bytes:
+                raise FileSizeError(
+                    message=f"File {self.name} exceeds {self.max_output_bytes / (1024 * 1024):g}MB",
+                    details={"file": self.name, "max_bytes": self.max_output_bytes}
+                )
+            if self.compression is not None and self.bytes_out > self.max_ratio * max(self.bytes_in, 1):
+                raise FileSizeError(
+                    message=f"File {self.name} exceeds the maximum decompression ratio of {self.max_ratio:g}",
+                    details={
+                        "file": self.name,
+                        "compressed_bytes": self.bytes_in,
+                        "decompressed_bytes": self.bytes_out,
+                    }
+                )
+            yield piece
+
+
+def decompress_stream(
+    stream: Union[BinaryIO, Iterable[bytes]],
+    name: str = "input",
+    max_output_bytes: Optional[int] = None,
+    max_ratio: Optional[float] = None
+) -> Iterator[bytes]:
+    """
+    Yield the decompressed content of a possibly compressed byte stream.
+    
+    Args:
+        stream: Binary file-like object or iterable of byte chunks
+        name: Name used in log messages and errors
+        max_output_bytes: Limit on decompressed bytes. Falls back to settings.
+        max_ratio: Limit on decompressed/compressed size. Falls back to settings.
+    
+    Yields:
+        Decompressed byte chunks
+    
+    Raises:
+        FileSizeError: If a size or ratio limit is exceeded
+        ParsingError: If the compressed data is corrupt or truncated
+    """
+    decompressor = StreamDecompressor(max_output_bytes, max_ratio, name)
+    
+    if hasattr(stream, 'read'):
+        chunks = iter(lambda: stream.read(READ_CHUNK_SIZE), b"")
+    else:
+        chunks = stream
+    
+    for chunk in chunks:
+        yield from decompressor.feed(chunk)
+    yield from decompressor.close()
+
+
+async def adecompress_stream(
+    chunks: AsyncIterable[bytes],
+    name: str = "input",
+    max_output_bytes: Optional[int] = None,
+    max_ratio: Optional[float] = None
+) -> AsyncIterator[bytes]:
+    """
+    Async counterpart of decompress_stream for uploads and other async sources.
+    
+    Args:
+        chunks: Async iterable of byte chunks
+        name: Name used in log messages and errors
+        max_output_bytes: Limit on decompressed bytes. Falls back to settings.
+        max_ratio: Limit on decompressed/compressed size. Falls back to settings.
+    
+    Yields:
+        Decompressed byte chunks
+    """
+    decompressor = StreamDecompressor(max_output_bytes, max_ratio, name)
+    
+    async for chunk in chunks:
+        for piece in decompressor.feed(chunk):
+            yield piece
+    for piece in decompressor.close():
+        yield piece
+
+
+def read_decompressed(
+    data: Union[bytes, BinaryIO, Iterable[bytes]],
+    name: str = "input",
+    encoding: str = "utf-8"
+) -> str:
+    """
+    Decompress (if needed) and decode a whole payload.
+    
+    For parsers that need the full text, such as metrics, traces and configs.
+    
+    Args:
+        data: Raw bytes, a binary file-like object, or an iterable of byte chunks
+        name: Name used in log messages and errors
+        encoding: Text encoding of the decompressed content
+    
+    Returns:
+        Decoded text
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = [bytes(data)]
+    pieces: List[bytes] = list(decompress_stream(data, name))
+    return b"".join(pieces).decode(encoding, errors='replace')
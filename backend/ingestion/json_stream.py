@@ -0,0 +1,182 @@
+"""
+Incremental JSON reader for InfraMind.
+Walks large JSON documents value by value so only the value being read is held in memory.
+"""
+import json
+import re
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+from backend.core.exceptions import ParsingError
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Characters that could still belong to a number cut off at the end of the buffer
+_NUMBER_TAIL = re.compile(r'[0-9eE+\-.]*\Z')
+
+# Largest single value read_value() will buffer, in characters
+MAX_VALUE_CHARS = 64 * 1024 * 1024
+
+
+class JSONStream:
+    """
+    Pull-style reader over JSON text that arrives in chunks.
+    
+    The caller navigates the document: iter_object() yields each key and
+    iter_array() yields once per element, positioned at the value. The
+    caller must then consume that value with read_value() (materializes it),
+    skip_value() (discards it without materializing containers), or another
+    iter_object()/iter_array() to descend into it.
+    """
+    
+    def __init__(self, chunks: Iterable[str]):
+        """
+        Initialize the reader.
+        
+        Args:
+            chunks: JSON text in pieces of any size
+        """
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self._pos = 0
+        self._consumed = 0  # Characters dropped from the front of the buffer
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+    
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it, or '' at the end."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+    
+    def read_value(self) -> Any:
+        """Read and return the next complete value."""
+        if not self.peek():
+            self._error("Unexpected end of JSON")
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if not self._grow():
+                    self._error(f"Invalid JSON: {e.msg}", self._consumed + e.pos)
+                continue
+            # A number that ends the buffer may continue in the next chunk
+            if self._may_continue(value, end) and self._grow():
+                continue
+            self._pos = end
+            return value
+    
+    def read_buffered(self) -> Tuple[bool, Any]:
+        """
+        Read the next value only if it is complete in the text already buffered.
+        
+        Lets callers materialize small values cheaply and fall back to
+        navigating large ones key by key.
+        
+        Returns:
+            (True, value) if it was read, else (False, None) with nothing consumed
+        """
+        if not self.peek():
+            return False, None
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return False, None
+        if self._may_continue(value, end) and not self._eof:
+            return False, None
+        self._pos = end
+        return True, value
+    
+    def expect_end(self) -> None:
+        """Raise if anything other than whitespace follows the document."""
+        if self.peek():
+            self._error("Extra data after JSON document")
+    
+    def skip_value(self) -> None:
+        """Consume the next value, descending into containers instead of building them."""
+        char = self.peek()
+        if char == '{':
+            for _ in self.iter_object():
+                self.skip_value()
+        elif char == '[':
+            for _ in self.iter_array():
+                self.skip_value()
+        else:
+            self.read_value()
+    
+    def iter_array(self) -> Iterator[None]:
+        """Step through an array; the caller consumes one element per iteration."""
+        self._expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                self._error(f"Expected ',' or ']' in array, found {char!r}")
+    
+    def iter_object(self) -> Iterator[str]:
+        """Step through an object, yielding each key; the caller consumes its value."""
+        self._expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                self._error("Expected a string key in object")
+            key = self.read_value()
+            self._expect(':')
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                self._error(f"Expected ',' or '}}' in object, found {char!r}")
+    
+    def _may_continue(self, value: Any, end: int) -> bool:
+        """Whether a decoded number might be the truncated start of a longer one."""
+        return (
+            isinstance(value, (int, float))
+            and not isinstance(value, bool)
+            and _NUMBER_TAIL.match(self._buffer, end) is not None
+        )
+    
+    def _expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            self._error(f"Expected {char!r}, found {found or 'end of JSON'!r}")
+        self._pos += 1
+    
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping what has been consumed. Returns False at the end."""
+        for chunk in self._chunks:
+            if chunk:
+                self._consumed += self._pos
+                self._buffer = self._buffer[self._pos:] + chunk
+                self._pos = 0
+                return True
+        self._eof = True
+        return False
+    
+    def _grow(self) -> bool:
+        """Read until the unconsumed text doubles, so a value spanning many chunks costs linear time."""
+        if self._eof:
+            return False
+        target = max((len(self._buffer) - self._pos) * 2, 1)
+        grew = False
+        while len(self._buffer) - self._pos < target and self._fill():
+            grew = True
+            if len(self._buffer) - self._pos > MAX_VALUE_CHARS:
+                self._error(f"JSON value exceeds {MAX_VALUE_CHARS:,} characters")
+        return grew
+    
+    def _error(self, message: str, offset: Optional[int] = None) -> None:
+        offset = self._consumed + self._pos if offset is None else offset
+        raise ParsingError(f"{message} at character {offset}", details={"offset": offset})
@@ -2,21 +2,180 @@
 Log parser for InfraMind.
 Supports JSON and plain text log formats.
 """
+import codecs
 import json
 import re
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from dateutil import parser as date_parser
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Iterator, AsyncIterable, AsyncIterator, BinaryIO, Union
 import logging
 
-from backend.models import LogEntry, LogLevel
-from backend.core.exceptions import ParsingError
+from backend.models import LogBatch, LogBatchBuilder, LogEntry, LogLevel
+from backend.models.log_batch import JSON_RESERVED_KEYS
+from backend.core.exceptions import FileSizeError, ParsingError
+from backend.ingestion.timestamp_parser import TimestampParser
 
 logger = logging.getLogger(__name__)
 
 
+class _LineDecoder:
+    """
+    Incrementally decode byte chunks into complete text lines.
+    
+    Only the trailing partial line is buffered between chunks, so memory
+    stays bounded by the chunk size plus the longest line.
+    """
+    
+    def __init__(self, encoding: str = "utf-8", errors: str = "replace"):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        self._pending = ""
+    
+    def feed(self, chunk: bytes) -> List[str]:
+        """Decode a chunk and return the lines it completed."""
+        text = self._pending + self._decoder.decode(chunk)
+        lines = text.split('\n')
+        self._pending = lines.pop()
+        return lines
+    
+    def close(self) -> List[str]:
+        """Flush the decoder and return the final unterminated line, if any."""
+        tail = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        return [tail] if tail else []
+
+
+class _LogRecord:
+    """
+    Fields of one parsed log entry, without pydantic validation.
+    
+    Records are appended straight into a LogBatchBuilder; LogEntry objects
+    are only built from them when a caller asks for entries.
+    """
+    
+    __slots__ = ("timestamp", "level", "service", "message", "trace_id", "span_id", "metadata", "raw")
+    
+    def __init__(
+        self,
+        timestamp: datetime,
+        level: LogLevel,
+        service: str,
+        message: str,
+        raw: str,
+        trace_id: Optional[str] = None,
+        span_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.timestamp = timestamp
+        self.level = level
+        self.service = service
+        self.message = message
+        self.raw = raw
+        self.trace_id = trace_id
+        self.span_id = span_id
+        # Extra JSON fields; None for plain text lines
+        self.metadata = metadata
+    
+    def append_to(self, builder: LogBatchBuilder) -> None:
+        """Add this record as a row of a batch."""
+        builder.append(
+            self.timestamp, self.level, self.service, self.message, self.raw,
+            self.trace_id, self.span_id, self.metadata is not None
+        )
+    
+    def to_entry(self) -> LogEntry:
+        """Build the equivalent LogEntry."""
+        return LogEntry(
+            timestamp=self.timestamp,
+            level=self.level,
+            service=self.service,
+            message=self.message,
+            trace_id=self.trace_id,
+            span_id=self.span_id,
+            metadata=self.metadata or {},
+            raw=self.raw
+        )
+
+
+class _LogEntryAssembler:
+    """
+    Turn a sequence of raw lines into log records.
+    
+    Holds the format detection and multi-line continuation state so that
+    whole-file and streaming parsing share exactly the same behavior.
+    """
+    
+    def __init__(
+        self,
+        parser: "LogParser",
+        source: str,
+        file_format: str,
+        orphan_lines: Optional[List[str]] = None
+    ):
+        self.parser = parser
+        # Each input gets its own timestamp engine so formats are learned per file,
+        # even when several inputs share the parser
+        self._timestamps = TimestampParser()
+        self.source = source
+        self.file_format = file_format
+        # Collects continuation lines seen before the first entry, if provided
+        self.orphan_lines = orphan_lines
+        self._current: Optional[_LogRecord] = None
+        self._line_num = 0
+    
+    def push(self, line: str) -> Optional[_LogRecord]:
+        """Consume one line and return a record if one was completed."""
+        self._line_num += 1
+        
+        if self.file_format == "auto":
+            if not line.strip():
+                return None
+            self.file_format = self.parser._detect_format(line)
+        
+        if self.file_format == "json":
+            return self._push_json(line)
+        return self._push_text(line)
+    
+    def flush(self) -> Optional[_LogRecord]:
+        """Return the record still being assembled at end of input."""
+        self._timestamps.log_stats(self.source)
+        record, self._current = self._current, None
+        return record
+    
+    def _push_json(self, line: str) -> Optional[_LogRecord]:
+        line = line.strip()
+        if not line:
+            return None
+        
+        try:
+            log_obj = json.loads(line)
+            return self.parser._json_to_record(log_obj, line, self.source, self._timestamps)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Invalid JSON on line {self._line_num}: {e}")
+            # Try to parse as text
+            return self.parser._parse_text_record(line, self.source, self._timestamps)
+    
+    def _push_text(self, line: str) -> Optional[_LogRecord]:
+        line = line.rstrip()
+        if not line:
+            return None
+        
+        # Try to parse as a new log entry
+        new_record = self.parser._parse_text_record(line, self.source, self._timestamps)
+        
+        if new_record:
+            completed, self._current = self._current, new_record
+            return completed
+        
+        if self._current:
+            # Continuation of previous entry (e.g., stack trace)
+            self._current.message += '\n' + line
+            self._current.raw += '\n' + line
+        elif self.orphan_lines is not None:
+            self.orphan_lines.append(line)
+        return None
+
+
 class LogParser:
-    """Parse logs from various formats into LogEntry objects."""
+    """Parse logs from various formats into LogEntry objects or a columnar LogBatch."""
     
     # Common timestamp patterns
     TIMESTAMP_PATTERNS = [
@@ -28,9 +187,13 @@ class LogParser:
     # Log level patterns
     LEVEL_PATTERN = r'\b(DEBUG|INFO|WARN(?:ING)?|ERROR|CRITICAL|FATAL)\b'
     
+    # Read size used when streaming from file-like objects
+    STREAM_CHUNK_SIZE = 64 * 1024
+    
     def __init__(self):
         self.timestamp_regex = re.compile('|'.join(f'({p})' for p in self.TIMESTAMP_PATTERNS))
         self.level_regex = re.compile(self.LEVEL_PATTERN, re.IGNORECASE)
+        self.timestamp_parser = TimestampParser()
     
     def parse_file(self, file_content: str, source: str = "unknown", file_format: str = "auto") -> List[LogEntry]:
         """
@@ -44,14 +207,34 @@ class LogParser:
         Returns:
             List of parsed LogEntry objects
         """
+        return [record.to_entry() for record in self._parse_records(file_content, source, file_format)]
+    
+    def parse_file_batch(self, file_content: str, source: str = "unknown", file_format: str = "auto") -> LogBatch:
+        """
+        Parse log file content into a columnar LogBatch.
+        
+        Same parsing rules as parse_file, without building a LogEntry per line.
+        
+        Args:
+            file_content: Raw content of the log file
+            source: Source name for the logs (e.g., service name)
+            file_format: "json", "text", or "auto" to detect
+            
+        Returns:
+            LogBatch of parsed rows
+        """
+        builder = LogBatchBuilder()
+        for record in self._parse_records(file_content, source, file_format):
+            record.append_to(builder)
+        return builder.build()
+    
+    def _parse_records(self, file_content: str, source: str, file_format: str) -> List[_LogRecord]:
+        """Parse whole-file content into records."""
         try:
             if file_format == "auto":
                 file_format = self._detect_format(file_content)
             
-            if file_format == "json":
-                return self._parse_json_logs(file_content, source)
-            else:
-                return self._parse_text_logs(file_content, source)
+            return list(self._iter_records(file_content.strip().split('\n'), source, file_format))
         except Exception as e:
             logger.error(f"Error parsing log file: {str(e)}")
             raise ParsingError(
@@ -73,32 +256,240 @@ class LogParser:
         except:
             return "text"
     
-    def _parse_json_logs(self, content: str, source: str = "unknown") -> List[LogEntry]:
-        """Parse JSON format logs (one JSON object per line)."""
-        entries = []
-        lines = content.strip().split('\n')
+    def parse_stream(
+        self,
+        stream: Union[BinaryIO, Iterable[bytes]],
+        source: str = "unknown",
+        file_format: str = "auto"
+    ) -> Iterator[LogEntry]:
+        """
+        Incrementally parse a binary log stream.
+        
+        Entries are yielded as soon as they are complete, so memory use is
+        bounded by the chunk size rather than the size of the input.
+        
+        Args:
+            stream: Binary file-like object or iterable of byte chunks
+            source: Source name for the logs (e.g., service name)
+            file_format: "json", "text", or "auto" to detect
+            
+        Yields:
+            Parsed LogEntry objects in input order
+        """
+        for record in self._stream_records(stream, source, file_format):
+            yield record.to_entry()
+    
+    def parse_stream_batch(
+        self,
+        stream: Union[BinaryIO, Iterable[bytes]],
+        source: str = "unknown",
+        file_format: str = "auto"
+    ) -> LogBatch:
+        """
+        Incrementally parse a binary log stream into a LogBatch.
+        
+        Args:
+            stream: Binary file-like object or iterable of byte chunks
+            source: Source name for the logs (e.g., service name)
+            file_format: "json", "text", or "auto" to detect
+            
+        Returns:
+            LogBatch of parsed rows in input order
+        """
+        builder = LogBatchBuilder()
+        for record in self._stream_records(stream, source, file_format):
+            record.append_to(builder)
+        return builder.build()
+    
+    async def aparse_stream(
+        self,
+        chunks: AsyncIterable[bytes],
+        source: str = "unknown",
+        file_format: str = "auto"
+    ) -> AsyncIterator[LogEntry]:
+        """
+        Incrementally parse logs from an async byte iterator.
+        
+        Async counterpart of parse_stream for sources such as uploaded files
+        or HTTP bodies that are read without blocking the event loop.
+        
+        Args:
+            chunks: Async iterable of byte chunks
+            source: Source name for the logs (e.g., service name)
+            file_format: "json", "text", or "auto" to detect
+            
+        Yields:
+            Parsed LogEntry objects in input order
+        """
+        async for record in self._astream_records(chunks, source, file_format):
+            yield record.to_entry()
+    
+    async def aparse_stream_batch(
+        self,
+        chunks: AsyncIterable[bytes],
+        source: str = "unknown",
+        file_format: str = "auto"
+    ) -> LogBatch:
+        """
+        Incrementally parse logs from an async byte iterator into a LogBatch.
+        
+        Args:
+            chunks: Async iterable of byte chunks
+            source: Source name for the logs (e.g., service name)
+            file_format: "json", "text", or "auto" to detect
+            
+        Returns:
+            LogBatch of parsed rows in input order
+        """
+        builder = LogBatchBuilder()
+        async for record in self._astream_records(chunks, source, file_format):
+            record.append_to(builder)
+        return builder.build()
+    
+    def _stream_records(
+        self,
+        stream: Union[BinaryIO, Iterable[bytes]],
+        source: str,
+        file_format: str
+    ) -> Iterator[_LogRecord]:
+        """Decode and assemble records from a binary stream."""
+        decoder = _LineDecoder()
+        assembler = _LogEntryAssembler(self, source, file_format)
+        
+        try:
+            for chunk in self._iter_chunks(stream):
+                for line in decoder.feed(chunk):
+                    record = assembler.push(line)
+                    if record:
+                        yield record
+            
+            for line in decoder.close():
+                record = assembler.push(line)
+                if record:
+                    yield record
+            
+            record = assembler.flush()
+            if record:
+                yield record
+        except (FileSizeError, ParsingError):
+            # Raised by the input stream itself (e.g., decompression limits)
+            raise
+        except Exception as e:
+            logger.error(f"Error parsing log stream: {str(e)}")
+            raise ParsingError(
+                message="Failed to parse log stream",
+                details={"format": assembler.file_format, "source": source}
+            )
+    
+    async def _astream_records(
+        self,
+        chunks: AsyncIterable[bytes],
+        source: str,
+        file_format: str
+    ) -> AsyncIterator[_LogRecord]:
+        """Decode and assemble records from an async byte iterator."""
+        decoder = _LineDecoder()
+        assembler = _LogEntryAssembler(self, source, file_format)
+        
+        try:
+            async for chunk in chunks:
+                for line in decoder.feed(chunk):
+                    record = assembler.push(line)
+                    if record:
+                        yield record
+            
+            for line in decoder.close():
+                record = assembler.push(line)
+                if record:
+                    yield record
+            
+            record = assembler.flush()
+            if record:
+                yield record
+        except (FileSizeError, ParsingError):
+            # Raised by the input stream itself (e.g., decompression limits)
+            raise
+        except Exception as e:
+            logger.error(f"Error parsing log stream: {str(e)}")
+            raise ParsingError(
+                message="Failed to parse log stream",
+                details={"format": assembler.file_format, "source": source}
+            )
+    
+    def parse_chunk(
+        self,
+        chunk: bytes,
+        source: str = "unknown",
+        file_format: str = "text"
+    ) -> Tuple[List[str], LogBatch, Optional[_LogRecord]]:
+        """
+        Parse one newline-aligned chunk of a larger log file.
+        
+        Used by parallel ingestion. Continuation lines that appear before the
+        chunk's first entry belong to an entry from an earlier chunk, so they
+        are returned separately for the caller to stitch back on. For the same
+        reason the chunk's last entry is returned on its own: lines at the
+        start of the next chunk may still extend it.
         
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
+        Args:
+            chunk: Raw bytes of the chunk, starting at a line boundary
+            source: Source name for the logs (e.g., service name)
+            file_format: "json" or "text" as detected for the whole file
             
-            try:
-                log_obj = json.loads(line)
-                entry = self._json_to_log_entry(log_obj, source)
-                if entry:
-                    entries.append(entry)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Invalid JSON on line {line_num}: {e}")
-                # Try to parse as text
-                text_entry = self._parse_text_line(line, source)
-                if text_entry:
-                    entries.append(text_entry)
+        Returns:
+            Tuple of (leading continuation lines, all but the last entry, last entry)
+        """
+        orphan_lines: List[str] = []
+        assembler = _LogEntryAssembler(self, source, file_format, orphan_lines)
+        builder = LogBatchBuilder()
         
-        return entries
+        for line in chunk.decode('utf-8', errors='replace').split('\n'):
+            record = assembler.push(line)
+            if record:
+                record.append_to(builder)
+        
+        return orphan_lines, builder.build(), assembler.flush()
+    
+    def _iter_chunks(self, stream: Union[BinaryIO, Iterable[bytes]]) -> Iterator[bytes]:
+        """Yield byte chunks from a file-like object or an iterable of chunks."""
+        if hasattr(stream, 'read'):
+            while True:
+                chunk = stream.read(self.STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            yield from stream
+    
+    def _iter_records(self, lines: Iterable[str], source: str, file_format: str) -> Iterator[_LogRecord]:
+        """Assemble already-decoded lines into log records."""
+        assembler = _LogEntryAssembler(self, source, file_format)
+        for line in lines:
+            record = assembler.push(line)
+            if record:
+                yield record
+        
+        record = assembler.flush()
+        if record:
+            yield record
+    
+    def _parse_json_logs(self, content: str, source: str = "unknown") -> List[LogEntry]:
+        """Parse JSON format logs (one JSON object per line)."""
+        return [record.to_entry() for record in self._iter_records(content.strip().split('\n'), source, "json")]
     
     def _json_to_log_entry(self, log_obj: Dict[str, Any], source: str = "unknown") -> Optional[LogEntry]:
         """Convert JSON log object to LogEntry."""
+        record = self._json_to_record(log_obj, json.dumps(log_obj), source)
+        return record.to_entry() if record else None
+    
+    def _json_to_record(
+        self,
+        log_obj: Dict[str, Any],
+        raw: str,
+        source: str = "unknown",
+        timestamps: Optional[TimestampParser] = None
+    ) -> Optional[_LogRecord]:
+        """Convert JSON log object to a log record."""
         try:
             # Extract timestamp (try various field names)
             timestamp_str = (
@@ -108,7 +499,7 @@ class LogParser:
                 log_obj.get('ts') or
                 datetime.now().isoformat()
             )
-            timestamp = self._parse_timestamp(timestamp_str)
+            timestamp = self._parse_timestamp(timestamp_str, timestamps)
             
             # Extract log level
             level_str = (
@@ -141,23 +532,18 @@ class LogParser:
             span_id = log_obj.get('span_id') or log_obj.get('spanId')
             
             # Extract remaining fields as metadata
-            metadata = {
-                k: v for k, v in log_obj.items()
-                if k not in {'timestamp', 'time', '@timestamp', 'ts', 'level', 
-                            'severity', 'log_level', 'service', 'service_name', 
-                            'app', 'application', 'message', 'msg', 'text',
-                            'trace_id', 'traceId', 'span_id', 'spanId'}
-            }
+            metadata = {k: v for k, v in log_obj.items() if k not in JSON_RESERVED_KEYS}
             
-            return LogEntry(
+            # Records skip pydantic validation, so coerce the fields it used to check
+            return _LogRecord(
                 timestamp=timestamp,
                 level=level,
-                service=service,
-                message=message,
-                trace_id=trace_id,
-                span_id=span_id,
-                metadata=metadata,
-                raw=json.dumps(log_obj)
+                service=str(service),
+                message=str(message),
+                raw=raw,
+                trace_id=str(trace_id) if trace_id is not None else None,
+                span_id=str(span_id) if span_id is not None else None,
+                metadata=metadata
             )
             
         except Exception as e:
@@ -166,43 +552,26 @@ class LogParser:
     
     def _parse_text_logs(self, content: str, source: str = "unknown") -> List[LogEntry]:
         """Parse plain text logs."""
-        entries = []
-        lines = content.strip().split('\n')
-        
-        current_entry = None
-        
-        for line in lines:
-            line = line.rstrip()
-            if not line:
-                continue
-            
-            # Try to parse as a new log entry
-            new_entry = self._parse_text_line(line, source)
-            
-            if new_entry:
-                # Save previous entry if exists
-                if current_entry:
-                    entries.append(current_entry)
-                current_entry = new_entry
-            elif current_entry:
-                # Continuation of previous entry (e.g., stack trace)
-                current_entry.message += '\n' + line
-                current_entry.raw += '\n' + line
-        
-        # Don't forget the last entry
-        if current_entry:
-            entries.append(current_entry)
-        
-        return entries
+        return [record.to_entry() for record in self._iter_records(content.strip().split('\n'), source, "text")]
     
     def _parse_text_line(self, line: str, source: str = "unknown") -> Optional[LogEntry]:
         """Parse a single line of text log."""
+        record = self._parse_text_record(line, source)
+        return record.to_entry() if record else None
+    
+    def _parse_text_record(
+        self,
+        line: str,
+        source: str = "unknown",
+        timestamps: Optional[TimestampParser] = None
+    ) -> Optional[_LogRecord]:
+        """Parse a single line of text log into a log record."""
         try:
             # Extract timestamp
             timestamp_match = self.timestamp_regex.search(line)
             if timestamp_match:
                 timestamp_str = timestamp_match.group(0)
-                timestamp = self._parse_timestamp(timestamp_str)
+                timestamp = self._parse_timestamp(timestamp_str, timestamps)
                 remaining = line[timestamp_match.end():].strip()
             else:
                 timestamp = datetime.now()
@@ -225,14 +594,11 @@ class LogParser:
             if not message:
                 return None
             
-            return LogEntry(
+            return _LogRecord(
                 timestamp=timestamp,
                 level=level,
                 service=source,
                 message=message,
-                trace_id=None,
-                span_id=None,
-                metadata={},
                 raw=line
             )
             
@@ -240,23 +606,13 @@ class LogParser:
             logger.warning(f"Failed to parse text log line: {e}")
             return None
     
-    def _parse_timestamp(self, timestamp_str: str) -> datetime:
-        """Parse timestamp string to datetime object."""
+    def _parse_timestamp(self, timestamp_str: str, timestamps: Optional[TimestampParser] = None) -> datetime:
+        """Parse timestamp string to datetime object, with the given engine or the parser's own."""
         if not timestamp_str:
             return datetime.now()
         
         try:
-            # Handle Unix timestamps
-            if timestamp_str.isdigit():
-                timestamp = int(timestamp_str)
-                # If it's a large number, it's likely in milliseconds
-                if timestamp > 1e12:
-                    return datetime.fromtimestamp(timestamp / 1000)
-                else:
-                    return datetime.fromtimestamp(timestamp)
-            
-            # Use dateutil parser for flexible parsing
-            return date_parser.parse(timestamp_str)
+            return (timestamps or self.timestamp_parser).parse(timestamp_str)
         except Exception as e:
             logger.warning(f"Failed to parse timestamp '{timestamp_str}': {e}")
             return datetime.now()
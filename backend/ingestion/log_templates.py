@@ -0,0 +1,268 @@
+"""
+Log template miner for InfraMind.
+Clusters log messages online into templates with parameter slots (Drain-style).
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from backend.models import LogBatch, LogEntry, LogLevel, LogTemplate
+from backend.models.log_batch import LOG_LEVELS, NAIVE_OFFSET, from_epoch_micros, to_epoch_micros
+
+logger = logging.getLogger(__name__)
+
+
+WILDCARD = "<*>"
+
+# Tokens that are always parameters, whatever cluster they land in
+_PARAM_PATTERNS = [
+    re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'),  # UUID
+    re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?$'),  # IPv4 with optional port
+    re.compile(r'^(?:0x)?[0-9a-fA-F]{12,}$'),  # Long hex IDs
+    re.compile(r'^[-+]?\d+(?:\.\d+)?[a-zA-Z%]{0,3}$'),  # Numbers with optional unit (5000ms, 12%)
+    re.compile(r'^[\w.-]*\d[\w.-]*$'),  # Identifiers containing digits (db-7, user_123)
+]
+
+_SEVERITY = {
+    LogLevel.DEBUG: 0,
+    LogLevel.INFO: 1,
+    LogLevel.WARNING: 2,
+    LogLevel.ERROR: 3,
+    LogLevel.CRITICAL: 4,
+    LogLevel.FATAL: 4,
+}
+
+
+class _Cluster:
+    """Mutable template state while mining."""
+    
+    __slots__ = (
+        "cluster_id", "tokens", "count", "first_seen", "last_seen",
+        "level", "services", "sample_values", "sample_message",
+    )
+    
+    def __init__(self, cluster_id: int, tokens: List[str], level: LogLevel, message: str, seen: Tuple[int, int]):
+        self.cluster_id = cluster_id
+        self.tokens = tokens
+        self.count = 0
+        # (wall-clock epoch micros, UTC offset seconds), compared on wall-clock time
+        self.first_seen = seen
+        self.last_seen = seen
+        self.level = level
+        self.services: Dict[str, None] = {}
+        self.sample_values: List[List[str]] = []
+        self.sample_message = message
+    
+    def similarity(self, tokens: List[str]) -> Tuple[float, int]:
+        """
+        Return (fraction of matching tokens, wildcard count).
+        
+        A wildcard matches any token, as in Drain's simSeq; the wildcard
+        count only breaks ties between equally similar clusters.
+        """
+        matches = 0
+        wildcards = 0
+        for template_token, token in zip(self.tokens, tokens):
+            if template_token == WILDCARD:
+                wildcards += 1
+                matches += 1
+            elif template_token == token:
+                matches += 1
+        return matches / len(tokens), wildcards
+
+
+class LogTemplateMiner:
+    """
+    Online Drain-style log template miner.
+    
+    Messages are routed through a fixed-depth prefix tree (level, token count,
+    leading tokens) to a small set of candidate clusters, and merged into the
+    most similar one or start a new cluster. Positions that differ between
+    merged messages become parameter slots.
+    """
+    
+    def __init__(
+        self,
+        depth: int = 2,
+        similarity_threshold: float = 0.5,
+        max_children: int = 100,
+        max_samples: int = 5
+    ):
+        """
+        Initialize template miner.
+        
+        Args:
+            depth: Number of leading tokens used to route messages in the tree
+            similarity_threshold: Minimum token similarity to join an existing cluster
+            max_children: Maximum distinct tokens per tree node before routing to a wildcard
+            max_samples: Parameter value samples kept per template
+        """
+        self.depth = depth
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self.max_samples = max_samples
+        self._tree: Dict[Tuple[LogLevel, int], dict] = {}
+        self._clusters: List[_Cluster] = []
+    
+    def add(self, entry: LogEntry) -> int:
+        """
+        Add a log entry to its template, creating one if needed.
+        
+        Args:
+            entry: Parsed log entry
+        
+        Returns:
+            ID of the template the entry was assigned to
+        """
+        offset = entry.timestamp.utcoffset()
+        seen = (
+            to_epoch_micros(entry.timestamp),
+            NAIVE_OFFSET if offset is None else int(offset.total_seconds())
+        )
+        return self._add(entry.message, entry.level, entry.service, seen)
+    
+    def add_all(self, entries: Iterable[LogEntry]) -> "LogTemplateMiner":
+        """Add every entry and return the miner for chaining."""
+        for entry in entries:
+            self.add(entry)
+        return self
+    
+    def add_batch(self, batch: LogBatch) -> "LogTemplateMiner":
+        """
+        Add every row of a LogBatch without materializing LogEntry objects.
+        
+        Args:
+            batch: Parsed log rows
+        
+        Returns:
+            The miner, for chaining
+        """
+        rows = zip(
+            batch.iter_messages(),
+            batch.levels.tolist(),
+            batch.service_codes.tolist(),
+            batch.timestamps.tolist(),
+            batch.tz_offsets.tolist(),
+        )
+        for message, level_code, service_code, micros, offset in rows:
+            self._add(message, LOG_LEVELS[level_code], batch.services[service_code], (micros, offset))
+        return self
+    
+    def templates(self) -> List[LogTemplate]:
+        """
+        Export mined templates, most severe and most frequent first.
+        
+        Returns:
+            List of LogTemplate objects
+        """
+        clusters = sorted(
+            self._clusters,
+            key=lambda c: (-_SEVERITY.get(c.level, 1), -c.count, c.cluster_id)
+        )
+        return [
+            LogTemplate(
+                template_id=f"T{cluster.cluster_id}",
+                template=" ".join(cluster.tokens),
+                count=cluster.count,
+                first_seen=from_epoch_micros(*cluster.first_seen),
+                last_seen=from_epoch_micros(*cluster.last_seen),
+                level=cluster.level,
+                services=list(cluster.services),
+                sample_values=cluster.sample_values,
+                sample_message=cluster.sample_message,
+            )
+            for cluster in clusters
+        ]
+    
+    def _add(self, message: str, level: LogLevel, service: str, seen: Tuple[int, int]) -> int:
+        """Assign one message to its template, creating one if needed."""
+        tokens = self._tokenize(message)
+        if not tokens:
+            tokens = [WILDCARD]
+        
+        leaf = self._route(level, tokens)
+        cluster = self._best_match(leaf, tokens)
+        
+        if cluster is None:
+            cluster = _Cluster(len(self._clusters), tokens, level, message, seen)
+            self._clusters.append(cluster)
+            leaf.append(cluster)
+        else:
+            self._merge(cluster, tokens)
+        
+        self._record(cluster, message, service, seen)
+        return cluster.cluster_id
+    
+    def _tokenize(self, message: str) -> List[str]:
+        """Split the first line of a message into tokens, masking obvious parameters."""
+        first_line = message.split('\n', 1)[0]
+        tokens = []
+        for token in first_line.split():
+            if any(pattern.match(token) for pattern in _PARAM_PATTERNS):
+                tokens.append(WILDCARD)
+            else:
+                tokens.append(token)
+        return tokens
+    
+    def _route(self, level: LogLevel, tokens: List[str]) -> List[_Cluster]:
+        """Walk the prefix tree to the leaf holding candidate clusters."""
+        node = self._tree.setdefault((level, len(tokens)), {})
+        
+        for token in tokens[:self.depth]:
+            if token not in node:
+                if len(node) >= self.max_children:
+                    token = WILDCARD
+                node = node.setdefault(token, {})
+            else:
+                node = node[token]
+        
+        return node.setdefault(None, [])
+    
+    def _best_match(self, candidates: List[_Cluster], tokens: List[str]) -> Optional[_Cluster]:
+        """Pick the most similar cluster above the threshold."""
+        best = None
+        best_key = (-1.0, -1)
+        for cluster in candidates:
+            score, wildcards = cluster.similarity(tokens)
+            if score >= self.similarity_threshold and (score, wildcards) > best_key:
+                best = cluster
+                best_key = (score, wildcards)
+        return best
+    
+    def _merge(self, cluster: _Cluster, tokens: List[str]) -> None:
+        """Turn positions that differ from the template into parameter slots."""
+        for index, token in enumerate(tokens):
+            if cluster.tokens[index] != token:
+                cluster.tokens[index] = WILDCARD
+    
+    def _record(self, cluster: _Cluster, message: str, service: str, seen: Tuple[int, int]) -> None:
+        """Update counts, time range and samples for a cluster."""
+        cluster.count += 1
+        cluster.services[service] = None
+        
+        if seen[0] < cluster.first_seen[0]:
+            cluster.first_seen = seen
+        if seen[0] > cluster.last_seen[0]:
+            cluster.last_seen = seen
+        
+        if len(cluster.sample_values) < self.max_samples:
+            raw_tokens = message.split('\n', 1)[0].split()
+            values = [
+                raw for raw, template_token in zip(raw_tokens, cluster.tokens)
+                if template_token == WILDCARD
+            ]
+            if values and values not in cluster.sample_values:
+                cluster.sample_values.append(values)
+
+
+def mine_templates(entries: Iterable[LogEntry]) -> List[LogTemplate]:
+    """
+    Mine templates from log entries with default settings.
+    
+    Args:
+        entries: Parsed log entries
+    
+    Returns:
+        List of LogTemplate objects
+    """
+    return LogTemplateMiner().add_all(entries).templates()
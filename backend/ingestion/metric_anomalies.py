@@ -0,0 +1,318 @@
+"""
+Metric anomaly detection for InfraMind.
+Runs rolling median/MAD and EWMA detectors over every metric series at once and groups flagged points into intervals.
+"""
+import math
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backend.models import MetricAnomaly
+
+# Scales a median absolute deviation to a standard deviation for normal data
+MAD_TO_STD = 1.4826
+
+# Floor for the robust scale, as a fraction of the rolling median, so flat series are not all anomalies
+MIN_SCALE_FRACTION = 0.01
+
+# Rows of the rolling window matrix built at a time, to bound memory
+WINDOW_BLOCK_ROWS = 65536
+
+# EWMA weights older than this are treated as zero
+EWMA_NEGLIGIBLE_WEIGHT = 1e-17
+
+# Cap on detector scores, so a jump off a perfectly flat series stays finite
+MAX_SCORE = 1000.0
+
+
+class MetricAnomalyDetector:
+    """
+    Vectorized anomaly detection over many metric series.
+    
+    Two detectors score every point against the points before it in its series:
+    
+    - Rolling median/MAD: distance from the median of the trailing window in
+      units of its median absolute deviation. Catches spikes and dips without
+      letting a single outlier inflate the scale.
+    - EWMA: distance from the exponentially weighted mean in units of the
+      exponentially weighted standard deviation. Catches level shifts that a
+      short window soon absorbs.
+    
+    An interval is a run of consecutive points where either detector passes
+    its threshold, kept only if both pass at some point in the run. Either
+    detector alone flags a few points per thousand of plain Gaussian noise;
+    requiring both keeps false alarms rare, while the run still covers the
+    whole episode once one detector settles. All series are processed
+    together as one array, so cost grows with the number of points, not series.
+    """
+    
+    def __init__(
+        self,
+        window: int = 20,
+        mad_threshold: float = 5.0,
+        ewma_alpha: float = 0.1,
+        ewma_threshold: float = 5.0,
+        min_history: int = 8
+    ):
+        """
+        Initialize the detector.
+        
+        Args:
+            window: Trailing points in the rolling median/MAD window
+            mad_threshold: Robust z-score that flags a point
+            ewma_alpha: EWMA smoothing factor; smaller remembers longer
+            ewma_threshold: EWMA z-score that flags a point
+            min_history: Earlier points a series needs before its points are scored
+        """
+        self.window = window
+        self.mad_threshold = mad_threshold
+        self.ewma_alpha = ewma_alpha
+        self.ewma_threshold = ewma_threshold
+        self.min_history = min_history
+    
+    def detect(
+        self,
+        names: Sequence[str],
+        timestamps: Union[Sequence, np.ndarray],
+        values: Union[Sequence[float], np.ndarray],
+        max_intervals: Optional[int] = None
+    ) -> Tuple[Dict[str, List[MetricAnomaly]], Dict[str, int]]:
+        """
+        Find anomaly intervals in every series.
+        
+        Args:
+            names: Metric name of each point
+            timestamps: Timestamp of each point, as datetimes or a datetime64 array
+            values: Value of each point
+            max_intervals: Intervals kept per series, most severe first; None keeps all
+        
+        Returns:
+            (intervals by metric name, most severe first; anomalous point count by metric name)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        series = {name: code for code, name in enumerate(dict.fromkeys(names))}
+        codes = np.fromiter(map(series.__getitem__, names), dtype=np.intp, count=len(values))
+        return self.detect_codes(list(series), codes, timestamps, values, max_intervals)
+    
+    def detect_codes(
+        self,
+        series_names: List[str],
+        codes: np.ndarray,
+        timestamps: Union[Sequence, np.ndarray],
+        values: np.ndarray,
+        max_intervals: Optional[int] = None
+    ) -> Tuple[Dict[str, List[MetricAnomaly]], Dict[str, int]]:
+        """
+        Find anomaly intervals for points already numbered by series.
+        
+        Anomalous point counts cover every interval, but only the intervals
+        that are kept become MetricAnomaly objects, so noisy series with
+        thousands of short runs stay cheap.
+        
+        Args:
+            series_names: Metric name of each series code
+            codes: Series code of each point
+            timestamps: Timestamp of each point, as datetimes or a datetime64 array
+            values: Value of each point
+            max_intervals: Intervals kept per series, most severe first; None keeps all
+        
+        Returns:
+            Same as detect()
+        """
+        if not len(values):
+            return {}, {}
+        
+        # Put each series in time order, one after another
+        timestamps = time_array(timestamps)
+        by_time = np.argsort(timestamps, kind='stable')
+        order = by_time[np.argsort(codes[by_time].astype(np.min_scalar_type(len(series_names))), kind='stable')]
+        x = values[order]
+        counts = np.bincount(codes, minlength=len(series_names))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        position = np.arange(len(x)) - np.repeat(starts, counts)
+        
+        medians, mad_scores = self._mad_scores(x, position)
+        ewma_scores = self._ewma_scores(x, position, starts, counts)
+        scored = position >= self.min_history
+        mad_flags = scored & (mad_scores > self.mad_threshold)
+        ewma_flags = scored & (ewma_scores > self.ewma_threshold)
+        flagged = mad_flags | ewma_flags
+        
+        intervals: Dict[str, List[MetricAnomaly]] = {name: [] for name in series_names}
+        counts_by_name = dict.fromkeys(series_names, 0)
+        if not flagged.any():
+            return intervals, counts_by_name
+        
+        # Runs of consecutive flagged points; a new series also starts a run
+        flagged_index = np.flatnonzero(flagged)
+        run_breaks = (np.diff(flagged_index) != 1) | (position[flagged_index[1:]] == 0)
+        first = np.flatnonzero(np.concatenate(([True], run_breaks)))
+        lengths = np.diff(np.append(first, len(flagged_index)))
+        confirmed = np.logical_or.reduceat((mad_flags & ewma_flags)[flagged_index], first)
+        
+        # Peak of each run by its stronger score
+        run_severity = np.fmax(mad_scores, ewma_scores)[flagged_index]
+        peak_severity = np.maximum.reduceat(run_severity, first)
+        slots = np.arange(len(flagged_index))
+        peak_slot = np.minimum.reduceat(
+            np.where(run_severity == np.repeat(peak_severity, lengths), slots, len(slots)), first
+        )
+        
+        run_codes = codes[order[flagged_index[first]]]
+        runs = np.flatnonzero(confirmed)
+        point_counts = np.bincount(run_codes[runs], weights=lengths[runs], minlength=len(series_names))
+        counts_by_name = dict(zip(series_names, point_counts.astype(int).tolist()))
+        
+        # Most severe first within each series, earlier first among equal severities
+        runs = runs[np.lexsort((runs, -np.round(peak_severity[runs], 2), run_codes[runs]))]
+        if max_intervals is not None:
+            series_runs = run_codes[runs]
+            is_first = np.concatenate(([True], series_runs[1:] != series_runs[:-1]))
+            group_start = np.maximum.accumulate(np.where(is_first, np.arange(len(runs)), 0))
+            runs = runs[np.arange(len(runs)) - group_start < max_intervals]
+        
+        times = timestamps[order]
+        for run in runs.tolist():
+            metric_name = series_names[run_codes[run]]
+            peak = flagged_index[peak_slot[run]]
+            intervals[metric_name].append(MetricAnomaly.model_construct(
+                start_time=_as_datetime(times[flagged_index[first[run]]]),
+                end_time=_as_datetime(times[flagged_index[first[run] + lengths[run] - 1]]),
+                peak_time=_as_datetime(times[peak]),
+                peak_value=float(x[peak]),
+                baseline_value=float(medians[peak]),
+                severity=round(float(peak_severity[run]), 2),
+                point_count=int(lengths[run])
+            ))
+        return intervals, counts_by_name
+    
+    def _mad_scores(self, x: np.ndarray, position: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Rolling median of the trailing window and each point's robust z-score against it."""
+        window = self.window
+        medians = np.full(len(x), np.nan)
+        scores = np.zeros(len(x))
+        padded = np.concatenate((np.full(window, np.nan), x))
+        windows = sliding_window_view(padded, window)[:len(x)]  # Row i holds x[i - window:i]
+        columns = np.arange(window)
+        
+        for block in range(0, len(x), WINDOW_BLOCK_ROWS):
+            rows = slice(block, block + WINDOW_BLOCK_ROWS)
+            history = np.minimum(position[rows], window)
+            block_windows = np.array(windows[rows])
+            # Blank out points that belong to the previous series; NaNs sort last
+            short = np.flatnonzero(history < window)
+            block_windows[short] = np.where(columns >= window - history[short, None], block_windows[short], np.nan)
+            block_windows.sort(axis=1)
+            median = _sorted_median(block_windows, history)
+            deviations = np.abs(np.subtract(block_windows, median[:, None], out=block_windows), out=block_windows)
+            deviations.sort(axis=1)
+            scale = MAD_TO_STD * _sorted_median(deviations, history)
+            scale = np.fmax(scale, MIN_SCALE_FRACTION * np.abs(median))
+            
+            residual = np.abs(x[rows] - median)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                block_scores = np.where(residual > 0, residual / scale, 0.0)
+            medians[rows] = median
+            scores[rows] = np.where(history > 0, block_scores, 0.0)
+        return medians, _clean_scores(scores)
+    
+    def _ewma_scores(
+        self,
+        x: np.ndarray,
+        position: np.ndarray,
+        starts: np.ndarray,
+        counts: np.ndarray
+    ) -> np.ndarray:
+        """Each point's z-score against the EWMA mean and variance of the points before it."""
+        mean = _ewma(x, position, starts, counts, self.ewma_alpha)
+        mean_square = _ewma(x * x, position, starts, counts, self.ewma_alpha)
+        std = np.sqrt(np.maximum(mean_square - mean * mean, 0.0))
+        
+        # Compare each point with the state after the previous point of its series
+        previous_mean = np.concatenate(([np.nan], mean[:-1]))
+        previous_std = np.concatenate(([np.nan], std[:-1]))
+        previous_std = np.fmax(previous_std, MIN_SCALE_FRACTION * np.abs(previous_mean))
+        residual = np.abs(x - previous_mean)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(residual > 0, residual / previous_std, 0.0)
+        scores[position == 0] = 0.0
+        return _clean_scores(scores)
+
+
+def _ewma(
+    x: np.ndarray,
+    position: np.ndarray,
+    starts: np.ndarray,
+    counts: np.ndarray,
+    alpha: float
+) -> np.ndarray:
+    """
+    Bias-corrected EWMA of each series, without a Python loop over points.
+    
+    Each series is cut into blocks long enough that a value's weight decays
+    to nothing within one block. Inside a block the recurrence is a scaled
+    cumulative sum; the only carry needed is the previous block's last value.
+    """
+    decay = 1.0 - alpha
+    block = math.ceil(math.log(EWMA_NEGLIGIBLE_WEIGHT) / math.log(decay)) if 0 < decay < 1 else 1
+    block = max(min(block, int(counts.max())), 1)
+    offset = position % block
+    
+    # Lay the blocks out as rows of a matrix so cumsum never crosses a block
+    blocks_per_series = (counts + block - 1) // block
+    first_block = np.cumsum(blocks_per_series) - blocks_per_series
+    block_of = np.repeat(first_block, counts) + position // block
+    cell = block_of * block + offset
+    # Powers of the decay come from a table rather than one pow per point
+    powers = decay ** np.arange(block + 1)
+    scale = powers[offset]
+    n_blocks = int(block_of[-1]) + 1
+    matrix = np.zeros(n_blocks * block)
+    matrix[cell] = x / scale
+    np.cumsum(matrix.reshape(n_blocks, block), axis=1, out=matrix.reshape(n_blocks, block))
+    partial = alpha * matrix[cell] * scale
+    
+    # Add the previous block's final (uncorrected) state, decayed into this block
+    block_end = np.zeros(n_blocks)
+    is_last = (offset == block - 1)
+    block_end[block_of[is_last]] = partial[is_last]
+    carry = np.where(position >= block, block_end[block_of - 1] * powers[offset + 1], 0.0)
+    # Dividing by the total weight so far removes the pull towards zero at the start;
+    # past one block the remaining weight is negligible
+    return (partial + carry) / (1.0 - powers[np.minimum(position + 1, block)])
+
+
+def _sorted_median(rows: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Median of the first `valid` entries of each sorted row; NaN where there are none."""
+    # Rows are full for all but the first points of each series; only the others need a gather
+    width = rows.shape[1]
+    median = (rows[:, (width - 1) // 2] + rows[:, width // 2]) / 2
+    short = np.flatnonzero(valid < width)
+    if len(short):
+        lower = np.maximum(valid[short] - 1, 0) // 2
+        upper = np.maximum(valid[short], 1) // 2
+        median[short] = np.where(valid[short] > 0, (rows[short, lower] + rows[short, upper]) / 2, np.nan)
+    return median
+
+
+def time_array(timestamps: Union[Sequence, np.ndarray]) -> np.ndarray:
+    """Timestamps as datetime64[us], or as objects if they mix timezones."""
+    if isinstance(timestamps, np.ndarray) and timestamps.dtype.kind == 'M':
+        return timestamps.astype('datetime64[us]')
+    with warnings.catch_warnings():
+        # numpy warns before dropping a timezone; compare such datetimes as objects instead
+        warnings.simplefilter("error")
+        try:
+            return np.array(timestamps, dtype='datetime64[us]')
+        except (UserWarning, DeprecationWarning, TypeError, ValueError):
+            return np.asarray(timestamps, dtype=object)
+
+
+def _clean_scores(scores: np.ndarray) -> np.ndarray:
+    return np.clip(np.nan_to_num(scores, nan=0.0, posinf=MAX_SCORE), 0.0, MAX_SCORE)
+
+
+def _as_datetime(value):
+    return value.item() if isinstance(value, np.datetime64) else value
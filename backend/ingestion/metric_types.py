@@ -0,0 +1,333 @@
+"""
+Metric types for InfraMind.
+Recognizes counters and histograms, and derives the per-second rates and quantiles that summaries describe.
+"""
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.models import MetricBatch, MetricType
+from backend.ingestion.series_index import SeriesIndex
+
+# Prometheus naming conventions: monotonic totals and the parts of a histogram
+COUNTER_SUFFIXES = ("_total", "_count", "_sum")
+BUCKET_SUFFIX = "_bucket"
+BUCKET_TAG = "le"
+
+# Quantiles estimated from every histogram, reported as p50(name), p95(name), ...
+HISTOGRAM_QUANTILES = (0.5, 0.95, 0.99)
+
+# Declarations that mean "read the samples as they are"
+_GAUGE_ALIASES = frozenset(("gauge", "summary", "untyped", "unknown"))
+
+
+def parse_metric_type(declared: Any) -> Optional[MetricType]:
+    """
+    Read a declared metric type, e.g. from a metric_type column or a Prometheus TYPE line.
+    
+    Args:
+        declared: Declared type, as a MetricType or its name; None or "" if not declared
+    
+    Returns:
+        The MetricType, or None if nothing usable was declared
+    """
+    if declared is None or isinstance(declared, MetricType):
+        return declared
+    text = str(declared).strip().lower()
+    if text in _GAUGE_ALIASES:
+        return MetricType.GAUGE
+    try:
+        return MetricType(text)
+    except ValueError:
+        return None
+
+
+def bucket_bound(tags: Mapping[str, str]) -> Optional[float]:
+    """Upper bound of a histogram bucket from its le tag ("+Inf" for the last bucket), or None."""
+    bound = tags.get(BUCKET_TAG)
+    if bound is None:
+        return None
+    try:
+        bound = float(bound)
+    except ValueError:
+        return None
+    return None if np.isnan(bound) else bound
+
+
+def resolve_metric_type(
+    metric_name: str,
+    tags: Mapping[str, str],
+    declared: Optional[MetricType] = None
+) -> MetricType:
+    """
+    Type of one series, from its declaration or else from its name.
+    
+    A histogram is exposed as cumulative _bucket counters with an le tag plus
+    _sum and _count counters, so a declared histogram series without a
+    readable le tag is one of those counters.
+    
+    Args:
+        metric_name: Metric name
+        tags: Series tags
+        declared: Declared type of the metric, if any
+    
+    Returns:
+        The series' MetricType
+    """
+    is_bucket = bucket_bound(tags) is not None
+    if declared is MetricType.HISTOGRAM:
+        return MetricType.HISTOGRAM if is_bucket else MetricType.COUNTER
+    if declared is not None:
+        return declared
+    if metric_name.endswith(BUCKET_SUFFIX) and is_bucket:
+        return MetricType.HISTOGRAM
+    if metric_name.endswith(COUNTER_SUFFIXES):
+        return MetricType.COUNTER
+    return MetricType.GAUGE
+
+
+def declared_type(declarations: Optional[Mapping[str, str]], metric_name: str) -> Optional[MetricType]:
+    """
+    Type declared for a metric in configuration.
+    
+    A histogram or counter declared as "name" also covers name_bucket,
+    name_sum and name_count, as with Prometheus TYPE lines.
+    """
+    if not declarations:
+        return None
+    if metric_name in declarations:
+        return parse_metric_type(declarations[metric_name])
+    for suffix in (BUCKET_SUFFIX,) + COUNTER_SUFFIXES:
+        if metric_name.endswith(suffix) and metric_name[:-len(suffix)] in declarations:
+            return parse_metric_type(declarations[metric_name[:-len(suffix)]])
+    return None
+
+
+def derive_series(
+    batch: MetricBatch,
+    declarations: Optional[Mapping[str, str]] = None,
+    quantiles: Sequence[float] = HISTOGRAM_QUANTILES
+) -> MetricBatch:
+    """
+    Replace counters and histograms with the gauges that describe them.
+    
+    A counter becomes rate(name): the increase between consecutive points
+    per second, where a drop means the counter restarted from zero, so the
+    new value is the increase. Histogram buckets are turned into per-interval
+    increases the same way, then each quantile is estimated for every
+    histogram and timestamp at once by linear interpolation inside the
+    bucket holding the quantile's rank, as histogram_quantile does. Gauges
+    pass through unchanged, and every series of the result is a gauge, so
+    deriving twice is harmless.
+    
+    Args:
+        batch: Parsed metric points
+        declarations: Metric types by name, for metrics not declared in the data
+        quantiles: Quantiles estimated from each histogram
+    
+    Returns:
+        A MetricBatch of gauges; the input batch itself if it has only gauges
+    """
+    types = [
+        resolve_metric_type(name, tags, declared or declared_type(declarations, name))
+        for name, tags, declared in zip(batch.names, batch.tags, batch.types)
+    ]
+    if all(metric_type is MetricType.GAUGE for metric_type in types):
+        return batch
+    
+    # Sort series by type; buckets are grouped into histograms by name and the tags other than le
+    present = np.zeros(batch.series_count, dtype=bool)
+    present[batch.series_codes] = True
+    is_gauge = np.zeros(batch.series_count, dtype=bool)
+    is_counter = np.zeros(batch.series_count, dtype=bool)
+    histogram_of = np.full(batch.series_count, -1, dtype=np.intp)
+    bounds = np.zeros(batch.series_count)
+    histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+    families: List[Tuple[str, Dict[str, str], Optional[str]]] = []
+    for code in np.flatnonzero(present).tolist():
+        name, tags, metric_type = batch.names[code], batch.tags[code], types[code]
+        if metric_type is MetricType.GAUGE:
+            is_gauge[code] = True
+        elif metric_type is MetricType.COUNTER:
+            is_counter[code] = True
+        else:
+            base = name[:-len(BUCKET_SUFFIX)] if name.endswith(BUCKET_SUFFIX) else name
+            family = {key: value for key, value in tags.items() if key != BUCKET_TAG}
+            identity = (base, tuple(sorted(family.items())))
+            if identity not in histograms:
+                histograms[identity] = len(families)
+                families.append((base, family, batch.units[code]))
+            histogram_of[code] = histograms[identity]
+            bounds[code] = bucket_bound(tags)
+    
+    codes, micros, offsets, values = batch.series_codes, batch.timestamps, batch.tz_offsets, batch.values
+    gauges = np.flatnonzero(is_gauge[codes])
+    
+    counters = np.flatnonzero(is_counter[codes])
+    later, increases, seconds = counter_increases(codes[counters], micros[counters], values[counters])
+    rate_points, rates = counters[later], increases / seconds
+    
+    buckets = np.flatnonzero(histogram_of[codes] >= 0)
+    later, increases, _ = counter_increases(codes[buckets], micros[buckets], values[buckets])
+    bucket_points = buckets[later]
+    groups, estimates = histogram_quantiles(
+        histogram_of[codes[bucket_points]], micros[bucket_points], bounds[codes[bucket_points]], increases, quantiles
+    )
+    quantile_points = bucket_points[groups]
+    quantile_histograms = histogram_of[codes[quantile_points]]
+    
+    # A counter with a single sample, or a histogram with one scrape, yields no points and gets no series
+    has_rate = np.zeros(batch.series_count, dtype=bool)
+    has_rate[codes[rate_points]] = True
+    has_quantile = np.zeros((len(families), len(quantiles)), dtype=bool)
+    for position, estimate in enumerate(estimates):
+        has_quantile[quantile_histograms[~np.isnan(estimate)], position] = True
+    
+    # Number the derived series in order of their sources' first appearance
+    index = SeriesIndex()
+    units: List[Optional[str]] = []
+    
+    def derived_code(name: str, tags: Mapping[str, str], unit: Optional[str]) -> int:
+        code = index.code(name, tags)
+        if code == len(units):
+            units.append(unit)
+        return code
+    
+    derived = np.full(batch.series_count, -1, dtype=np.intp)
+    quantile_codes = np.full((len(families), len(quantiles)), -1, dtype=np.intp)
+    numbered = np.zeros(len(families), dtype=bool)
+    for code in np.flatnonzero(present).tolist():
+        name, tags, unit = batch.names[code], batch.tags[code], batch.units[code]
+        if is_gauge[code]:
+            derived[code] = derived_code(name, tags, unit)
+        elif is_counter[code]:
+            if has_rate[code]:
+                derived[code] = derived_code(f"rate({name})", tags, f"{unit}/s" if unit else "/s")
+        elif not numbered[histogram_of[code]]:
+            histogram = histogram_of[code]
+            numbered[histogram] = True
+            base, family, family_unit = families[histogram]
+            for position, q in enumerate(quantiles):
+                if has_quantile[histogram, position]:
+                    quantile_codes[histogram, position] = derived_code(f"p{q * 100:g}({base})", family, family_unit)
+    
+    parts = [
+        (derived[codes[gauges]], micros[gauges], offsets[gauges], values[gauges]),
+        (derived[codes[rate_points]], micros[rate_points], offsets[rate_points], rates),
+    ]
+    for position, estimate in enumerate(estimates):
+        kept = ~np.isnan(estimate)
+        points = quantile_points[kept]
+        parts.append((
+            quantile_codes[quantile_histograms[kept], position], micros[points], offsets[points], estimate[kept]
+        ))
+    
+    derived_codes, derived_micros, derived_offsets, derived_values = zip(*parts)
+    return MetricBatch(
+        series_codes=np.concatenate(derived_codes).astype(np.intp, copy=False),
+        timestamps=np.concatenate(derived_micros).astype(np.int64, copy=False),
+        tz_offsets=np.concatenate(derived_offsets).astype(np.int32, copy=False),
+        values=np.concatenate(derived_values).astype(np.float64, copy=False),
+        names=index.names,
+        tags=index.tags,
+        units=units,
+        types=[MetricType.GAUGE] * len(index.names),
+    )
+
+
+def counter_increases(
+    codes: np.ndarray,
+    micros: np.ndarray,
+    values: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Increase of every counter series between consecutive points in time.
+    
+    A value below the previous one means the counter was reset, so the
+    increase since the reset is the value itself. Pairs with a missing value
+    or without time between them are skipped.
+    
+    Args:
+        codes: Series code of each point
+        micros: Epoch microseconds of each point
+        values: Counter value of each point
+    
+    Returns:
+        Index of the later point of each pair, the increase, and the seconds between the points
+    """
+    order = np.lexsort((micros, codes))
+    sorted_codes, sorted_micros, sorted_values = codes[order], micros[order], values[order]
+    previous, current = sorted_values[:-1], sorted_values[1:]
+    valid = (
+        (sorted_codes[1:] == sorted_codes[:-1]) & (sorted_micros[1:] > sorted_micros[:-1])
+        & np.isfinite(previous) & np.isfinite(current)
+    )
+    increases = np.where(current >= previous, current - previous, current)
+    seconds = (sorted_micros[1:] - sorted_micros[:-1]) / 1e6
+    return order[1:][valid], increases[valid], seconds[valid]
+
+
+def histogram_quantiles(
+    histograms: np.ndarray,
+    micros: np.ndarray,
+    bounds: np.ndarray,
+    counts: np.ndarray,
+    quantiles: Sequence[float]
+) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Estimate quantiles of every (histogram, timestamp) group of bucket counts at once.
+    
+    Buckets are sorted by upper bound within each group and their counts made
+    non-decreasing, since buckets are cumulative. The quantile's rank is
+    found in the first bucket whose count reaches it, and the estimate is
+    interpolated linearly between that bucket's lower and upper bounds. The
+    lower bound of the first bucket is 0 unless its upper bound is not
+    positive, in which case the upper bound is the estimate. A rank in the
+    +Inf bucket is estimated as the highest finite bound.
+    
+    Args:
+        histograms: Histogram of each bucket count
+        micros: Epoch microseconds of each bucket count
+        bounds: Upper bound (le) of each bucket count's bucket
+        counts: Observations at or below the bound
+        quantiles: Quantiles to estimate, each in (0, 1]
+    
+    Returns:
+        Index of one bucket count per group with observations, and the
+        estimates of each quantile for those groups (NaN where none exists)
+    """
+    order = np.lexsort((bounds, micros, histograms))
+    if not len(order):
+        return order, [np.zeros(0) for _ in quantiles]
+    sorted_histograms, sorted_micros = histograms[order], micros[order]
+    upper_bounds, cumulative = bounds[order], counts[order]
+    starts = np.flatnonzero(np.concatenate((
+        [True], (np.diff(sorted_histograms) != 0) | (np.diff(sorted_micros) != 0)
+    )))
+    sizes = np.diff(np.append(starts, len(order)))
+    groups = np.repeat(np.arange(len(starts)), sizes)
+    
+    # Running maximum within each group: shifting each group above the previous ones
+    # lets one accumulate over the whole array
+    span = float(cumulative.max()) + 1.0
+    cumulative = np.maximum.accumulate(cumulative + groups * span) - groups * span
+    totals = cumulative[starts + sizes - 1]
+    
+    positions = np.arange(len(order))
+    is_first = positions == np.repeat(starts, sizes)
+    lower_bounds = np.where(is_first, np.minimum(upper_bounds, 0.0), np.roll(upper_bounds, 1))
+    below = np.where(is_first, 0.0, np.roll(cumulative, 1))
+    
+    observed = totals > 0
+    estimates = []
+    for q in quantiles:
+        ranks = q * totals
+        reached = cumulative >= np.repeat(ranks, sizes)
+        bucket = np.minimum.reduceat(np.where(reached, positions, len(order)), starts)
+        upper, lower = upper_bounds[bucket], lower_bounds[bucket]
+        fraction = (ranks - below[bucket]) / np.maximum(cumulative[bucket] - below[bucket], np.finfo(float).tiny)
+        with np.errstate(invalid='ignore'):
+            interpolated = lower + (upper - lower) * fraction
+        estimate = np.where(np.isinf(upper), np.where(is_first[bucket], np.nan, lower), interpolated)
+        estimates.append(estimate[observed])
+    return order[starts[observed]], estimates
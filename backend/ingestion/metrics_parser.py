@@ -5,28 +5,97 @@ Parses time-series metrics data and detects anomalies.
 import json
 import csv
 import io
+import itertools
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from dateutil import parser as date_parser
+from typing import BinaryIO, Iterable, List, Dict, Any, Mapping, Optional, Sequence, Tuple, Union
 import logging
 
-from backend.models import MetricDataPoint, MetricSummary
+import numpy as np
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover - pandas is in requirements.txt
+    pd = None
+
+from backend.models import ChangePoint, MetricBatch, MetricDataPoint, MetricSeries, MetricSummary
+from backend.models.log_batch import NAIVE_OFFSET, from_epoch_micros, to_epoch_micros
+from backend.core.config import get_settings
 from backend.core.exceptions import ParsingError
+from backend.ingestion.timestamp_parser import TimestampParser
+from backend.ingestion.json_stream import JSONStream
+from backend.ingestion.metric_anomalies import MetricAnomalyDetector
+from backend.ingestion.change_points import ChangePointDetector, wall_clock_micros
+from backend.ingestion.series_index import SeriesIndex
+from backend.ingestion.metric_types import derive_series, parse_metric_type
+from backend.storage.baseline_store import BaselineStats, BaselineStore
+from backend.utils.lttb import lttb_indices
 
 logger = logging.getLogger(__name__)
 
+# Percentiles reported in every metric summary
+SUMMARY_PERCENTILES = (50, 95, 99)
+
+# Anomaly intervals kept per metric summary
+MAX_ANOMALIES_PER_METRIC = 5
+
+# Stored points a series needs before its baseline is reported
+MIN_BASELINE_SAMPLES = 10
+
+# CSV columns that are not tags; the first present of each alias group is used
+CSV_TIME_COLUMNS = ('timestamp', 'time')
+CSV_NAME_COLUMNS = ('metric', 'name', 'metric_name')
+CSV_TYPE_COLUMN = 'metric_type'
+CSV_RESERVED_COLUMNS = frozenset(CSV_TIME_COLUMNS + CSV_NAME_COLUMNS + ('value', 'unit', CSV_TYPE_COLUMN))
+
+
+def _csv_engine() -> str:
+    """pandas CSV engine: pyarrow's multithreaded reader when installed, else the C reader."""
+    try:
+        import pyarrow  # noqa: F401
+        return "pyarrow"
+    except ImportError:
+        return "c"
+
 
 class MetricsParser:
     """Parse metrics from various formats and calculate summaries."""
     
-    def __init__(self, anomaly_threshold: float = 2.0):
+    def __init__(
+        self,
+        anomaly_threshold: float = 2.0,
+        anomaly_detector: Optional[MetricAnomalyDetector] = None,
+        change_point_detector: Optional[ChangePointDetector] = None,
+        group_by: Optional[Sequence[str]] = None,
+        baseline_store: Optional[BaselineStore] = None,
+        metric_types: Optional[Mapping[str, str]] = None,
+        run_detectors: Optional[bool] = None
+    ):
         """
         Initialize metrics parser.
         
         Args:
             anomaly_threshold: Standard deviations from mean to flag anomaly
+            anomaly_detector: Rolling detector for anomalies inside the window
+            change_point_detector: Detector for level shifts in each series
+            group_by: Tags that summaries roll series up to. Falls back to metric_group_by;
+                None there keeps every tag.
+            baseline_store: History that summaries are compared with; points are
+                added to it by record_baseline
+            metric_types: Types (gauge, counter, histogram) of metrics by name, for
+                metrics the data does not declare. Falls back to metric_types.
+            run_detectors: Whether summaries include rolling anomalies and change points.
+                Falls back to metric_detectors; without them only the latest value and
+                the baseline can flag an anomaly.
         """
         self.anomaly_threshold = anomaly_threshold
+        self.anomaly_detector = anomaly_detector or MetricAnomalyDetector()
+        self.change_point_detector = change_point_detector or ChangePointDetector()
+        self.group_by = group_by if group_by is not None else get_settings().metric_group_by
+        self.baseline_store = baseline_store
+        self.metric_types = metric_types if metric_types is not None else get_settings().metric_types
+        self.run_detectors = run_detectors if run_detectors is not None else get_settings().metric_detectors
+        self.timestamp_parser = TimestampParser()
+        self.series_index = SeriesIndex()
     
     def parse_file(self, file_content: str) -> List[MetricDataPoint]:
         """
@@ -39,6 +108,9 @@ class MetricsParser:
         Returns:
             List of MetricDataPoint objects
         """
+        # Learn timestamp formats and intern tag sets per file
+        self.timestamp_parser = TimestampParser()
+        self.series_index = SeriesIndex()
         try:
             # Check for empty content
             if not file_content or not file_content.strip():
@@ -52,14 +124,17 @@ class MetricsParser:
                 
                 # Support various JSON structures
                 if isinstance(data, list):
-                    return self._parse_list_format(data)
+                    metrics = self._parse_list_format(data)
                 elif isinstance(data, dict):
-                    return self._parse_dict_format(data)
+                    metrics = self._parse_dict_format(data)
                 else:
                     raise ParsingError("Unsupported metrics format")
             else:
                 # Try parsing as CSV
-                return self._parse_csv_format(file_content)
+                metrics = self._parse_csv_format(file_content)
+            
+            self.timestamp_parser.log_stats("metrics")
+            return metrics
                 
         except json.JSONDecodeError as e:
             # If JSON parsing fails, try CSV
@@ -71,7 +146,50 @@ class MetricsParser:
             logger.error(f"Error parsing metrics: {str(e)}")
             raise ParsingError(f"Failed to parse metrics: {str(e)}")
     
-    def _parse_list_format(self, data: List[Dict[str, Any]]) -> List[MetricDataPoint]:
+    def parse_stream(self, lines: Iterable[str]) -> List[MetricDataPoint]:
+        """
+        Parse a metrics file from its lines without holding its whole text.
+        
+        CSV rows are read one at a time, and the elements of a JSON list one
+        at a time; a JSON object is read as one value.
+        
+        Args:
+            lines: Lines of the file (JSON or CSV format), newlines included
+            
+        Returns:
+            List of MetricDataPoint objects
+        """
+        self.timestamp_parser = TimestampParser()
+        self.series_index = SeriesIndex()
+        lines = iter(lines)
+        first = next((line for line in lines if line.strip()), None)
+        if first is None:
+            raise ParsingError("Metrics file is empty or contains only whitespace")
+        lines = itertools.chain([first], lines)
+        
+        try:
+            if first.lstrip()[0] in '{[':
+                stream = JSONStream(lines)
+                if stream.peek() == '[':
+                    metrics = self._parse_list_format(stream.read_value() for _ in stream.iter_array())
+                else:
+                    data = stream.read_value()
+                    if not isinstance(data, dict):
+                        raise ParsingError("Unsupported metrics format")
+                    metrics = self._parse_dict_format(data)
+                stream.expect_end()
+            else:
+                metrics = self._parse_csv_format(lines)
+        except ParsingError:
+            raise
+        except Exception as e:
+            logger.error(f"Error parsing metrics: {str(e)}")
+            raise ParsingError(f"Failed to parse metrics: {str(e)}")
+        
+        self.timestamp_parser.log_stats("metrics")
+        return metrics
+    
+    def _parse_list_format(self, data: Iterable[Dict[str, Any]]) -> List[MetricDataPoint]:
         """
         Parse metrics in list format:
         [
@@ -93,14 +211,9 @@ class MetricsParser:
                 value = float(item.get('value', 0))
                 unit = item.get('unit')
                 tags = item.get('tags', {})
+                metric_type = item.get('metric_type') or item.get('type')
                 
-                metrics.append(MetricDataPoint(
-                    timestamp=timestamp,
-                    metric_name=metric_name,
-                    value=value,
-                    unit=unit,
-                    tags=tags
-                ))
+                metrics.append(self._data_point(timestamp, metric_name, value, unit, tags, metric_type))
             except Exception as e:
                 logger.warning(f"Failed to parse metric item: {e}")
                 continue
@@ -141,11 +254,7 @@ class MetricsParser:
                     timestamp = self._parse_timestamp(data.get('timestamp', datetime.now().isoformat()))
                     value = float(values) if not isinstance(values, dict) else float(values.get('value', 0))
                     
-                    metrics.append(MetricDataPoint(
-                        timestamp=timestamp,
-                        metric_name=metric_name,
-                        value=value
-                    ))
+                    metrics.append(self._data_point(timestamp, metric_name, value))
                 except Exception as e:
                     logger.warning(f"Failed to parse metric {metric_name}: {e}")
                 continue
@@ -159,20 +268,16 @@ class MetricsParser:
                         value = float(item.get('value', 0))
                         unit = item.get('unit')
                         tags = item.get('tags', {})
+                        metric_type = item.get('metric_type') or item.get('type')
                     else:
                         # Simple value
                         timestamp = datetime.now()
                         value = float(item)
                         unit = None
                         tags = {}
+                        metric_type = None
                     
-                    metrics.append(MetricDataPoint(
-                        timestamp=timestamp,
-                        metric_name=metric_name,
-                        value=value,
-                        unit=unit,
-                        tags=tags
-                    ))
+                    metrics.append(self._data_point(timestamp, metric_name, value, unit, tags, metric_type))
                 except Exception as e:
                     logger.warning(f"Failed to parse metric value for {metric_name}: {e}")
                     continue
@@ -181,72 +286,252 @@ class MetricsParser:
     
     def create_summaries(
         self, 
-        data_points: List[MetricDataPoint],
-        previous_baseline: Optional[Dict[str, float]] = None
+        data_points: Union[List[MetricDataPoint], MetricBatch],
+        previous_baseline: Optional[Dict[str, float]] = None,
+        group_by: Optional[Sequence[str]] = None
     ) -> List[MetricSummary]:
         """
-        Create metric summaries with anomaly detection.
+        Create metric summaries with anomaly detection, one per series.
+        
+        A series is a metric name plus its tags, so cpu_usage from 40 hosts
+        gives 40 summaries. Counters are summarized as their per-second
+        rates and histograms as quantile series (see derive_series), before
+        rolling up. Rolling up by tag dimensions merges the series that agree
+        on them, averaging points that share a timestamp.
         
         Args:
-            data_points: List of metric data points
-            previous_baseline: Optional baseline values for change detection
+            data_points: Metric data points, or a MetricBatch of them
+            previous_baseline: Optional baseline values for change detection,
+                by series key or metric name. Falls back to the baseline store's means.
+            group_by: Tags to roll series up to ([] for one series per metric name).
+                Falls back to the parser's group_by.
             
         Returns:
             List of MetricSummary objects
         """
-        # Group by metric name
-        grouped = {}
-        for point in data_points:
-            if point.metric_name not in grouped:
-                grouped[point.metric_name] = []
-            grouped[point.metric_name].append(point)
+        batch = data_points if isinstance(data_points, MetricBatch) else self.to_batch(data_points)
+        series = self._summary_series(batch, group_by)
+        if series is None:
+            return []
+        index, codes, micros, offsets, values = series
+        return self._summarize(index, codes, micros.astype('datetime64[us]'), values, previous_baseline, offsets)
+    
+    def record_baseline(
+        self,
+        source: str,
+        data_points: Union[List[MetricDataPoint], MetricBatch],
+        group_by: Optional[Sequence[str]] = None
+    ) -> bool:
+        """
+        Add the points of the series create_summaries would report to the baseline store.
         
-        summaries = []
+        A source's points are added once, however often it is analyzed, so
+        call this from the analysis of an incident rather than for every
+        summary.
         
-        for metric_name, points in grouped.items():
-            if not points:
-                continue
-            
-            values = [p.value for p in points]
-            current_value = points[-1].value if points else 0  # Most recent value
-            
-            # Get time range
-            timestamps = [p.timestamp for p in points]
-            start_time = min(timestamps)
-            end_time = max(timestamps)
-            
-            # Calculate statistics
-            min_val = min(values)
-            max_val = max(values)
-            avg_val = sum(values) / len(values)
+        Args:
+            source: Identifier of the points' origin, e.g. the incident ID
+            data_points: Metric data points, or a MetricBatch of them
+            group_by: Tags to roll series up to. Falls back to the parser's group_by.
             
-            # Calculate standard deviation for anomaly detection
-            variance = sum((x - avg_val) ** 2 for x in values) / len(values)
-            std_dev = variance ** 0.5
+        Returns:
+            False if there is no baseline store or the source was already recorded
+        """
+        if self.baseline_store is None:
+            return False
+        batch = data_points if isinstance(data_points, MetricBatch) else self.to_batch(data_points)
+        series = self._summary_series(batch, group_by)
+        if series is None:
+            return False
+        index, codes, micros, _, values = series
+        return self.baseline_store.update(source, index.keys(), codes, micros, values)
+    
+    def _summary_series(
+        self,
+        batch: MetricBatch,
+        group_by: Optional[Sequence[str]]
+    ) -> Optional[Tuple[SeriesIndex, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Derive and roll up a batch's series the way summaries report them.
+        
+        Returns:
+            The series index and each point's code, wall-clock micros, UTC
+            offset and value, or None if nothing is left to summarize
+        """
+        batch = derive_series(batch, self.metric_types)
+        if not len(batch):
+            return None
+        group_by = group_by if group_by is not None else self.group_by
+        
+        # Renumber the batch's series by their (possibly rolled-up) identity
+        index = SeriesIndex()
+        dimensions = None if group_by is None else frozenset(group_by)
+        renumbered = np.array([
+            index.code(name, tags if dimensions is None else {
+                key: value for key, value in tags.items() if key in dimensions
+            })
+            for name, tags in zip(batch.names, batch.tags)
+        ], dtype=np.intp)
+        codes = renumbered[batch.series_codes]
+        micros, offsets, values = batch.timestamps, batch.tz_offsets, batch.values
+        if group_by is not None:
+            codes, micros, offsets, values = self._roll_up(codes, micros, offsets, values)
+        return index, codes, micros, offsets, values
+    
+    def summarize_arrays(
+        self,
+        names: Sequence[str],
+        timestamps: Union[Sequence[datetime], np.ndarray],
+        values: Union[Sequence[float], np.ndarray],
+        previous_baseline: Optional[Dict[str, float]] = None
+    ) -> List[MetricSummary]:
+        """
+        Create metric summaries from column arrays, computing statistics for all series in bulk.
+        
+        Points are sorted once, by series and then by value, so every
+        statistic is a reduction over contiguous slices of one array. Anomaly
+        intervals and change points come from the rolling anomaly and
+        change-point detectors.
+        
+        Args:
+            names: Metric name of each point
+            timestamps: Timestamp of each point, as datetimes or a datetime64 array
+            values: Value of each point
+            previous_baseline: Optional baseline values for change detection
             
-            # Detect anomaly
-            anomaly_detected = False
-            if std_dev > 0:
-                z_score = abs((current_value - avg_val) / std_dev)
-                anomaly_detected = z_score > self.anomaly_threshold
+        Returns:
+            List of MetricSummary objects, in order of each metric's first appearance
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return []
+        
+        # Number series by first appearance so summaries keep the input order
+        series = {name: code for code, name in enumerate(dict.fromkeys(names))}
+        codes = np.fromiter(map(series.__getitem__, names), dtype=np.intp, count=len(values))
+        index = SeriesIndex()
+        for name in series:
+            index.code(name)
+        return self._summarize(index, codes, timestamps, values, previous_baseline)
+    
+    def _summarize(
+        self,
+        index: SeriesIndex,
+        codes: np.ndarray,
+        timestamps: Union[Sequence[datetime], np.ndarray],
+        values: np.ndarray,
+        previous_baseline: Optional[Dict[str, float]],
+        offsets: Optional[np.ndarray] = None
+    ) -> List[MetricSummary]:
+        """
+        Summaries of the series in index, given each point's series code.
+        
+        With a baseline store, each series is compared with its stored
+        history from the days before it begins. When
+        timestamps are naive wall-clock times, offsets holds each point's UTC
+        offset so the reported times get their timezone back. Series without
+        points get no summary.
+        """
+        counts = np.bincount(codes, minlength=len(index))
+        if not counts.all():
+            present = np.flatnonzero(counts)
+            renumbered = np.full(len(counts), -1, dtype=np.intp)
+            renumbered[present] = np.arange(len(present))
+            codes, counts = renumbered[codes], counts[present]
+            compact = SeriesIndex()
+            for code in present.tolist():
+                compact.code(index.names[code], index.tags[code])
+            index = compact
+        keys = index.keys()
+        micros = wall_clock_micros(timestamps)
+        
+        # Sorting by value, then stably by series, leaves each series contiguous and sorted.
+        # Small integer codes let the stable pass use numpy's radix sort.
+        by_value = np.argsort(values)
+        series_keys = codes[by_value].astype(np.min_scalar_type(len(keys)))
+        order = by_value[np.argsort(series_keys, kind='stable')]
+        sorted_values = values[order]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        ends = starts + counts - 1
+        
+        min_values = sorted_values[starts]
+        max_values = sorted_values[ends]
+        avg_values = np.add.reduceat(sorted_values, starts) / counts
+        deviations = sorted_values - np.repeat(avg_values, counts)
+        std_devs = np.sqrt(np.add.reduceat(deviations * deviations, starts) / counts)
+        percentiles = {
+            q: self._sorted_percentile(sorted_values, starts, counts, q) for q in SUMMARY_PERCENTILES
+        }
+        
+        # The most recent value is the one that came last in the input
+        current_values = values[np.maximum.reduceat(order, starts)]
+        start_times, end_times = self._time_bounds(timestamps, order, starts)
+        series_offsets = offsets[order[starts]].tolist() if offsets is not None else [NAIVE_OFFSET] * len(keys)
+        baselines = self._stored_baselines(keys, micros[order], starts)
+        if previous_baseline is None:
+            previous_baseline = {key: stats.mean for key, stats in baselines.items()}
+        
+        # Anomaly if the latest value is far from the series mean, or if the
+        # rolling detectors flagged an interval anywhere in the window
+        z_scores = np.divide(
+            np.abs(current_values - avg_values), std_devs,
+            out=np.zeros_like(std_devs), where=std_devs > 0
+        )
+        anomalies = z_scores > self.anomaly_threshold
+        change_points: Dict[str, List[ChangePoint]] = {key: [] for key in keys}
+        if self.run_detectors:
+            intervals, anomalous_points = self.anomaly_detector.detect_codes(
+                keys, codes, timestamps, values, MAX_ANOMALIES_PER_METRIC
+            )
+            for change_point in self.change_point_detector.detect(
+                keys, codes, micros, values
+            ):
+                change_points[change_point.series].append(change_point)
+        else:
+            intervals = {key: [] for key in keys}
+            anomalous_points = dict.fromkeys(keys)
+        
+        summaries = []
+        for code, key in enumerate(keys):
+            metric_name = index.names[code]
+            current_value = float(current_values[code])
+            anomaly_detected = bool(anomalies[code]) or bool(intervals[key])
             
             # Calculate change percentage if baseline provided
             change_percent = None
-            if previous_baseline and metric_name in previous_baseline:
-                baseline = previous_baseline[metric_name]
+            baseline = previous_baseline.get(key, previous_baseline.get(metric_name)) if previous_baseline else None
+            if baseline is not None:
                 if baseline > 0:
                     change_percent = ((current_value - baseline) / baseline) * 100
                     # Also flag as anomaly if change is drastic
                     if abs(change_percent) > 50:  # 50% change
                         anomaly_detected = True
+            stored = baselines.get(key)
+            offset = series_offsets[code]
+            for anomaly in intervals[key]:
+                anomaly.start_time = _with_offset(anomaly.start_time, offset)
+                anomaly.end_time = _with_offset(anomaly.end_time, offset)
+                anomaly.peak_time = _with_offset(anomaly.peak_time, offset)
             
             summaries.append(MetricSummary(
                 metric_name=metric_name,
-                start_time=start_time,
-                end_time=end_time,
-                min_value=min_val,
-                max_value=max_val,
-                avg_value=avg_val,
+                tags=index.tags[code],
+                start_time=_with_offset(start_times[code], offset),
+                end_time=_with_offset(end_times[code], offset),
+                min_value=float(min_values[code]),
+                max_value=float(max_values[code]),
+                avg_value=float(avg_values[code]),
+                std_dev=float(std_devs[code]),
+                p50_value=float(percentiles[50][code]),
+                p95_value=float(percentiles[95][code]),
+                p99_value=float(percentiles[99][code]),
+                sample_count=int(counts[code]),
+                anomalous_points=anomalous_points[key],
+                baseline_avg=stored.mean if stored else None,
+                baseline_p99=stored.quantile(0.99) if stored else None,
+                baseline_samples=stored.count if stored else None,
+                anomalies=intervals[key],
+                change_points=change_points[key],
                 current_value=current_value,
                 anomaly_detected=anomaly_detected,
                 change_percent=change_percent
@@ -254,16 +539,258 @@ class MetricsParser:
         
         return summaries
     
-    def _parse_csv_format(self, file_content: str) -> List[MetricDataPoint]:
+    def _stored_baselines(
+        self,
+        keys: List[str],
+        grouped_micros: np.ndarray,
+        starts: np.ndarray
+    ) -> Dict[str, BaselineStats]:
+        """Stored history of each series with enough samples, looked up by the series' first day."""
+        if self.baseline_store is None:
+            return {}
+        baselines = self.baseline_store.baselines(keys, np.minimum.reduceat(grouped_micros, starts))
+        return {key: stats for key, stats in baselines.items() if stats.count >= MIN_BASELINE_SAMPLES}
+    
+    @staticmethod
+    def _roll_up(
+        codes: np.ndarray,
+        micros: np.ndarray,
+        offsets: np.ndarray,
+        values: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Average the points of each rolled-up series that share a timestamp, e.g. one per host."""
+        order = np.lexsort((micros, codes))
+        sorted_codes, sorted_micros = codes[order], micros[order]
+        first = np.flatnonzero(np.concatenate((
+            [True], (np.diff(sorted_codes) != 0) | (np.diff(sorted_micros) != 0)
+        )))
+        sizes = np.diff(np.append(first, len(order)))
+        averaged = np.add.reduceat(values[order], first) / sizes
+        return sorted_codes[first], sorted_micros[first], offsets[order[first]], averaged
+    
+    @staticmethod
+    def _sorted_percentile(
+        sorted_values: np.ndarray,
+        starts: np.ndarray,
+        counts: np.ndarray,
+        q: float
+    ) -> np.ndarray:
+        """Percentile q of each sorted slice, interpolated linearly like np.percentile."""
+        position = (counts - 1) * (q / 100)
+        lower = np.floor(position).astype(np.intp)
+        upper = np.minimum(lower + 1, counts - 1)
+        low_values = sorted_values[starts + lower]
+        return low_values + (sorted_values[starts + upper] - low_values) * (position - lower)
+    
+    @staticmethod
+    def _time_bounds(
+        timestamps: Union[Sequence[datetime], np.ndarray],
+        order: np.ndarray,
+        starts: np.ndarray
+    ) -> Tuple[List[datetime], List[datetime]]:
+        """Earliest and latest timestamp of each series."""
+        timestamps = np.asarray(timestamps)
+        if timestamps.dtype.kind == 'M':
+            timestamps = timestamps.astype('datetime64[us]')
+        grouped = timestamps[order]
+        start_times = np.minimum.reduceat(grouped, starts)
+        end_times = np.maximum.reduceat(grouped, starts)
+        return start_times.tolist(), end_times.tolist()
+    
+    def downsample(
+        self,
+        data_points: Union[List[MetricDataPoint], MetricBatch],
+        max_points: Optional[int] = None
+    ) -> List[MetricDataPoint]:
+        """
+        Reduce each metric series to its most visually significant points.
+        
+        Uses Largest-Triangle-Three-Buckets across all series at once, so
+        spikes and dips survive while flat stretches are thinned out.
+        Counters and histograms are charted as their rates and quantiles.
+        Only the kept points of a MetricBatch are materialized.
+        
+        Args:
+            data_points: Metric data points, or a MetricBatch of them
+            max_points: Points kept per series. Falls back to metric_series_points.
+            
+        Returns:
+            The kept data points, grouped by series and in time order within each
+        """
+        if not len(data_points):
+            return []
+        max_points = max_points or get_settings().metric_series_points
+        batch = data_points if isinstance(data_points, MetricBatch) else self.to_batch(data_points)
+        derived = derive_series(batch, self.metric_types)
+        if not len(derived):
+            return []
+        codes, micros = derived.series_codes, derived.timestamps
+        
+        by_time = np.argsort(micros, kind='stable')
+        order = by_time[np.argsort(codes[by_time], kind='stable')]
+        counts = np.bincount(codes, minlength=derived.series_count)
+        present = counts > 0
+        starts = (np.cumsum(counts) - counts)[present]
+        kept = order[lttb_indices(starts, counts[present], micros[order] - micros.min(), derived.values[order], max_points)]
+        if derived is not batch or isinstance(data_points, MetricBatch):
+            return derived.points(kept)
+        return [data_points[index] for index in kept]
+    
+    def to_batch(self, data_points: List[MetricDataPoint]) -> MetricBatch:
+        """
+        Convert data points to columns.
+        
+        Args:
+            data_points: Metric data points
+        
+        Returns:
+            MetricBatch with one series per (name, tags), each with the unit and type of its first point
+        """
+        if not data_points:
+            return MetricBatch.empty()
+        index = SeriesIndex()
+        codes = index.codes(data_points)
+        timestamps = [point.timestamp for point in data_points]
+        offsets = np.fromiter(map(_utc_offset_seconds, timestamps), dtype=np.int32, count=len(timestamps))
+        _, first = np.unique(codes, return_index=True)
+        return MetricBatch(
+            series_codes=codes,
+            timestamps=wall_clock_micros(timestamps),
+            tz_offsets=offsets,
+            values=np.fromiter((point.value for point in data_points), dtype=np.float64, count=len(data_points)),
+            names=index.names,
+            tags=index.tags,
+            units=[data_points[position].unit for position in first.tolist()],
+            types=[data_points[position].metric_type for position in first.tolist()],
+        )
+    
+    def parse_csv_columns(self, file_content: Union[str, BinaryIO]) -> Optional[MetricBatch]:
         """
-        Parse metrics in CSV format.
-        Expected columns: timestamp, metric/name, value, [unit], [tags/service/etc]
+        Parse a metrics CSV straight into columns with pandas.
+        
+        Reads every column as text (with pyarrow when installed), converts
+        values with to_numeric and timestamps with one ISO 8601 to_datetime
+        call, and numbers series by grouping on name and tag columns. Input
+        this path cannot reproduce exactly, such as epoch or free-form
+        timestamps, mixed UTC offsets or quoted newlines the reader rejects,
+        returns None so the caller can use the row-by-row parser.
+        
+        Args:
+            file_content: Raw CSV content including the header row, or a
+                seekable binary file of UTF-8 CSV, which is read in place
+        
+        Returns:
+            MetricBatch, or None if the fast path does not apply
+        """
+        if pd is None:
+            return None
+        if isinstance(file_content, str):
+            head = file_content.lstrip()[:65536]
+        else:
+            file_content.seek(0)
+            head = file_content.read(65536).decode('utf-8', errors='replace').lstrip()
+        header = next(csv.reader(io.StringIO(head)), [])
+        time_column = next((name for name in CSV_TIME_COLUMNS if name in header), None)
+        name_column = next((name for name in CSV_NAME_COLUMNS if name in header), None)
+        if time_column is None or name_column is None or 'value' not in header:
+            return None
+        
+        # Values are read as floats directly; a column with anything unreadable is read as text
+        dtypes = {name: str for name in header}
+        frame = None
+        for value_dtype in (np.float64, str):
+            if isinstance(file_content, str):
+                source, encoding = io.StringIO(file_content), {}
+            else:
+                file_content.seek(0)
+                source, encoding = file_content, {'encoding': 'utf-8', 'encoding_errors': 'replace'}
+            try:
+                frame = pd.read_csv(
+                    source, dtype={**dtypes, 'value': value_dtype},
+                    keep_default_na=False, engine=_csv_engine(), **encoding
+                )
+                break
+            except ValueError:
+                continue
+            except Exception as e:
+                logger.debug(f"Columnar CSV read failed, using the row parser: {e}")
+                return None
+        if frame is None:
+            return None
+        
+        # Rows without a name or with an unreadable value are skipped, as in the row parser
+        if frame['value'].dtype == np.float64:
+            values = frame['value']
+            frame = frame[frame[name_column] != ""]
+        else:
+            raw_values = frame['value'].str.strip()
+            values = pd.to_numeric(raw_values, errors='coerce')
+            readable = values.notna() | raw_values.str.lower().isin(('nan', '+nan', '-nan'))
+            frame = frame[readable & (frame[name_column] != "")]
+        values = values[frame.index]
+        if frame.empty:
+            return None
+        
+        try:
+            timestamps = pd.to_datetime(frame[time_column], format='ISO8601')
+        except (ValueError, TypeError, OverflowError):
+            return None
+        if timestamps.isna().any():
+            return None
+        offset = NAIVE_OFFSET
+        if timestamps.dt.tz is not None:
+            utc_offset = timestamps.dt.tz.utcoffset(None)
+            if utc_offset is None:
+                return None
+            offset = int(utc_offset.total_seconds())
+            timestamps = timestamps.dt.tz_localize(None)
+        
+        tag_columns = [name for name in frame.columns if name not in CSV_RESERVED_COLUMNS]
+        series_codes = frame.groupby([name_column, *tag_columns], sort=False).ngroup().to_numpy(dtype=np.intp)
+        _, first = np.unique(series_codes, return_index=True)
+        firsts = frame.iloc[first]
+        index = SeriesIndex()
+        for name, tags in zip(firsts[name_column].tolist(), firsts[tag_columns].to_dict('records')):
+            index.code(name, tags)
+        units = firsts['unit'].tolist() if 'unit' in frame.columns else [None] * len(firsts)
+        types = (
+            [parse_metric_type(declared or None) for declared in firsts[CSV_TYPE_COLUMN].tolist()]
+            if CSV_TYPE_COLUMN in frame.columns else None
+        )
+        
+        return MetricBatch(
+            series_codes=series_codes,
+            timestamps=timestamps.to_numpy(dtype='datetime64[us]').astype(np.int64),
+            tz_offsets=np.full(len(frame), offset, dtype=np.int32),
+            values=values.to_numpy(dtype=np.float64),
+            names=index.names,
+            tags=index.tags,
+            units=units,
+            types=types,
+        )
+    
+    @staticmethod
+    def to_series(data_points: List[MetricDataPoint]) -> List[MetricSeries]:
+        """Group data points into per-series columns, keeping their order."""
+        index = SeriesIndex()
+        series: List[MetricSeries] = []
+        for point, code in zip(data_points, index.codes(data_points).tolist()):
+            if code == len(series):
+                series.append(MetricSeries(metric_name=point.metric_name, tags=index.tags[code], unit=point.unit))
+            series[code].timestamps.append(point.timestamp)
+            series[code].values.append(point.value)
+        return series
+    
+    def _parse_csv_format(self, file_content: Union[str, Iterable[str]]) -> List[MetricDataPoint]:
+        """
+        Parse metrics in CSV format, from its text or its lines.
+        Expected columns: timestamp, metric/name, value, [unit], [metric_type], [tags/service/etc]
         """
         metrics = []
         
         try:
             # Use csv.DictReader to parse CSV
-            csv_file = io.StringIO(file_content)
+            csv_file = io.StringIO(file_content) if isinstance(file_content, str) else file_content
             reader = csv.DictReader(csv_file)
             
             for row in reader:
@@ -283,18 +810,13 @@ class MetricsParser:
                     
                     # Get optional fields
                     unit = row.get('unit')
+                    metric_type = row.get(CSV_TYPE_COLUMN)
                     
                     # Collect remaining columns as tags
                     tags = {k: v for k, v in row.items() 
-                           if k not in ['timestamp', 'time', 'metric', 'name', 'metric_name', 'value', 'unit']}
+                           if k not in CSV_RESERVED_COLUMNS}
                     
-                    metrics.append(MetricDataPoint(
-                        timestamp=timestamp,
-                        metric_name=metric_name,
-                        value=value,
-                        unit=unit,
-                        tags=tags if tags else None
-                    ))
+                    metrics.append(self._data_point(timestamp, metric_name, value, unit, tags, metric_type))
                 except Exception as e:
                     logger.warning(f"Failed to parse CSV row: {e}")
                     continue
@@ -307,10 +829,33 @@ class MetricsParser:
             
         return metrics
     
+    def _data_point(
+        self,
+        timestamp: datetime,
+        metric_name: str,
+        value: float,
+        unit: Optional[Any] = None,
+        tags: Optional[Dict[str, Any]] = None,
+        metric_type: Optional[Any] = None
+    ) -> MetricDataPoint:
+        """Build a data point whose tag dict is shared with every other point of its series."""
+        if not isinstance(metric_name, str):
+            raise ValueError(f"Metric name must be a string, got {metric_name!r}")
+        if tags is not None and not isinstance(tags, dict):
+            raise ValueError(f"Metric tags must be an object, got {tags!r}")
+        return MetricDataPoint.model_construct(
+            timestamp=timestamp,
+            metric_name=metric_name,
+            value=value,
+            unit=None if unit is None else str(unit),
+            tags=self.series_index.intern_tags(tags),
+            metric_type=parse_metric_type(metric_type or None)
+        )
+    
     def _parse_timestamp(self, timestamp_str: str) -> datetime:
         """Parse timestamp string to datetime object."""
         try:
-            return date_parser.parse(timestamp_str)
+            return self.timestamp_parser.parse(timestamp_str)
         except Exception as e:
             logger.warning(f"Failed to parse timestamp '{timestamp_str}': {e}")
             return datetime.now()
@@ -330,3 +875,15 @@ class MetricsParser:
     def get_metric_names(self, data_points: List[MetricDataPoint]) -> List[str]:
         """Get list of unique metric names."""
         return list(set(point.metric_name for point in data_points))
+
+
+def _utc_offset_seconds(timestamp: datetime) -> int:
+    offset = timestamp.utcoffset()
+    return NAIVE_OFFSET if offset is None else int(offset.total_seconds())
+
+
+def _with_offset(timestamp: datetime, offset: int) -> datetime:
+    """Give a naive wall-clock datetime the UTC offset its point was parsed with."""
+    if offset == NAIVE_OFFSET or timestamp.tzinfo is not None:
+        return timestamp
+    return from_epoch_micros(to_epoch_micros(timestamp), offset)
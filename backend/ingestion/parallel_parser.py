@@ -0,0 +1,249 @@
+"""
+Parallel parser for InfraMind.
+Splits large line-oriented files into newline-aligned chunks and parses them in worker processes.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from backend.models import LogBatch, LogBatchBuilder, MetricDataPoint
+from backend.core.config import get_settings
+from backend.core.exceptions import ParsingError
+from backend.ingestion.log_parser import LogParser
+from backend.ingestion.metrics_parser import MetricsParser
+from backend.ingestion.series_index import SeriesIndex
+
+logger = logging.getLogger(__name__)
+
+
+# Shared worker pool, created on first use
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+
+
+def get_ingestion_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Get or create the shared ingestion process pool.
+    
+    Args:
+        workers: Number of worker processes
+    
+    Returns:
+        ProcessPoolExecutor instance
+    """
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+        logger.info(f"Started ingestion process pool with {workers} workers")
+    return _executor
+
+
+def shutdown_ingestion_executor() -> None:
+    """Shut down the shared ingestion process pool, if running."""
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        _executor_workers = 0
+
+
+def split_newline_aligned(data: bytes, chunk_size: int, start: int = 0) -> List[Tuple[int, int]]:
+    """
+    Split data into byte ranges that each end on a line boundary.
+    
+    Args:
+        data: Raw file content
+        chunk_size: Target size of each range in bytes
+        start: Offset to start splitting from
+    
+    Returns:
+        List of (start, end) offsets covering data[start:]
+    """
+    ranges = []
+    length = len(data)
+    
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            newline = data.find(b'\n', end - 1)
+            end = length if newline == -1 else newline + 1
+        ranges.append((start, end))
+        start = end
+    
+    return ranges
+
+
+def _parse_log_chunk(chunk: bytes, source: str, file_format: str) -> Tuple[List[str], LogBatch, Any]:
+    """Worker entry point: parse one chunk of a log file."""
+    return LogParser().parse_chunk(chunk, source, file_format)
+
+
+def _parse_csv_chunk(header: bytes, chunk: bytes) -> List[MetricDataPoint]:
+    """Worker entry point: parse one chunk of a metrics CSV file."""
+    content = (header + chunk).decode('utf-8', errors='replace')
+    try:
+        return MetricsParser()._parse_csv_format(content)
+    except ParsingError:
+        # A chunk with no valid rows is not an error for the file as a whole
+        return []
+
+
+class ParallelParser:
+    """
+    Parse very large log and metric files across a process pool.
+    
+    Inputs are split into newline-aligned byte ranges, parsed concurrently and
+    reassembled in their original order. Inputs below the configured threshold
+    are parsed in-process, where pool overhead would outweigh the gain.
+    """
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunk_size_bytes: Optional[int] = None,
+        threshold_bytes: Optional[int] = None
+    ):
+        """
+        Initialize parallel parser.
+        
+        Args:
+            workers: Worker processes to use. Falls back to settings if not provided.
+            chunk_size_bytes: Target chunk size. Falls back to settings if not provided.
+            threshold_bytes: Minimum input size for parallel parsing. Falls back to settings.
+        """
+        settings = get_settings()
+        self.workers = workers or settings.ingestion_worker_count
+        self.chunk_size_bytes = chunk_size_bytes or settings.ingestion_chunk_size_mb * 1024 * 1024
+        self.threshold_bytes = (
+            threshold_bytes if threshold_bytes is not None
+            else settings.parallel_ingestion_threshold_mb * 1024 * 1024
+        )
+    
+    def should_parallelize(self, size_bytes: int) -> bool:
+        """Check whether an input is large enough to be worth fanning out."""
+        return self.workers > 1 and size_bytes >= self.threshold_bytes
+    
+    def parse_logs(self, data: bytes, source: str = "unknown", file_format: str = "auto") -> LogBatch:
+        """
+        Parse a log file in parallel chunks.
+        
+        Workers return columnar batches, which are cheap to send back between
+        processes. Each chunk's last entry comes back separately so that
+        continuation lines (e.g., stack traces) spilling into the next chunk
+        can be re-attached to it before it is added.
+        
+        Args:
+            data: Raw log file content
+            source: Source name for the logs (e.g., service name)
+            file_format: "json", "text", or "auto" to detect
+        
+        Returns:
+            LogBatch of parsed rows in file order
+        """
+        log_parser = LogParser()
+        if file_format == "auto":
+            file_format = log_parser._detect_format(self._first_line(data))
+        
+        ranges = split_newline_aligned(data, self.chunk_size_bytes)
+        logger.info(f"Parsing {len(data)} bytes of logs from {source} in {len(ranges)} chunks")
+        
+        batches: List[LogBatch] = []
+        pending = None
+        results = self._map_ordered(
+            _parse_log_chunk,
+            ((data[start:end], source, file_format) for start, end in ranges)
+        )
+        for orphan_lines, chunk_batch, last_record in results:
+            if orphan_lines and pending:
+                pending.message += '\n' + '\n'.join(orphan_lines)
+                pending.raw += '\n' + '\n'.join(orphan_lines)
+            if last_record is None and not len(chunk_batch):
+                # Nothing but continuation lines: the pending entry may grow further
+                continue
+            if pending:
+                batches.append(self._single_row(pending))
+            batches.append(chunk_batch)
+            pending = last_record
+        
+        if pending:
+            batches.append(self._single_row(pending))
+        return LogBatch.concat(batches)
+    
+    def parse_metrics_csv(self, data: bytes) -> List[MetricDataPoint]:
+        """
+        Parse a metrics CSV file in parallel chunks.
+        
+        The header row is sent with every chunk. Quoted fields that contain
+        newlines are not supported on this path.
+        
+        Args:
+            data: Raw CSV content including the header row
+        
+        Returns:
+            List of MetricDataPoint objects in file order
+        """
+        header_end = data.find(b'\n') + 1
+        if header_end == 0:
+            return MetricsParser()._parse_csv_format(data.decode('utf-8', errors='replace'))
+        header = data[:header_end]
+        
+        ranges = split_newline_aligned(data, self.chunk_size_bytes, start=header_end)
+        logger.info(f"Parsing {len(data)} bytes of CSV metrics in {len(ranges)} chunks")
+        
+        # Each chunk comes back with its own copies of the tag dicts; share them again
+        series_index = SeriesIndex()
+        metrics: List[MetricDataPoint] = []
+        for chunk_metrics in self._map_ordered(
+            _parse_csv_chunk,
+            ((header, data[start:end]) for start, end in ranges)
+        ):
+            for point in chunk_metrics:
+                point.tags = series_index.intern_tags(point.tags)
+            metrics.extend(chunk_metrics)
+        
+        if not metrics:
+            raise ParsingError("No valid metrics found in CSV file")
+        return metrics
+    
+    def _map_ordered(self, fn: Callable[..., Any], arg_tuples: Iterable[Tuple]) -> Iterator[Any]:
+        """
+        Run fn over arg_tuples in the pool, yielding results in submission order.
+        
+        Only a bounded window of chunks is in flight at once, so the slices
+        sent to workers never add up to a second copy of the input.
+        """
+        executor = get_ingestion_executor(self.workers)
+        window = self.workers * 2
+        pending: Deque[Future] = deque()
+        
+        for args in arg_tuples:
+            pending.append(executor.submit(fn, *args))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        
+        while pending:
+            yield pending.popleft().result()
+    
+    @staticmethod
+    def _single_row(record: Any) -> LogBatch:
+        """Wrap one stitched log record in a batch."""
+        builder = LogBatchBuilder()
+        record.append_to(builder)
+        return builder.build()
+    
+    @staticmethod
+    def _first_line(data: bytes) -> str:
+        """Return the first non-blank line, for format detection."""
+        offset = 0
+        while offset < len(data):
+            newline = data.find(b'\n', offset)
+            end = len(data) if newline == -1 else newline
+            line = data[offset:end].strip()
+            if line:
+                return line.decode('utf-8', errors='replace')
+            offset = end + 1
+        return ""
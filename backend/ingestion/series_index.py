@@ -0,0 +1,108 @@
+"""
+Metric series identity for InfraMind.
+Interns tag sets and numbers metric series by (name, tags) through a hash index.
+"""
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.models import MetricDataPoint
+from backend.models.incident import series_key
+
+TagItems = Tuple[Tuple[str, str], ...]
+
+
+class SeriesIndex:
+    """
+    Hash index from (metric name, tags) to small integer series codes.
+    
+    Tag sets are interned: every point with the same tags shares one dict,
+    so a file with millions of rows from a few hundred hosts holds a few
+    hundred tag dicts rather than one per row. Interned dicts are shared
+    and must not be mutated.
+    
+    Series are keyed by the metric name and the tag items sorted by key, so
+    tag order in the input does not matter. With group_by, only the named
+    tag dimensions take part in the identity; series differing only in other
+    tags are rolled up into one.
+    """
+    
+    def __init__(self):
+        self._tag_sets: Dict[TagItems, Dict[str, str]] = {}
+        self._items_by_id: Dict[int, TagItems] = {}  # Interned dicts are kept alive by _tag_sets
+        self._codes: Dict[Tuple[str, TagItems], int] = {}
+        self.names: List[str] = []
+        self.tags: List[Dict[str, str]] = []
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def intern_tags(self, tags: Optional[Mapping[str, Any]]) -> Dict[str, str]:
+        """
+        Return the shared dict for a tag set, with keys and values as strings.
+        
+        Args:
+            tags: Tags of one point, or None
+        
+        Returns:
+            The interned tag dict
+        """
+        if tags is not None and id(tags) in self._items_by_id:
+            return tags
+        items = tuple(sorted((str(key), str(value)) for key, value in tags.items())) if tags else ()
+        interned = self._tag_sets.get(items)
+        if interned is None:
+            interned = self._tag_sets[items] = dict(items)
+            self._items_by_id[id(interned)] = items
+        return interned
+    
+    def code(self, metric_name: str, tags: Optional[Mapping[str, Any]] = None) -> int:
+        """Series code for a metric name and tag set, assigned in order of first appearance."""
+        interned = self.intern_tags(tags)
+        return self._code_for(metric_name, self._items_by_id[id(interned)])
+    
+    def codes(
+        self,
+        data_points: Sequence[MetricDataPoint],
+        group_by: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """
+        Series code of every data point.
+        
+        Args:
+            data_points: Metric data points
+            group_by: Tag dimensions to keep in the identity; None keeps every tag
+        
+        Returns:
+            Array of series codes, one per point
+        """
+        dimensions = None if group_by is None else frozenset(group_by)
+        # Points keep their tag dicts alive, so ids stay unique for the whole call
+        identity_by_id: Dict[int, TagItems] = {}
+        
+        def point_code(point: MetricDataPoint) -> int:
+            items = identity_by_id.get(id(point.tags))
+            if items is None:
+                items = self._items_by_id[id(self.intern_tags(point.tags))]
+                if dimensions is not None:
+                    items = tuple(item for item in items if item[0] in dimensions)
+                identity_by_id[id(point.tags)] = items
+            return self._code_for(point.metric_name, items)
+        
+        return np.fromiter(map(point_code, data_points), dtype=np.intp, count=len(data_points))
+    
+    def key(self, code: int) -> str:
+        """Canonical series key, e.g. cpu_usage{host=web-1,region=eu}."""
+        return series_key(self.names[code], self.tags[code])
+    
+    def keys(self) -> List[str]:
+        """Series keys of every code, in code order."""
+        return [self.key(code) for code in range(len(self.names))]
+    
+    def _code_for(self, metric_name: str, items: TagItems) -> int:
+        code = self._codes.get((metric_name, items))
+        if code is None:
+            code = self._codes[(metric_name, items)] = len(self.names)
+            self.names.append(metric_name)
+            self.tags.append(self.intern_tags(dict(items)))
+        return code
@@ -0,0 +1,260 @@
+"""
+Timestamp parsing engine for InfraMind.
+Parses timestamps with fast paths and per-file learned formats, falling back to dateutil.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dateutil import parser as date_parser
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+_MONTHS = {
+    name: index for index, name in enumerate(
+        ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1
+    )
+}
+
+_EPOCH_PATTERN = re.compile(r'^\d{9,}(?:\.\d+)?$')
+
+
+def _fraction_to_micros(fraction: Optional[str]) -> int:
+    """Convert a fractional-second digit string to microseconds."""
+    if not fraction:
+        return 0
+    return int(fraction[:6].ljust(6, '0'))
+
+
+def _parse_offset(offset: Optional[str]) -> Optional[timezone]:
+    """Convert 'Z', '+0530' or '-05:00' into a timezone."""
+    if not offset:
+        return None
+    if offset == 'Z':
+        return timezone.utc
+    sign = -1 if offset[0] == '-' else 1
+    digits = offset[1:].replace(':', '')
+    return timezone(sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:4])))
+
+
+def _build_iso_like(match: re.Match) -> datetime:
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    return datetime(
+        int(year), int(month), int(day), int(hour), int(minute), int(second),
+        _fraction_to_micros(fraction), tzinfo=_parse_offset(offset)
+    )
+
+
+def _build_common_log(match: re.Match) -> datetime:
+    day, month, year, hour, minute, second, offset = match.groups()
+    return datetime(
+        int(year), _MONTHS[month.lower()], int(day), int(hour), int(minute), int(second),
+        tzinfo=_parse_offset(offset)
+    )
+
+
+def _build_syslog(match: re.Match) -> datetime:
+    # Syslog omits the year; dateutil fills in the current one, so do the same
+    month, day, hour, minute, second = match.groups()
+    return datetime(
+        datetime.now().year, _MONTHS[month.lower()], int(day), int(hour), int(minute), int(second)
+    )
+
+
+def _build_us_date(match: re.Match) -> datetime:
+    # Month first, matching dateutil's default interpretation
+    month, day, year, hour, minute, second, fraction = match.groups()
+    return datetime(
+        int(year), int(month), int(day), int(hour), int(minute), int(second),
+        _fraction_to_micros(fraction)
+    )
+
+
+class _CompiledFormat:
+    """A concrete timestamp layout compiled into a regex and a datetime builder."""
+    
+    def __init__(self, name: str, pattern: str, builder: Callable[[re.Match], datetime]):
+        self.name = name
+        self.regex = re.compile(pattern)
+        self.builder = builder
+    
+    def parse(self, value: str) -> Optional[datetime]:
+        match = self.regex.match(value)
+        if not match:
+            return None
+        try:
+            return self.builder(match)
+        except (ValueError, KeyError):
+            return None
+
+
+# Layouts that datetime.fromisoformat rejects but which are common in logs
+_KNOWN_FORMATS: List[_CompiledFormat] = [
+    _CompiledFormat(
+        "iso_like",
+        r'^(\d{4})[-/](\d{2})[-/](\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,](\d{1,9}))?\s*(Z|[+-]\d{2}:?\d{2})?$',
+        _build_iso_like,
+    ),
+    _CompiledFormat(
+        "common_log",
+        r'^(\d{2})/([A-Za-z]{3})/(\d{4}):(\d{2}):(\d{2}):(\d{2})(?:\s*([+-]\d{4}))?$',
+        _build_common_log,
+    ),
+    _CompiledFormat(
+        "syslog",
+        r'^([A-Za-z]{3})\s+(\d{1,2})\s+(\d{2}):(\d{2}):(\d{2})$',
+        _build_syslog,
+    ),
+    _CompiledFormat(
+        "us_date",
+        r'^(\d{1,2})/(\d{1,2})/(\d{4})[ T](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,9}))?$',
+        _build_us_date,
+    ),
+]
+
+
+class TimestampParser:
+    """
+    Parse timestamps with fast paths before falling back to dateutil.
+    
+    Create one instance per file: the first few values teach it the file's
+    concrete layout, which is then tried first for every remaining value.
+    """
+    
+    # Number of values used to learn the file's format
+    LEARN_SAMPLES = 5
+    
+    # Maximum number of memoized second-resolution strings
+    CACHE_SIZE = 4096
+    
+    def __init__(self):
+        self._learned: Optional[str] = None
+        self._learned_format: Optional[_CompiledFormat] = None
+        self._samples: Dict[str, int] = {}
+        self._sample_count = 0
+        self._cache: Dict[str, datetime] = {}
+        self.fast_path_count = 0
+        self.cache_hit_count = 0
+        self.fallback_count = 0
+    
+    def parse(self, value: Any) -> datetime:
+        """
+        Parse a timestamp string or epoch number.
+        
+        Args:
+            value: Timestamp string, or epoch seconds/milliseconds
+        
+        Returns:
+            Parsed datetime
+        
+        Raises:
+            ValueError: If the value cannot be parsed by any strategy
+        """
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.fast_path_count += 1
+            return self._from_epoch(value)
+        
+        text = str(value).strip()
+        
+        cached = self._cache.get(text)
+        if cached is not None:
+            self.cache_hit_count += 1
+            return cached
+        
+        result = self._parse_fast(text)
+        if result is not None:
+            self.fast_path_count += 1
+        else:
+            try:
+                result = date_parser.parse(text)
+            except (ValueError, OverflowError) as e:
+                raise ValueError(f"Unrecognized timestamp '{text}': {e}")
+            self.fallback_count += 1
+        
+        if '.' not in text and ',' not in text:
+            self._remember(text, result)
+        return result
+    
+    @property
+    def learned_format(self) -> Optional[str]:
+        """Name of the learned format, once enough samples have been seen."""
+        return self._learned
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return counters describing how values were parsed."""
+        total = self.fast_path_count + self.cache_hit_count + self.fallback_count
+        return {
+            "total": total,
+            "fast_path": self.fast_path_count,
+            "cache_hits": self.cache_hit_count,
+            "fallback": self.fallback_count,
+            "fast_path_ratio": (total - self.fallback_count) / total if total else 0.0,
+            "learned_format": self._learned,
+        }
+    
+    def log_stats(self, source: str) -> None:
+        """Log how many timestamps avoided the dateutil fallback."""
+        stats = self.stats()
+        if stats["total"]:
+            logger.info(
+                f"Timestamps for {source}: {stats['total'] - stats['fallback']}/{stats['total']} "
+                f"on fast path ({stats['fast_path_ratio']:.1%}), format={stats['learned_format']}"
+            )
+    
+    def _parse_fast(self, text: str) -> Optional[datetime]:
+        """Try the learned format first, then every fast strategy."""
+        if self._learned_format is not None:
+            result = self._learned_format.parse(text)
+            if result is not None:
+                return result
+        
+        kind, result = self._try_strategies(text)
+        if self._learned is None and result is not None:
+            self._learn(kind)
+        return result
+    
+    def _try_strategies(self, text: str) -> Tuple[Optional[str], Optional[datetime]]:
+        """Try every fast strategy, returning the one that matched."""
+        if _EPOCH_PATTERN.match(text):
+            return "epoch", self._from_epoch(float(text))
+        
+        try:
+            return "isoformat", datetime.fromisoformat(text)
+        except ValueError:
+            pass
+        
+        for fmt in _KNOWN_FORMATS:
+            if fmt is self._learned_format:
+                continue
+            result = fmt.parse(text)
+            if result is not None:
+                return fmt.name, result
+        
+        return None, None
+    
+    def _learn(self, kind: str) -> None:
+        """Record a sample and lock in the dominant format after enough samples."""
+        self._samples[kind] = self._samples.get(kind, 0) + 1
+        self._sample_count += 1
+        if self._sample_count < self.LEARN_SAMPLES:
+            return
+        
+        self._learned = max(self._samples, key=self._samples.get)
+        self._learned_format = next(
+            (fmt for fmt in _KNOWN_FORMATS if fmt.name == self._learned), None
+        )
+    
+    def _remember(self, text: str, result: datetime) -> None:
+        """Memoize a second-resolution string, evicting the oldest when full."""
+        if len(self._cache) >= self.CACHE_SIZE:
+            del self._cache[next(iter(self._cache))]
+        self._cache[text] = result
+    
+    @staticmethod
+    def _from_epoch(value: float) -> datetime:
+        """Convert epoch seconds or milliseconds to a datetime."""
+        # If it's a large number, it's likely in milliseconds
+        if value > 1e12:
+            return datetime.fromtimestamp(value / 1000)
+        return datetime.fromtimestamp(value)
@@ -0,0 +1,169 @@
+"""
+Trace export formats for InfraMind.
+Converts Jaeger, Zipkin v2 and OTLP JSON spans into TraceSpan objects.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from backend.models import TraceSpan
+
+# OTLP status codes, as numbers or as enum names
+_OTLP_ERROR_CODES = (2, "2", "STATUS_CODE_ERROR")
+
+
+def is_jaeger_span(data: Dict[str, Any]) -> bool:
+    """Jaeger spans use traceID/spanID and point at their process."""
+    return "traceID" in data and "spanID" in data
+
+
+def is_zipkin_span(data: Dict[str, Any]) -> bool:
+    """Zipkin v2 spans use traceId/id with microsecond timestamps and endpoints."""
+    if "localEndpoint" in data or "remoteEndpoint" in data:
+        return True
+    return (
+        "traceId" in data and "id" in data and "spanId" not in data
+        and isinstance(data.get("timestamp"), int) and data["timestamp"] > 10 ** 14
+    )
+
+
+def is_otlp_span(data: Dict[str, Any]) -> bool:
+    """OTLP spans carry traceId/spanId and nanosecond start/end times."""
+    return "traceId" in data and "spanId" in data and "startTimeUnixNano" in data
+
+
+def jaeger_span(data: Dict[str, Any], processes: Dict[str, Any]) -> TraceSpan:
+    """
+    Convert a Jaeger span.
+    
+    Args:
+        data: Span from a Jaeger JSON export
+        processes: The trace's process table, keyed by processID
+    """
+    process = data.get("process") or processes.get(data.get("processID"), {})
+    tags = _key_value_tags(data.get("tags"))
+    
+    parent_span_id = data.get("parentSpanID")
+    for reference in data.get("references") or []:
+        if reference.get("refType", "CHILD_OF") == "CHILD_OF" and reference.get("spanID"):
+            parent_span_id = reference["spanID"]
+            break
+    
+    failed = tags.get("error") == "true" or tags.get("otel.status_code") == "ERROR"
+    return _span(
+        trace_id=data["traceID"],
+        span_id=data["spanID"],
+        parent_span_id=parent_span_id,
+        service=process.get("serviceName") or "unknown",
+        operation=data.get("operationName") or "unknown",
+        start_micros=int(data.get("startTime") or 0),
+        duration_micros=float(data.get("duration") or 0),
+        status="ERROR" if failed else "OK",
+        tags=tags,
+        error=(tags.get("error.message") or tags.get("otel.status_description")) if failed else None
+    )
+
+
+def jaeger_process_pending(data: Dict[str, Any], processes: Dict[str, Any]) -> bool:
+    """Whether a Jaeger span names a process that has not been read yet."""
+    return "process" not in data and bool(data.get("processID")) and data["processID"] not in processes
+
+
+def zipkin_span(data: Dict[str, Any]) -> TraceSpan:
+    """Convert a Zipkin v2 span."""
+    tags = {str(key): str(value) for key, value in (data.get("tags") or {}).items()}
+    endpoint = data.get("localEndpoint") or data.get("remoteEndpoint") or {}
+    failed = "error" in tags
+    return _span(
+        trace_id=data["traceId"],
+        span_id=data["id"],
+        parent_span_id=data.get("parentId"),
+        service=endpoint.get("serviceName") or "unknown",
+        operation=data.get("name") or "unknown",
+        start_micros=int(data.get("timestamp") or 0),
+        duration_micros=float(data.get("duration") or 0),
+        status="ERROR" if failed else "OK",
+        tags=tags,
+        error=(tags["error"] or None) if failed else None
+    )
+
+
+def otlp_service(resource: Optional[Dict[str, Any]]) -> str:
+    """Read service.name from an OTLP resource."""
+    attributes = _otlp_attributes((resource or {}).get("attributes"))
+    return attributes.get("service.name") or "unknown"
+
+
+def otlp_span(data: Dict[str, Any], service: str) -> TraceSpan:
+    """
+    Convert an OTLP JSON span.
+    
+    Args:
+        data: Span from a scopeSpans entry
+        service: service.name of the enclosing resource
+    """
+    start_nanos = int(data.get("startTimeUnixNano") or 0)
+    end_nanos = int(data.get("endTimeUnixNano") or start_nanos)
+    status = data.get("status") or {}
+    failed = status.get("code") in _OTLP_ERROR_CODES
+    return _span(
+        trace_id=data["traceId"],
+        span_id=data["spanId"],
+        parent_span_id=data.get("parentSpanId"),
+        service=service,
+        operation=data.get("name") or "unknown",
+        start_micros=start_nanos // 1000,
+        duration_micros=(end_nanos - start_nanos) / 1000,
+        status="ERROR" if failed else "OK",
+        tags=_otlp_attributes(data.get("attributes")),
+        error=(status.get("message") or None) if failed else None
+    )
+
+
+def _span(
+    trace_id: Any,
+    span_id: Any,
+    parent_span_id: Any,
+    service: str,
+    operation: str,
+    start_micros: int,
+    duration_micros: float,
+    status: str,
+    tags: Dict[str, str],
+    error: Optional[str]
+) -> TraceSpan:
+    # Epoch timestamps become naive local datetimes, as in TimestampParser
+    start_time = datetime.fromtimestamp(start_micros // 1_000_000) + timedelta(microseconds=start_micros % 1_000_000)
+    return TraceSpan(
+        trace_id=str(trace_id),
+        span_id=str(span_id),
+        parent_span_id=str(parent_span_id) if parent_span_id else None,
+        service=service,
+        operation=operation,
+        start_time=start_time,
+        end_time=start_time + timedelta(microseconds=duration_micros),
+        duration_ms=duration_micros / 1000,
+        status=status,
+        tags=tags,
+        error=error
+    )
+
+
+def _key_value_tags(tags: Optional[List[Dict[str, Any]]]) -> Dict[str, str]:
+    """Flatten Jaeger [{key, type, value}] tags."""
+    return {str(tag.get("key")): _tag_string(tag.get("value")) for tag in tags or [] if "key" in tag}
+
+
+def _otlp_attributes(attributes: Optional[List[Dict[str, Any]]]) -> Dict[str, str]:
+    """Flatten OTLP [{key, value: {stringValue | intValue | ...}}] attributes."""
+    flattened = {}
+    for attribute in attributes or []:
+        value = attribute.get("value") or {}
+        # AnyValue holds exactly one typed field
+        flattened[str(attribute.get("key"))] = _tag_string(next(iter(value.values()), ""))
+    return flattened
+
+
+def _tag_string(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
@@ -0,0 +1,155 @@
+"""
+Trace index for InfraMind.
+Groups spans by trace and links parents to children once, for every trace analysis to share.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from backend.models import TraceSpan
+
+
+class TraceIndex:
+    """
+    Span relationships for a set of traces, built in one pass.
+    
+    Holds spans grouped by trace, a per-trace span-id lookup, a per-trace
+    children adjacency list and the root spans. Span IDs are only unique
+    within a trace, so lookups are keyed by trace ID first. A root is a span
+    with no parent or whose parent is missing from the input. When a trace
+    repeats a span ID, the last span with that ID wins the lookup, as in a
+    plain dict.
+    
+    Parent links that form a cycle are cut where the cycle is found, and the
+    span there becomes a root, so every trace is a forest and walk() visits
+    each span exactly once.
+    """
+    
+    def __init__(self, spans: Iterable[TraceSpan]):
+        """
+        Build the index.
+        
+        Args:
+            spans: Spans from any number of traces
+        """
+        self.spans_by_trace: Dict[str, List[TraceSpan]] = {}
+        self.span_lookup: Dict[str, Dict[str, TraceSpan]] = {}
+        self.children: Dict[str, Dict[str, List[TraceSpan]]] = {}
+        self.roots_by_trace: Dict[str, List[TraceSpan]] = {}
+        # ids of spans whose parent link was cut to break a cycle
+        self._cut: Set[int] = set()
+        
+        for span in spans:
+            trace_spans = self.spans_by_trace.get(span.trace_id)
+            if trace_spans is None:
+                trace_spans = self.spans_by_trace[span.trace_id] = []
+                self.span_lookup[span.trace_id] = {}
+            trace_spans.append(span)
+            self.span_lookup[span.trace_id][span.span_id] = span
+        
+        # Parents can appear after their children, so link once every span is known
+        for trace_id, trace_spans in self.spans_by_trace.items():
+            span_map = self.span_lookup[trace_id]
+            trace_children: Dict[str, List[TraceSpan]] = {}
+            roots = []
+            for span in trace_spans:
+                parent_id = span.parent_span_id
+                if parent_id and parent_id in span_map:
+                    if parent_id in trace_children:
+                        trace_children[parent_id].append(span)
+                    else:
+                        trace_children[parent_id] = [span]
+                else:
+                    roots.append(span)
+            self.children[trace_id] = trace_children
+            self.roots_by_trace[trace_id] = roots
+            self._break_cycles(trace_id)
+    
+    def __len__(self) -> int:
+        return sum(len(trace_spans) for trace_spans in self.spans_by_trace.values())
+    
+    def __iter__(self) -> Iterator[TraceSpan]:
+        for trace_spans in self.spans_by_trace.values():
+            yield from trace_spans
+    
+    @property
+    def roots(self) -> List[TraceSpan]:
+        """Root spans of every trace."""
+        return [root for roots in self.roots_by_trace.values() for root in roots]
+    
+    def get(self, trace_id: str, span_id: str) -> Optional[TraceSpan]:
+        """Look up a span by trace and span ID."""
+        return self.span_lookup.get(trace_id, {}).get(span_id)
+    
+    def parent(self, span: TraceSpan) -> Optional[TraceSpan]:
+        """Return a span's parent, or None for roots, orphans and cut cycle links."""
+        if not span.parent_span_id or id(span) in self._cut:
+            return None
+        return self.span_lookup.get(span.trace_id, {}).get(span.parent_span_id)
+    
+    def children_of(self, span: TraceSpan) -> List[TraceSpan]:
+        """Return the spans whose parent is this span."""
+        if self.get(span.trace_id, span.span_id) is not span:
+            return []
+        return self.children.get(span.trace_id, {}).get(span.span_id, [])
+    
+    def walk(self, trace_id: str) -> Iterator[Tuple[TraceSpan, Optional[TraceSpan]]]:
+        """
+        Visit a trace depth-first, parents before children.
+        
+        Yields:
+            (span, parent) pairs; parent is None for roots
+        """
+        yield from self._walk_from(trace_id, self.roots_by_trace.get(trace_id, []))
+    
+    def _walk_from(
+        self,
+        trace_id: str,
+        roots: List[TraceSpan]
+    ) -> Iterator[Tuple[TraceSpan, Optional[TraceSpan]]]:
+        span_map = self.span_lookup[trace_id]
+        trace_children = self.children[trace_id]
+        stack: List[Tuple[TraceSpan, Optional[TraceSpan]]] = [(root, None) for root in reversed(roots)]
+        while stack:
+            span, parent = stack.pop()
+            yield span, parent
+            # Only the span that won the lookup owns the children of a repeated ID
+            if span_map[span.span_id] is span:
+                children = trace_children.get(span.span_id)
+                if children:
+                    stack.extend((child, span) for child in reversed(children))
+    
+    def _break_cycles(self, trace_id: str) -> None:
+        """Turn spans unreachable from the roots (i.e. on or under a cycle) into a forest."""
+        trace_spans = self.spans_by_trace[trace_id]
+        span_map = self.span_lookup[trace_id]
+        trace_children = self.children[trace_id]
+        
+        # Most traces have no cycle: count what the roots reach before doing more
+        stack = list(self.roots_by_trace[trace_id])
+        reached_count = 0
+        while stack:
+            span = stack.pop()
+            reached_count += 1
+            if span_map[span.span_id] is span:
+                stack.extend(trace_children.get(span.span_id, ()))
+        if reached_count == len(trace_spans):
+            return
+        
+        reached = {id(span) for span, _ in self.walk(trace_id)}
+        for span in trace_spans:
+            if id(span) in reached:
+                continue
+            
+            # Climb until a span repeats: that span is on the cycle
+            on_path = set()
+            current = span
+            while id(current) not in on_path and id(current) not in reached:
+                on_path.add(id(current))
+                current = span_map[current.parent_span_id]
+            if id(current) in reached:
+                current = span
+            
+            siblings = trace_children[current.parent_span_id]
+            siblings[:] = [sibling for sibling in siblings if sibling is not current]
+            self._cut.add(id(current))
+            self.roots_by_trace[trace_id].append(current)
+            reached.update(id(visited) for visited, _ in self._walk_from(trace_id, [current]))
@@ -2,21 +2,58 @@
 Trace parser for InfraMind.
 Parses distributed trace spans and builds service dependency graphs.
 """
-import json
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Set
-from dateutil import parser as date_parser
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple, Union
 import logging
 
-from backend.models import TraceSpan
+from backend.models import (
+    CriticalPathSegment,
+    ErrorPropagationNode,
+    OperationLatency,
+    ServiceEdgeStats,
+    TraceCriticalPath,
+    TraceSpan,
+)
+from backend.models.log_batch import to_epoch_micros
 from backend.core.exceptions import ParsingError
+from backend.ingestion.json_stream import JSONStream
+from backend.ingestion.timestamp_parser import TimestampParser
+from backend.ingestion.trace_formats import (
+    is_jaeger_span,
+    is_otlp_span,
+    is_zipkin_span,
+    jaeger_process_pending,
+    jaeger_span,
+    otlp_service,
+    otlp_span,
+    zipkin_span,
+)
+from backend.ingestion.trace_index import TraceIndex
+from backend.utils.tdigest import TDigest
 
 logger = logging.getLogger(__name__)
 
 
+# Keys whose array holds the spans, at the top level and inside a trace object
+TOP_LEVEL_SPAN_KEYS = ("spans", "traces", "data")
+NESTED_SPAN_KEYS = ("spans",)
+
+# OTLP calls the per-scope span lists scopeSpans (instrumentationLibrarySpans before 0.15)
+OTLP_SCOPE_KEYS = ("scopeSpans", "instrumentationLibrarySpans")
+
+# Thresholds for flagging a service-to-service edge as anomalous
+EDGE_ERROR_RATE_THRESHOLD = 0.05
+EDGE_SLOW_P95_MS = 1000.0
+EDGE_TAIL_RATIO = 10.0  # p99 this many times p50
+EDGE_TAIL_MIN_CALLS = 20  # Fewer calls make p99 meaningless
+
+
 class TraceParser:
     """Parse distributed traces and analyze service dependencies."""
     
+    def __init__(self):
+        self.timestamp_parser = TimestampParser()
+    
     def parse_file(self, file_content: str) -> List[TraceSpan]:
         """
         Parse trace file into TraceSpan objects.
@@ -27,41 +64,227 @@ class TraceParser:
         Returns:
             List of TraceSpan objects
         """
-        try:
-            data = json.loads(file_content)
+        return list(self.parse_stream((file_content,)))
+    
+    def parse_stream(self, chunks: Iterable[str]) -> Iterator[TraceSpan]:
+        """
+        Parse a trace file incrementally, yielding spans as they are read.
+        
+        Accepts a list of spans, an object holding one under spans/traces/data,
+        Jaeger exports (data[].spans with a processes table), OTLP JSON
+        (resourceSpans[].scopeSpans[].spans) and Zipkin v2 span lists. Only the
+        span being read is held as raw JSON. Spans whose Jaeger process table
+        or OTLP resource comes later in their block are converted right away
+        and held back only until their service name is known.
+        
+        Args:
+            chunks: JSON text in pieces, e.g. read from a spooled upload
             
-            if isinstance(data, list):
-                return self._parse_span_list(data)
-            elif isinstance(data, dict):
-                # Support various structures
-                spans = data.get('spans') or data.get('traces') or data.get('data')
-                if isinstance(spans, list):
-                    return self._parse_span_list(spans)
-                else:
-                    return self._parse_span_list([data])
+        Yields:
+            TraceSpan objects in file order
+        
+        Raises:
+            ParsingError: If the JSON is invalid or not a trace format
+        """
+        # Learn timestamp formats per file
+        self.timestamp_parser = TimestampParser()
+        stream = JSONStream(chunks)
+        pending: List[Tuple[TraceSpan, str]] = []
+        
+        try:
+            first = stream.peek()
+            if first == '[':
+                yield from self._stream_array(stream, {}, pending)
+            elif first == '{':
+                yield from self._stream_object(stream, {}, pending, TOP_LEVEL_SPAN_KEYS)
             else:
-                raise ParsingError("Unsupported trace format")
-                
-        except json.JSONDecodeError as e:
-            raise ParsingError(f"Invalid JSON in trace file: {str(e)}")
+                # Surfaces invalid JSON as such before rejecting a bare scalar
+                stream.read_value()
+            stream.expect_end()
+            yield from self._resolve_pending(pending, {})
+        except ParsingError as e:
+            raise ParsingError(f"Invalid JSON in trace file: {e.message}", details=e.details)
         except Exception as e:
             logger.error(f"Error parsing traces: {str(e)}")
             raise ParsingError(f"Failed to parse traces: {str(e)}")
+        
+        if first not in ('[', '{'):
+            raise ParsingError("Failed to parse traces: Unsupported trace format")
+        self.timestamp_parser.log_stats("traces")
     
-    def _parse_span_list(self, spans: List[Dict[str, Any]]) -> List[TraceSpan]:
-        """Parse list of span dictionaries."""
-        parsed_spans = []
-        
-        for span_data in spans:
-            try:
-                span = self._parse_single_span(span_data)
-                if span:
-                    parsed_spans.append(span)
-            except Exception as e:
-                logger.warning(f"Failed to parse span: {e}")
+    def _stream_array(
+        self,
+        stream: JSONStream,
+        processes: Dict[str, Any],
+        pending: List[Tuple[TraceSpan, str]]
+    ) -> Iterator[TraceSpan]:
+        """Parse an array of spans, span containers or nested span arrays."""
+        for _ in stream.iter_array():
+            char = stream.peek()
+            if char == '[':
+                yield from self._stream_array(stream, processes, pending)
+            elif char == '{':
+                # Small elements are read whole; large ones (whole traces) are walked key by key
+                complete, data = stream.read_buffered()
+                if complete:
+                    yield from self._spans_from_object(data, processes, pending)
+                else:
+                    yield from self._stream_object(stream, processes, pending, NESTED_SPAN_KEYS)
+            else:
+                stream.skip_value()
+    
+    def _stream_object(
+        self,
+        stream: JSONStream,
+        processes: Dict[str, Any],
+        pending: List[Tuple[TraceSpan, str]],
+        span_keys: Tuple[str, ...]
+    ) -> Iterator[TraceSpan]:
+        """Parse an object that holds a span array, or that is a single span."""
+        local_processes = dict(processes)
+        local_pending: List[Tuple[TraceSpan, str]] = []
+        fields: Dict[str, Any] = {}
+        found = False
+        
+        for key in stream.iter_object():
+            char = stream.peek()
+            if key == "resourceSpans" and char == '[' and not found:
+                found = True
+                yield from self._stream_otlp(stream)
+            elif key in span_keys and char == '[' and not found:
+                found = True
+                yield from self._stream_array(stream, local_processes, local_pending)
+            elif key == "processes" and char == '{':
+                local_processes.update(stream.read_value())
+            elif found:
+                stream.skip_value()
+            else:
+                fields[key] = stream.read_value()
+        
+        yield from self._resolve_pending(local_pending, local_processes)
+        if not found:
+            yield from self._spans_from_object(fields, processes, pending)
+    
+    def _stream_otlp(self, stream: JSONStream) -> Iterator[TraceSpan]:
+        """Parse OTLP resourceSpans, streaming the spans of large resource blocks."""
+        for _ in stream.iter_array():
+            complete, resource_spans = stream.read_buffered()
+            if complete:
+                yield from self._otlp_resources([resource_spans])
                 continue
+            if stream.peek() != '{':
+                stream.skip_value()
+                continue
+            
+            # Spans seen before their resource wait for the service name
+            service = None
+            waiting = []
+            for key in stream.iter_object():
+                if key == "resource":
+                    service = otlp_service(stream.read_value())
+                elif key in OTLP_SCOPE_KEYS and stream.peek() == '[':
+                    for _ in stream.iter_array():
+                        if stream.peek() != '{':
+                            stream.skip_value()
+                            continue
+                        for scope_key in stream.iter_object():
+                            if scope_key != "spans" or stream.peek() != '[':
+                                stream.skip_value()
+                                continue
+                            for _ in stream.iter_array():
+                                span = self._convert_otlp(stream.read_value(), service or "unknown")
+                                if span is None:
+                                    continue
+                                if service is None:
+                                    waiting.append(span)
+                                else:
+                                    yield span
+                else:
+                    stream.skip_value()
+            
+            for span in waiting:
+                span.service = service or "unknown"
+                yield span
+    
+    def _otlp_resources(self, resources: List[Any]) -> Iterator[TraceSpan]:
+        """Parse OTLP resourceSpans already in memory."""
+        for resource_spans in resources:
+            if not isinstance(resource_spans, dict):
+                continue
+            service = otlp_service(resource_spans.get("resource"))
+            for key in OTLP_SCOPE_KEYS:
+                for scope in resource_spans.get(key) or []:
+                    for data in scope.get("spans") or []:
+                        span = self._convert_otlp(data, service)
+                        if span:
+                            yield span
+    
+    def _spans_from_object(
+        self,
+        data: Any,
+        processes: Dict[str, Any],
+        pending: List[Tuple[TraceSpan, str]]
+    ) -> Iterator[TraceSpan]:
+        """Parse an object already in memory: a span container or a single span."""
+        if not isinstance(data, dict):
+            logger.warning(f"Skipping non-object span entry: {str(data)[:100]}")
+            return
         
-        return parsed_spans
+        if isinstance(data.get("resourceSpans"), list):
+            yield from self._otlp_resources(data["resourceSpans"])
+        elif isinstance(data.get("spans"), list):
+            # A trace (e.g. Jaeger) with its own process table
+            local_processes = {**processes, **(data.get("processes") or {})}
+            local_pending: List[Tuple[TraceSpan, str]] = []
+            for span_data in data["spans"]:
+                yield from self._spans_from_object(span_data, local_processes, local_pending)
+            yield from self._resolve_pending(local_pending, local_processes)
+        else:
+            span = self._convert_span(data, processes, pending)
+            if span:
+                yield span
+    
+    def _convert_span(
+        self,
+        data: Dict[str, Any],
+        processes: Dict[str, Any],
+        pending: List[Tuple[TraceSpan, str]]
+    ) -> Optional[TraceSpan]:
+        """Convert one span in whichever format it uses; Jaeger spans may wait for their process."""
+        try:
+            if is_jaeger_span(data):
+                span = jaeger_span(data, processes)
+                if jaeger_process_pending(data, processes):
+                    # Named once the trace's process table has been read
+                    pending.append((span, data["processID"]))
+                    return None
+                return span
+            if is_zipkin_span(data):
+                return zipkin_span(data)
+            if is_otlp_span(data):
+                return otlp_span(data, otlp_service(data.get("resource")))
+        except Exception as e:
+            logger.warning(f"Failed to parse span: {e}")
+            return None
+        return self._parse_single_span(data)
+    
+    def _convert_otlp(self, data: Any, service: str) -> Optional[TraceSpan]:
+        try:
+            return otlp_span(data, service)
+        except Exception as e:
+            logger.warning(f"Failed to parse span: {e}")
+            return None
+    
+    def _resolve_pending(
+        self,
+        pending: List[Tuple[TraceSpan, str]],
+        processes: Dict[str, Any]
+    ) -> Iterator[TraceSpan]:
+        """Fill in the service of Jaeger spans that were read before their process table."""
+        for span, process_id in pending:
+            span.service = (processes.get(process_id) or {}).get("serviceName") or "unknown"
+            yield span
+        pending.clear()
     
     def _parse_single_span(self, span_data: Dict[str, Any]) -> Optional[TraceSpan]:
         """Parse a single span dictionary."""
@@ -167,49 +390,41 @@ class TraceParser:
             return datetime.now()
         
         try:
-            # Handle Unix timestamps (in seconds or milliseconds)
-            if isinstance(timestamp_str, (int, float)):
-                # If it's a large number, it's likely in milliseconds
-                if timestamp_str > 1e12:
-                    return datetime.fromtimestamp(timestamp_str / 1000)
-                else:
-                    return datetime.fromtimestamp(timestamp_str)
-            
-            # Handle string timestamps
-            return date_parser.parse(str(timestamp_str))
+            # Handles Unix timestamps (in seconds or milliseconds) and strings
+            return self.timestamp_parser.parse(timestamp_str)
         except Exception as e:
             logger.warning(f"Failed to parse timestamp '{timestamp_str}': {e}")
             return datetime.now()
     
-    def build_dependency_graph(self, spans: List[TraceSpan]) -> Dict[str, Set[str]]:
+    def build_index(self, spans: List[TraceSpan]) -> TraceIndex:
+        """
+        Index spans by trace, span ID and parent once for all trace analyses.
+        
+        Returns:
+            TraceIndex over the spans
+        """
+        return TraceIndex(spans)
+    
+    def build_dependency_graph(self, spans: Union[TraceIndex, List[TraceSpan]]) -> Dict[str, Set[str]]:
         """
         Build service dependency graph from spans.
         
+        Args:
+            spans: TraceIndex, or a list of spans to index first
+        
         Returns:
             Dictionary mapping service names to set of services they depend on
         """
+        index = spans if isinstance(spans, TraceIndex) else self.build_index(spans)
         dependencies = {}
         
-        # Group spans by trace
-        traces = {}
-        for span in spans:
-            if span.trace_id not in traces:
-                traces[span.trace_id] = []
-            traces[span.trace_id].append(span)
-        
-        # Analyze each trace
-        for trace_id, trace_spans in traces.items():
-            # Build span relationships
-            span_map = {span.span_id: span for span in trace_spans}
-            
-            for span in trace_spans:
-                if span.parent_span_id and span.parent_span_id in span_map:
-                    parent_span = span_map[span.parent_span_id]
-                    
-                    # Parent service depends on current service
-                    parent_service = parent_span.service
+        for trace_id, trace_children in index.children.items():
+            span_map = index.span_lookup[trace_id]
+            for parent_span_id, children in trace_children.items():
+                # Parent service depends on each child's service
+                parent_service = span_map[parent_span_id].service
+                for span in children:
                     current_service = span.service
-                    
                     if parent_service != current_service:
                         if parent_service not in dependencies:
                             dependencies[parent_service] = set()
@@ -217,46 +432,373 @@ class TraceParser:
         
         return dependencies
     
-    def find_error_chains(self, spans: List[TraceSpan]) -> List[List[TraceSpan]]:
+    def build_edge_stats(self, spans: Union[TraceIndex, List[TraceSpan]]) -> List[ServiceEdgeStats]:
+        """
+        Aggregate rate, errors and duration for every service-to-service edge.
+        
+        One pass over the parent-child links; each call is the child span, so
+        its status and duration describe the callee as seen by the caller.
+        Latency percentiles come from a t-digest per edge, so memory stays
+        bounded however many calls an edge carries.
+        
+        Args:
+            spans: TraceIndex, or a list of spans to index first
+        
+        Returns:
+            Edge statistics, busiest edges first
+        """
+        index = spans if isinstance(spans, TraceIndex) else self.build_index(spans)
+        # (caller, callee) -> [calls, errors, latency digest]
+        edges: Dict[tuple, list] = {}
+        
+        for trace_id, trace_children in index.children.items():
+            span_map = index.span_lookup[trace_id]
+            for parent_span_id, children in trace_children.items():
+                parent_service = span_map[parent_span_id].service
+                for span in children:
+                    if span.service == parent_service:
+                        continue
+                    edge = edges.get((parent_service, span.service))
+                    if edge is None:
+                        edge = edges[(parent_service, span.service)] = [0, 0, TDigest()]
+                    edge[0] += 1
+                    if span.status != 'OK':
+                        edge[1] += 1
+                    edge[2].add(span.duration_ms)
+        
+        stats = []
+        for (caller, callee), (calls, errors, digest) in edges.items():
+            p50, p95, p99 = digest.percentiles((0.5, 0.95, 0.99))
+            edge_stats = ServiceEdgeStats(
+                caller=caller,
+                callee=callee,
+                call_count=calls,
+                error_count=errors,
+                error_rate=errors / calls,
+                p50_ms=round(p50, 3),
+                p95_ms=round(p95, 3),
+                p99_ms=round(p99, 3)
+            )
+            edge_stats.anomaly_reason = self._edge_anomaly(edge_stats)
+            edge_stats.anomaly_detected = edge_stats.anomaly_reason is not None
+            stats.append(edge_stats)
+        
+        stats.sort(key=lambda edge: (-edge.call_count, edge.caller, edge.callee))
+        return stats
+    
+    def _edge_anomaly(self, edge: ServiceEdgeStats) -> Optional[str]:
+        """Explain why an edge looks unhealthy, or return None if it does not."""
+        reasons = []
+        if edge.error_count and edge.error_rate >= EDGE_ERROR_RATE_THRESHOLD:
+            reasons.append(f"error rate {edge.error_rate:.1%}")
+        if edge.p95_ms >= EDGE_SLOW_P95_MS:
+            reasons.append(f"p95 {edge.p95_ms:g}ms")
+        if (
+            edge.call_count >= EDGE_TAIL_MIN_CALLS
+            and edge.p50_ms > 0
+            and edge.p99_ms >= EDGE_TAIL_RATIO * edge.p50_ms
+        ):
+            reasons.append(f"p99 {edge.p99_ms / edge.p50_ms:.0f}x p50")
+        return ", ".join(reasons) or None
+    
+    def compute_self_times(self, spans: Union[TraceIndex, List[TraceSpan]]) -> Dict[int, float]:
+        """
+        Compute each span's self-time: its duration minus the time covered by its children.
+        
+        Overlapping children are counted once, and children running past
+        their parent are clipped to it. Sorting each span's children by start
+        makes this O(n log n) per trace.
+        
+        Args:
+            spans: TraceIndex, or a list of spans to index first
+        
+        Returns:
+            Self-time in milliseconds keyed by id(span)
+        """
+        index = spans if isinstance(spans, TraceIndex) else self.build_index(spans)
+        self_times = {}
+        for trace_id in index.spans_by_trace:
+            bounds = self._span_bounds(index.spans_by_trace[trace_id])
+            for span in index.spans_by_trace[trace_id]:
+                self_times[id(span)] = self._self_time(span, index.children_of(span), bounds)
+        return self_times
+    
+    def find_critical_path(self, index: TraceIndex, trace_id: str) -> Optional[TraceCriticalPath]:
+        """
+        Find the critical path of one trace.
+        
+        Starting from the end of the root span, repeatedly step into the child
+        that finished last before the current point in time; time where no
+        child was running is the span's own work. The segments add up to the
+        root's duration. Each child is looked at once after sorting by end
+        time, so this is O(n log n).
+        
+        Args:
+            index: TraceIndex containing the trace
+            trace_id: Trace to analyze
+        
+        Returns:
+            Critical path from the longest root span, or None for an unknown trace
+        """
+        roots = index.roots_by_trace.get(trace_id)
+        if not roots:
+            return None
+        bounds = self._span_bounds(index.spans_by_trace[trace_id])
+        root = max(roots, key=lambda span: span.duration_ms)
+        
+        # Walk backwards from the root's end; frames are [span, children latest-end first, next child, cursor, start]
+        pieces: List[Tuple[TraceSpan, float]] = []
+        root_start, root_end = bounds[id(root)]
+        stack = [[root, self._by_end_desc(index.children_of(root), bounds), 0, root_end, root_start]]
+        while stack:
+            frame = stack[-1]
+            span, children, position, cursor, start = frame
+            child_frame = None
+            while position < len(children):
+                child = children[position]
+                position += 1
+                child_start, child_end = bounds[id(child)]
+                child_start = max(child_start, start)
+                child_end = min(child_end, cursor)
+                if child_end <= child_start:
+                    continue  # Starts after the cursor or lies outside the parent
+                if cursor > child_end:
+                    pieces.append((span, cursor - child_end))
+                frame[2], frame[3] = position, child_start
+                child_frame = [
+                    child, self._by_end_desc(index.children_of(child), bounds), 0, child_end, child_start
+                ]
+                break
+            if child_frame is not None:
+                stack.append(child_frame)
+                continue
+            if cursor > start:
+                pieces.append((span, cursor - start))
+            stack.pop()
+        
+        # Pieces were found end first; merge neighbours that belong to the same span
+        segments: List[CriticalPathSegment] = []
+        last_span = None
+        for span, duration in reversed(pieces):
+            if span is last_span:
+                segments[-1].duration_ms += duration
+                continue
+            segments.append(CriticalPathSegment(
+                span_id=span.span_id,
+                service=span.service,
+                operation=span.operation,
+                duration_ms=duration
+            ))
+            last_span = span
+        for segment in segments:
+            segment.duration_ms = round(segment.duration_ms, 3)
+        
+        return TraceCriticalPath(
+            trace_id=trace_id,
+            duration_ms=round(root_end - root_start, 3),
+            segments=segments
+        )
+    
+    def analyze_latency(
+        self,
+        spans: Union[TraceIndex, List[TraceSpan]],
+        max_traces: int = 20
+    ) -> Tuple[List[OperationLatency], List[TraceCriticalPath]]:
+        """
+        Attribute trace latency to (service, operation) pairs.
+        
+        Args:
+            spans: TraceIndex, or a list of spans to index first
+            max_traces: How many of the slowest traces' critical paths to return
+        
+        Returns:
+            Tuple of (operations by critical-path time, critical paths of the slowest traces)
+        """
+        index = spans if isinstance(spans, TraceIndex) else self.build_index(spans)
+        self_times = self.compute_self_times(index)
+        # (service, operation) -> [spans, total, self time, critical-path time]
+        totals: Dict[tuple, list] = {}
+        critical_paths = []
+        
+        for span in index:
+            entry = totals.get((span.service, span.operation))
+            if entry is None:
+                entry = totals[(span.service, span.operation)] = [0, 0.0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += span.duration_ms
+            entry[2] += self_times[id(span)]
+        
+        for trace_id in index.spans_by_trace:
+            path = self.find_critical_path(index, trace_id)
+            if path is None:
+                continue
+            for segment in path.segments:
+                totals[(segment.service, segment.operation)][3] += segment.duration_ms
+            critical_paths.append(path)
+        
+        operations = [
+            OperationLatency(
+                service=service,
+                operation=operation,
+                span_count=count,
+                total_ms=round(total, 3),
+                self_time_ms=round(self_time, 3),
+                critical_path_ms=round(critical, 3)
+            )
+            for (service, operation), (count, total, self_time, critical) in totals.items()
+        ]
+        operations.sort(key=lambda op: (-op.critical_path_ms, -op.self_time_ms, op.service, op.operation))
+        critical_paths.sort(key=lambda path: path.duration_ms, reverse=True)
+        return operations, critical_paths[:max_traces]
+    
+    @staticmethod
+    def _span_bounds(spans: List[TraceSpan]) -> Dict[int, Tuple[float, float]]:
+        """Start and end of each span in epoch milliseconds, keyed by id(span)."""
+        bounds = {}
+        for span in spans:
+            start = to_epoch_micros(span.start_time) / 1000
+            bounds[id(span)] = (start, start + span.duration_ms)
+        return bounds
+    
+    @staticmethod
+    def _by_end_desc(children: List[TraceSpan], bounds: Dict[int, Tuple[float, float]]) -> List[TraceSpan]:
+        return sorted(children, key=lambda child: bounds[id(child)][1], reverse=True)
+    
+    @staticmethod
+    def _self_time(
+        span: TraceSpan,
+        children: List[TraceSpan],
+        bounds: Dict[int, Tuple[float, float]]
+    ) -> float:
+        """Span duration minus the union of its children's intervals, clipped to the span."""
+        start, end = bounds[id(span)]
+        covered = 0.0
+        run_start = run_end = None
+        for child_start, child_end in sorted(bounds[id(child)] for child in children):
+            child_start, child_end = max(child_start, start), min(child_end, end)
+            if child_end <= child_start:
+                continue
+            if run_end is not None and child_start <= run_end:
+                run_end = max(run_end, child_end)
+                continue
+            if run_end is not None:
+                covered += run_end - run_start
+            run_start, run_end = child_start, child_end
+        if run_end is not None:
+            covered += run_end - run_start
+        return max(span.duration_ms - covered, 0.0)
+    
+    def find_error_chains(self, spans: Union[TraceIndex, List[TraceSpan]]) -> List[List[TraceSpan]]:
         """
         Find chains of errors across spans (cascading failures).
         
+        Root-to-span paths are memoized per trace, so chains that share
+        ancestors share the work and the pass is linear in the number of spans
+        (plus the length of the chains returned). Cycles in parent links are
+        cut by the index, and spans with missing parents start their own chain.
+        
+        Args:
+            spans: TraceIndex, or a list of spans to index first
+        
         Returns:
-            List of span chains that led to errors
+            List of span chains (root first) that led to errors
         """
+        index = spans if isinstance(spans, TraceIndex) else self.build_index(spans)
         error_chains = []
         
-        # Group spans by trace
-        traces = {}
-        for span in spans:
-            if span.trace_id not in traces:
-                traces[span.trace_id] = []
-            traces[span.trace_id].append(span)
-        
-        # Analyze each trace
-        for trace_id, trace_spans in traces.items():
-            # Find error spans
-            error_spans = [s for s in trace_spans if s.status == 'ERROR']
+        for trace_id, trace_spans in index.spans_by_trace.items():
+            paths = self._error_paths(index, trace_id)
             
-            if error_spans:
-                # Build span map for chain building
-                span_map = {span.span_id: span for span in trace_spans}
+            for error_span in trace_spans:
+                if error_span.status != 'ERROR':
+                    continue
                 
-                for error_span in error_spans:
-                    # Trace back to root
-                    chain = [error_span]
-                    current = error_span
-                    
-                    while current.parent_span_id and current.parent_span_id in span_map:
-                        parent = span_map[current.parent_span_id]
-                        chain.insert(0, parent)  # Add to beginning
-                        current = parent
-                    
-                    if len(chain) > 1:  # Only include if there's a chain
-                        error_chains.append(chain)
+                path = paths[id(error_span)]
+                if path[1] is None:  # Only include if there's a chain
+                    continue
+                
+                chain = []
+                while path is not None:
+                    chain.append(path[0])
+                    path = path[1]
+                chain.reverse()
+                error_chains.append(chain)
         
         return error_chains
     
+    def build_error_propagation(
+        self,
+        spans: Union[TraceIndex, List[TraceSpan]]
+    ) -> List[ErrorPropagationNode]:
+        """
+        Collapse error chains into trees of failure propagation.
+        
+        Each tree keeps only the spans that are an ERROR span or an ancestor of
+        one, so chains with a common prefix are merged rather than repeated.
+        Runs in time linear in the number of spans.
+        
+        Args:
+            spans: TraceIndex, or a list of spans to index first
+        
+        Returns:
+            One tree per root span that has erroring descendants
+        """
+        index = spans if isinstance(spans, TraceIndex) else self.build_index(spans)
+        trees = []
+        
+        for trace_id in index.spans_by_trace:
+            paths = self._error_paths(index, trace_id)
+            
+            # Paths are stored parents first, so a parent's node always exists already
+            nodes: Dict[int, ErrorPropagationNode] = {}
+            links = []
+            for span, parent_path in paths.values():
+                node = ErrorPropagationNode.model_construct(
+                    span=span,
+                    error_count=1 if span.status == 'ERROR' else 0,
+                    children=[]
+                )
+                nodes[id(span)] = node
+                links.append((node, nodes[id(parent_path[0])] if parent_path else None))
+            
+            # Children before parents, so counts are complete when passed up
+            for node, parent_node in reversed(links):
+                if parent_node is not None:
+                    parent_node.error_count += node.error_count
+            for node, parent_node in links:
+                if parent_node is not None:
+                    parent_node.children.append(node)
+            # A lone erroring root is not a propagation
+            trees.extend(node for node, parent_node in links if parent_node is None and node.children)
+        
+        return trees
+    
+    def _error_paths(self, index: TraceIndex, trace_id: str) -> Dict[int, tuple]:
+        """
+        Build the root-to-span path of every ERROR span in a trace and its ancestors.
+        
+        A path is a (span, parent_path) pair, with parent_path None at the root,
+        keyed by id(span). Each span's path is built once and reused by all of
+        its descendants; the dict is filled in ancestors-first order.
+        """
+        paths: Dict[int, tuple] = {}
+        for span in index.spans_by_trace[trace_id]:
+            if span.status != 'ERROR' or id(span) in paths:
+                continue
+            
+            # Climb to the nearest ancestor whose path is already known
+            pending = []
+            current = span
+            while current is not None and id(current) not in paths:
+                pending.append(current)
+                current = index.parent(current)
+            
+            path = paths[id(current)] if current is not None else None
+            for ancestor in reversed(pending):
+                path = paths[id(ancestor)] = (ancestor, path)
+        
+        return paths
+    
     def filter_by_service(self, spans: List[TraceSpan], services: List[str]) -> List[TraceSpan]:
         """Filter spans by service names."""
         return [span for span in spans if span.service in services]
@@ -265,6 +807,22 @@ class TraceParser:
         """Filter spans by status."""
         return [span for span in spans if span.status in statuses]
     
-    def get_slow_spans(self, spans: List[TraceSpan], threshold_ms: float = 1000) -> List[TraceSpan]:
-        """Get spans that are slower than threshold."""
-        return [span for span in spans if span.duration_ms > threshold_ms]
+    def get_slow_spans(
+        self,
+        spans: List[TraceSpan],
+        threshold_ms: float = 1000,
+        by_self_time: bool = False
+    ) -> List[TraceSpan]:
+        """
+        Get spans that are slower than threshold.
+        
+        Args:
+            spans: Spans to check
+            threshold_ms: Duration above which a span is slow
+            by_self_time: Compare self-time instead, so a parent that only
+                waited on a slow child is not flagged
+        """
+        if not by_self_time:
+            return [span for span in spans if span.duration_ms > threshold_ms]
+        self_times = self.compute_self_times(spans)
+        return [span for span in spans if self_times[id(span)] > threshold_ms]
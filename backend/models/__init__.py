@@ -2,13 +2,25 @@
 from .incident import (
     LogEntry,
     LogLevel,
+    LogTemplate,
     MetricDataPoint,
+    MetricType,
     MetricSummary,
+    MetricAnomaly,
+    ChangePoint,
+    MetricSeries,
     TraceSpan,
+    ErrorPropagationNode,
+    ServiceEdgeStats,
+    CriticalPathSegment,
+    TraceCriticalPath,
+    OperationLatency,
     ConfigChange,
     DeploymentEvent,
     UnifiedContext,
 )
+from .log_batch import LogBatch, LogBatchBuilder
+from .metric_batch import MetricBatch
 from .rca import (
     RootCauseAnalysis,
     CausalLink,
@@ -21,6 +33,12 @@ from .schemas import (
     AnalyzeIncidentRequest,
     AnalyzeIncidentResponse,
     IncidentStatus,
+    LogTemplatesResponse,
+    DependencyGraphResponse,
+    LatencyBreakdownResponse,
+    MetricSeriesResponse,
+    CacheStatsResponse,
+    QueueStatsResponse,
     HealthCheckResponse,
 )
 
@@ -28,12 +46,25 @@ __all__ = [
     # Incident models
     "LogEntry",
     "LogLevel",
+    "LogTemplate",
     "MetricDataPoint",
+    "MetricType",
     "MetricSummary",
+    "MetricAnomaly",
+    "ChangePoint",
+    "MetricSeries",
     "TraceSpan",
+    "ErrorPropagationNode",
+    "ServiceEdgeStats",
+    "CriticalPathSegment",
+    "TraceCriticalPath",
+    "OperationLatency",
     "ConfigChange",
     "DeploymentEvent",
     "UnifiedContext",
+    "LogBatch",
+    "LogBatchBuilder",
+    "MetricBatch",
     # RCA models
     "RootCauseAnalysis",
     "CausalLink",
@@ -45,5 +76,11 @@ __all__ = [
     "AnalyzeIncidentRequest",
     "AnalyzeIncidentResponse",
     "IncidentStatus",
+    "LogTemplatesResponse",
+    "DependencyGraphResponse",
+    "LatencyBreakdownResponse",
+    "MetricSeriesResponse",
+    "CacheStatsResponse",
+    "QueueStatsResponse",
     "HealthCheckResponse",
 ]
@@ -2,8 +2,8 @@
 Data models for InfraMind.
 Defines the structure for all incident-related data.
 """
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Optional, List, Dict, Any, Set
 from datetime import datetime
 from enum import Enum
 
@@ -18,6 +18,13 @@ class LogLevel(str, Enum):
     FATAL = "FATAL"
 
 
+class MetricType(str, Enum):
+    """How a metric's samples are to be read, following Prometheus."""
+    GAUGE = "gauge"  # A level, summarized as sampled
+    COUNTER = "counter"  # Monotonic total; summarized as a per-second rate
+    HISTOGRAM = "histogram"  # Cumulative bucket counter with an "le" tag; summarized as quantiles
+
+
 class LogEntry(BaseModel):
     """Represents a single log entry."""
     timestamp: datetime
@@ -30,18 +37,79 @@ class LogEntry(BaseModel):
     raw: str = ""  # Original raw log line
 
 
+class LogTemplate(BaseModel):
+    """A cluster of log messages that share the same shape."""
+    template_id: str
+    template: str  # Message pattern with <*> parameter slots
+    count: int = 0
+    first_seen: datetime
+    last_seen: datetime
+    level: LogLevel
+    services: List[str] = Field(default_factory=list)
+    sample_values: List[List[str]] = Field(default_factory=list)
+    sample_message: str = ""
+
+
+def series_key(metric_name: str, tags: Optional[Dict[str, str]] = None) -> str:
+    """Canonical series identity: the metric name followed by its tags sorted by key."""
+    if not tags:
+        return metric_name
+    return f"{metric_name}{{{','.join(f'{key}={tags[key]}' for key in sorted(tags))}}}"
+
+
 class MetricDataPoint(BaseModel):
     """Represents a single metric data point."""
     timestamp: datetime
     metric_name: str
     value: float
     unit: Optional[str] = None
+    tags: Dict[str, str] = Field(default_factory=dict)  # Shared between points of a series; do not mutate
+    metric_type: Optional[MetricType] = None  # Declared type; inferred from the name when None
+    
+    @property
+    def series_key(self) -> str:
+        return series_key(self.metric_name, self.tags)
+
+
+class MetricAnomaly(BaseModel):
+    """An interval of consecutive anomalous points in a metric series."""
+    start_time: datetime  # Onset
+    end_time: datetime
+    peak_time: datetime
+    peak_value: float
+    baseline_value: float  # Rolling median before the peak
+    severity: float  # Peak detector score, in standard deviations
+    point_count: int
+
+
+class MetricSeries(BaseModel):
+    """A metric series' points as parallel columns, in time order, for charts and sparklines."""
+    metric_name: str
     tags: Dict[str, str] = Field(default_factory=dict)
+    unit: Optional[str] = None
+    timestamps: List[datetime] = Field(default_factory=list)
+    values: List[float] = Field(default_factory=list)
+    
+    @property
+    def series_key(self) -> str:
+        return series_key(self.metric_name, self.tags)
+
+
+class ChangePoint(BaseModel):
+    """A shift in the level of a metric or per-service error-rate series."""
+    series: str  # Metric series key, or service name for error rates
+    kind: str = "metric"  # metric, error_rate
+    timestamp: datetime  # First point after the shift
+    before: float  # Mean level before the shift
+    after: float  # Mean level after the shift
+    magnitude: float  # after - before
+    score: float  # Standardized CUSUM statistic
 
 
 class MetricSummary(BaseModel):
-    """Summary statistics for a metric."""
+    """Summary statistics for a metric series."""
     metric_name: str
+    tags: Dict[str, str] = Field(default_factory=dict)  # Tags identifying the series, after any roll-up
     start_time: datetime
     end_time: datetime
     min_value: float
@@ -50,6 +118,21 @@ class MetricSummary(BaseModel):
     current_value: float
     anomaly_detected: bool = False
     change_percent: Optional[float] = None
+    std_dev: Optional[float] = None
+    p50_value: Optional[float] = None
+    p95_value: Optional[float] = None
+    p99_value: Optional[float] = None
+    sample_count: Optional[int] = None
+    anomalous_points: Optional[int] = None
+    baseline_avg: Optional[float] = None  # From the series' stored history, if any
+    baseline_p99: Optional[float] = None
+    baseline_samples: Optional[int] = None
+    anomalies: List[MetricAnomaly] = Field(default_factory=list)  # Most severe first
+    change_points: List[ChangePoint] = Field(default_factory=list)  # Highest score first
+    
+    @property
+    def series_key(self) -> str:
+        return series_key(self.metric_name, self.tags)
 
 
 class TraceSpan(BaseModel):
@@ -67,6 +150,55 @@ class TraceSpan(BaseModel):
     error: Optional[str] = None
 
 
+class ErrorPropagationNode(BaseModel):
+    """
+    A span in the tree of failure propagation for a trace.
+    Error chains that share a prefix share the nodes of that prefix.
+    """
+    span: TraceSpan
+    error_count: int = 0  # ERROR spans in this subtree, including this span
+    children: List["ErrorPropagationNode"] = Field(default_factory=list)
+
+
+class ServiceEdgeStats(BaseModel):
+    """Rate, errors and duration of the calls from one service to another."""
+    caller: str
+    callee: str
+    call_count: int
+    error_count: int
+    error_rate: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    anomaly_detected: bool = False
+    anomaly_reason: Optional[str] = None
+
+
+class CriticalPathSegment(BaseModel):
+    """A stretch of a trace's critical path spent in one span's own work."""
+    span_id: str
+    service: str
+    operation: str
+    duration_ms: float
+
+
+class TraceCriticalPath(BaseModel):
+    """The chain of work that determined a trace's end-to-end latency."""
+    trace_id: str
+    duration_ms: float
+    segments: List[CriticalPathSegment] = Field(default_factory=list)  # In time order
+
+
+class OperationLatency(BaseModel):
+    """Latency attributed to a (service, operation) pair across all traces."""
+    service: str
+    operation: str
+    span_count: int
+    total_ms: float  # Sum of span durations, children included
+    self_time_ms: float  # Time not covered by any child span
+    critical_path_ms: float  # Time on the critical path of a trace
+
+
 class ConfigChange(BaseModel):
     """Represents a configuration change."""
     timestamp: datetime
@@ -92,78 +224,63 @@ class UnifiedContext(BaseModel):
     Unified context combining all data sources for Gemini analysis.
     This is what gets sent to the AI for reasoning.
     """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
     incident_id: str
     time_range_start: datetime
     time_range_end: datetime
     
     # All data sources
-    logs: List[LogEntry] = Field(default_factory=list)
+    logs: "LogBatch" = Field(default_factory=lambda: LogBatch.empty())
+    log_templates: List[LogTemplate] = Field(default_factory=list)
     metrics: List[MetricSummary] = Field(default_factory=list)
-    metric_data_points: List[MetricDataPoint] = Field(default_factory=list)
+    metric_data_points: List[MetricDataPoint] = Field(default_factory=list)  # Downsampled per series
     traces: List[TraceSpan] = Field(default_factory=list)
     config_changes: List[ConfigChange] = Field(default_factory=list)
     deployment_events: List[DeploymentEvent] = Field(default_factory=list)
     
+    # Trace analysis results (filled in by DataUnifier.enrich_context)
+    dependency_graph: Dict[str, Set[str]] = Field(default_factory=dict)
+    error_chains: List[List[TraceSpan]] = Field(default_factory=list)
+    error_propagation: List[ErrorPropagationNode] = Field(default_factory=list)
+    service_edges: List[ServiceEdgeStats] = Field(default_factory=list)
+    operation_latency: List[OperationLatency] = Field(default_factory=list)
+    critical_paths: List[TraceCriticalPath] = Field(default_factory=list)  # Slowest traces only
+    
+    # Level shifts across metrics and error rates, and the onset they point to
+    change_points: List[ChangePoint] = Field(default_factory=list)  # Highest score first
+    estimated_onset: Optional[datetime] = None
+    
     # Metadata
     services_involved: List[str] = Field(default_factory=list)
     error_count: int = 0
     
-    def to_context_string(self) -> str:
-        """Convert to a formatted string for Gemini."""
-        context_parts = []
-        
-        context_parts.append(f"## INCIDENT TIMELINE")
-        context_parts.append(f"Time Range: {self.time_range_start} to {self.time_range_end}")
-        context_parts.append(f"Services Involved: {', '.join(self.services_involved)}")
-        context_parts.append(f"Total Errors: {self.error_count}\n")
-        
-        if self.deployment_events:
-            context_parts.append("## DEPLOYMENT EVENTS")
-            for event in sorted(self.deployment_events, key=lambda x: x.timestamp):
-                context_parts.append(
-                    f"[{event.timestamp}] {event.service} deployed version {event.version} "
-                    f"(status: {event.status})"
-                )
-            context_parts.append("")
-        
-        if self.config_changes:
-            context_parts.append("## CONFIGURATION CHANGES")
-            for change in sorted(self.config_changes, key=lambda x: x.timestamp):
-                context_parts.append(
-                    f"[{change.timestamp}] {change.file_path}: {change.key} = "
-                    f"{change.old_value} → {change.new_value}"
-                )
-            context_parts.append("")
-        
-        if self.metrics:
-            context_parts.append("## METRICS SUMMARY")
-            for metric in self.metrics:
-                anomaly = " ⚠️ ANOMALY" if metric.anomaly_detected else ""
-                change = f" ({metric.change_percent:+.1f}%)" if metric.change_percent else ""
-                context_parts.append(
-                    f"{metric.metric_name}: {metric.current_value} "
-                    f"(min: {metric.min_value}, max: {metric.max_value}, "
-                    f"avg: {metric.avg_value}){change}{anomaly}"
-                )
-            context_parts.append("")
-        
-        if self.logs:
-            context_parts.append("## ERROR LOGS")
-            error_logs = [log for log in self.logs if log.level in [LogLevel.ERROR, LogLevel.CRITICAL, LogLevel.FATAL]]
-            for log in sorted(error_logs, key=lambda x: x.timestamp)[:50]:  # Limit to 50 errors
-                context_parts.append(f"[{log.timestamp}] [{log.level}] {log.service}: {log.message}")
-            context_parts.append("")
+    @field_validator("logs", mode="before")
+    @classmethod
+    def _logs_to_batch(cls, value: Any) -> "LogBatch":
+        """Accept a plain list of LogEntry objects (or dicts) and store it as a LogBatch."""
+        if isinstance(value, LogBatch):
+            return value
+        return LogBatch.from_entries(
+            entry if isinstance(entry, LogEntry) else LogEntry.model_validate(entry)
+            for entry in value
+        )
+    
+    def to_context_string(self, max_tokens: Optional[int] = None) -> str:
+        """
+        Convert to a formatted string for Gemini.
         
-        if self.traces:
-            context_parts.append("## TRACE ANALYSIS")
-            error_traces = [t for t in self.traces if t.status != "OK"]
-            for trace in sorted(error_traces, key=lambda x: x.start_time)[:20]:  # Limit to 20 traces
-                context_parts.append(
-                    f"[{trace.start_time}] {trace.service}.{trace.operation} "
-                    f"({trace.duration_ms}ms) - {trace.status}"
-                )
-                if trace.error:
-                    context_parts.append(f"  Error: {trace.error}")
-            context_parts.append("")
+        Args:
+            max_tokens: Token budget for the context. Falls back to max_context_length.
+        """
+        # Imported here: the builder lives with the reasoning code, which imports these models
+        from backend.reasoning.context_builder import ContextBuilder
         
-        return "\n".join(context_parts)
+        context_string, _ = ContextBuilder(max_tokens).build(self)
+        return context_string
+
+
+# LogBatch is built on LogEntry and LogLevel above, so it is imported last
+from backend.models.log_batch import LogBatch  # noqa: E402
+
+UnifiedContext.model_rebuild()
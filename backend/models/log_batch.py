@@ -0,0 +1,420 @@
+"""
+Columnar log storage for InfraMind.
+Holds parsed logs as arrays instead of one pydantic object per line.
+"""
+import json
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+from backend.models.incident import LogEntry, LogLevel
+
+
+# Level codes are indexes into this list, so comparing codes compares severity
+LOG_LEVELS: List[LogLevel] = list(LogLevel)
+LEVEL_CODES: Dict[LogLevel, int] = {level: code for code, level in enumerate(LOG_LEVELS)}
+
+# JSON log fields that map onto LogEntry attributes rather than metadata
+JSON_RESERVED_KEYS = frozenset({
+    'timestamp', 'time', '@timestamp', 'ts', 'level',
+    'severity', 'log_level', 'service', 'service_name',
+    'app', 'application', 'message', 'msg', 'text',
+    'trace_id', 'traceId', 'span_id', 'spanId',
+})
+
+# Marks rows whose timestamp had no timezone
+NAIVE_OFFSET = np.iinfo(np.int32).min
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_micros(timestamp: datetime) -> int:
+    """Convert a datetime to wall-clock microseconds since the epoch, ignoring tzinfo."""
+    return (timestamp.replace(tzinfo=None) - _EPOCH) // _ONE_MICROSECOND
+
+
+def from_epoch_micros(micros: int, offset_seconds: int = NAIVE_OFFSET) -> datetime:
+    """Convert wall-clock epoch microseconds (and an optional UTC offset) back to a datetime."""
+    timestamp = _EPOCH + timedelta(microseconds=int(micros))
+    if offset_seconds != NAIVE_OFFSET:
+        timestamp = timestamp.replace(tzinfo=timezone(timedelta(seconds=int(offset_seconds))))
+    return timestamp
+
+
+class _StringTable:
+    """Interns strings to small integer codes."""
+    
+    __slots__ = ("codes", "values")
+    
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+    
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class LogBatchBuilder:
+    """Append-only builder that accumulates rows into compact columns."""
+    
+    def __init__(self):
+        self._timestamps = array('q')
+        self._tz_offsets = array('i')
+        self._levels = array('b')
+        self._services = array('i')
+        self._trace_ids = array('i')
+        self._span_ids = array('i')
+        self._json_rows = array('b')
+        self._offsets = array('q')  # message start, message end, raw end per row
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self._service_table = _StringTable()
+        self._id_table = _StringTable()
+    
+    def __len__(self) -> int:
+        return len(self._timestamps)
+    
+    def append(
+        self,
+        timestamp: datetime,
+        level: LogLevel,
+        service: str,
+        message: str,
+        raw: str = "",
+        trace_id: Optional[str] = None,
+        span_id: Optional[str] = None,
+        is_json: bool = False
+    ) -> None:
+        """Append one log row."""
+        self._timestamps.append(to_epoch_micros(timestamp))
+        offset = timestamp.utcoffset()
+        self._tz_offsets.append(NAIVE_OFFSET if offset is None else int(offset.total_seconds()))
+        self._levels.append(LEVEL_CODES[level])
+        self._services.append(self._service_table.intern(service))
+        self._trace_ids.append(self._id_table.intern(trace_id))
+        self._span_ids.append(self._id_table.intern(span_id))
+        self._json_rows.append(is_json)
+        
+        encoded_message = message.encode('utf-8')
+        encoded_raw = raw.encode('utf-8')
+        start = self._position
+        self._chunks.append(encoded_message)
+        self._chunks.append(encoded_raw)
+        self._position += len(encoded_message) + len(encoded_raw)
+        self._offsets.extend((start, start + len(encoded_message), self._position))
+    
+    def append_entry(self, entry: LogEntry) -> None:
+        """Append a LogEntry. Its metadata is kept only when it came from a JSON line."""
+        self.append(
+            timestamp=entry.timestamp,
+            level=entry.level,
+            service=entry.service,
+            message=entry.message,
+            raw=entry.raw,
+            trace_id=entry.trace_id,
+            span_id=entry.span_id,
+            is_json=bool(entry.metadata),
+        )
+    
+    def build(self) -> "LogBatch":
+        """Freeze the accumulated rows into a LogBatch."""
+        offsets = np.frombuffer(self._offsets, dtype=np.int64).reshape(-1, 3)
+        return LogBatch(
+            timestamps=np.frombuffer(self._timestamps, dtype=np.int64).copy(),
+            tz_offsets=np.frombuffer(self._tz_offsets, dtype=np.int32).copy(),
+            levels=np.frombuffer(self._levels, dtype=np.int8).copy(),
+            service_codes=np.frombuffer(self._services, dtype=np.int32).copy(),
+            trace_codes=np.frombuffer(self._trace_ids, dtype=np.int32).copy(),
+            span_codes=np.frombuffer(self._span_ids, dtype=np.int32).copy(),
+            json_rows=np.frombuffer(self._json_rows, dtype=np.int8).astype(bool),
+            message_starts=offsets[:, 0].copy(),
+            message_ends=offsets[:, 1].copy(),
+            raw_ends=offsets[:, 2].copy(),
+            buffer=b"".join(self._chunks),
+            services=self._service_table.values,
+            ids=self._id_table.values,
+        )
+
+
+class LogBatch:
+    """
+    Array-backed collection of parsed log rows.
+    
+    Timestamps are int64 wall-clock epoch microseconds, levels and services are
+    small integer codes, and message/raw text live in one shared UTF-8 buffer
+    addressed by offsets. Filtering and sorting work on the arrays and return
+    new batches that share the buffer; LogEntry objects are only created when
+    a caller asks for them.
+    """
+    
+    __slots__ = (
+        "timestamps", "tz_offsets", "levels", "service_codes", "trace_codes",
+        "span_codes", "json_rows", "message_starts", "message_ends", "raw_ends",
+        "buffer", "services", "ids",
+    )
+    
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        tz_offsets: np.ndarray,
+        levels: np.ndarray,
+        service_codes: np.ndarray,
+        trace_codes: np.ndarray,
+        span_codes: np.ndarray,
+        json_rows: np.ndarray,
+        message_starts: np.ndarray,
+        message_ends: np.ndarray,
+        raw_ends: np.ndarray,
+        buffer: bytes,
+        services: Sequence[str],
+        ids: Sequence[str]
+    ):
+        self.timestamps = timestamps
+        self.tz_offsets = tz_offsets
+        self.levels = levels
+        self.service_codes = service_codes
+        self.trace_codes = trace_codes
+        self.span_codes = span_codes
+        self.json_rows = json_rows
+        self.message_starts = message_starts
+        self.message_ends = message_ends
+        self.raw_ends = raw_ends
+        self.buffer = buffer
+        self.services = services
+        self.ids = ids
+    
+    @classmethod
+    def empty(cls) -> "LogBatch":
+        """Create a batch with no rows."""
+        return LogBatchBuilder().build()
+    
+    @classmethod
+    def from_entries(cls, entries: Iterable[LogEntry]) -> "LogBatch":
+        """Build a batch from LogEntry objects."""
+        builder = LogBatchBuilder()
+        for entry in entries:
+            builder.append_entry(entry)
+        return builder.build()
+    
+    @classmethod
+    def concat(cls, batches: Sequence["LogBatch"]) -> "LogBatch":
+        """
+        Concatenate batches, merging their string tables and buffers.
+        
+        Args:
+            batches: Batches to join, in order
+        
+        Returns:
+            A single LogBatch
+        """
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        
+        service_table = _StringTable()
+        id_table = _StringTable()
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in (
+            "timestamps", "tz_offsets", "levels", "service_codes", "trace_codes",
+            "span_codes", "json_rows", "message_starts", "message_ends", "raw_ends",
+        )}
+        buffers = []
+        position = 0
+        
+        for batch in batches:
+            compact = batch._compacted()
+            service_map = np.array(
+                [service_table.intern(value) for value in compact.services] + [-1], dtype=np.int32
+            )
+            id_map = np.array([id_table.intern(value) for value in compact.ids] + [-1], dtype=np.int32)
+            
+            parts["timestamps"].append(compact.timestamps)
+            parts["tz_offsets"].append(compact.tz_offsets)
+            parts["levels"].append(compact.levels)
+            parts["json_rows"].append(compact.json_rows)
+            # Code -1 (missing) indexes the trailing -1 in each map
+            parts["service_codes"].append(service_map[compact.service_codes])
+            parts["trace_codes"].append(id_map[compact.trace_codes])
+            parts["span_codes"].append(id_map[compact.span_codes])
+            parts["message_starts"].append(compact.message_starts + position)
+            parts["message_ends"].append(compact.message_ends + position)
+            parts["raw_ends"].append(compact.raw_ends + position)
+            buffers.append(compact.buffer)
+            position += len(compact.buffer)
+        
+        return cls(
+            **{name: np.concatenate(arrays) for name, arrays in parts.items()},
+            buffer=b"".join(buffers),
+            services=service_table.values,
+            ids=id_table.values,
+        )
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    def __iter__(self) -> Iterator[LogEntry]:
+        """Iterate rows as LogEntry objects, materializing one at a time."""
+        for index in range(len(self)):
+            yield self.entry(index)
+    
+    # --- Vectorized selection -------------------------------------------------
+    
+    def take(self, indices: np.ndarray) -> "LogBatch":
+        """Select rows by index. The text buffer and string tables are shared."""
+        return LogBatch(
+            timestamps=self.timestamps[indices],
+            tz_offsets=self.tz_offsets[indices],
+            levels=self.levels[indices],
+            service_codes=self.service_codes[indices],
+            trace_codes=self.trace_codes[indices],
+            span_codes=self.span_codes[indices],
+            json_rows=self.json_rows[indices],
+            message_starts=self.message_starts[indices],
+            message_ends=self.message_ends[indices],
+            raw_ends=self.raw_ends[indices],
+            buffer=self.buffer,
+            services=self.services,
+            ids=self.ids,
+        )
+    
+    def filter(self, mask: np.ndarray) -> "LogBatch":
+        """Select rows where mask is True."""
+        return self.take(np.flatnonzero(mask))
+    
+    def sort_by_time(self) -> "LogBatch":
+        """Return rows in chronological order (stable for equal timestamps)."""
+        return self.take(np.argsort(self.timestamps, kind="stable"))
+    
+    def level_in(self, levels: Iterable[LogLevel]) -> np.ndarray:
+        """Mask of rows whose level is one of the given levels."""
+        return np.isin(self.levels, [LEVEL_CODES[level] for level in levels])
+    
+    def level_at_least(self, level: LogLevel) -> np.ndarray:
+        """Mask of rows at or above a severity level."""
+        return self.levels >= LEVEL_CODES[level]
+    
+    def error_mask(self) -> np.ndarray:
+        """Mask of ERROR, CRITICAL and FATAL rows."""
+        return self.level_at_least(LogLevel.ERROR)
+    
+    def since(self, start: datetime) -> np.ndarray:
+        """Mask of rows at or after a (wall-clock) time."""
+        return self.timestamps >= to_epoch_micros(start)
+    
+    def in_time_range(self, start: datetime, end: datetime) -> np.ndarray:
+        """Mask of rows between two (wall-clock) times, inclusive."""
+        return (self.timestamps >= to_epoch_micros(start)) & (self.timestamps <= to_epoch_micros(end))
+    
+    def service_mask(self, services: Iterable[str]) -> np.ndarray:
+        """Mask of rows belonging to any of the given services."""
+        names = set(services)
+        wanted = [code for code, name in enumerate(self.services) if name in names]
+        return np.isin(self.service_codes, wanted)
+    
+    def time_range(self) -> Optional[Tuple[datetime, datetime]]:
+        """Earliest and latest wall-clock timestamps as naive datetimes, or None if empty."""
+        if not len(self):
+            return None
+        return from_epoch_micros(self.timestamps.min()), from_epoch_micros(self.timestamps.max())
+    
+    # --- Row access -----------------------------------------------------------
+    
+    def service_names(self) -> List[str]:
+        """Distinct services present in this batch."""
+        return [self.services[code] for code in np.unique(self.service_codes) if code >= 0]
+    
+    def timestamp(self, index: int) -> datetime:
+        return from_epoch_micros(self.timestamps[index], self.tz_offsets[index])
+    
+    def level(self, index: int) -> LogLevel:
+        return LOG_LEVELS[self.levels[index]]
+    
+    def service(self, index: int) -> str:
+        return self.services[self.service_codes[index]]
+    
+    def message(self, index: int) -> str:
+        return self.buffer[self.message_starts[index]:self.message_ends[index]].decode('utf-8')
+    
+    def raw(self, index: int) -> str:
+        return self.buffer[self.message_ends[index]:self.raw_ends[index]].decode('utf-8')
+    
+    def metadata(self, index: int) -> Dict[str, Any]:
+        """Materialize extra fields for a row, parsed lazily from its raw JSON line."""
+        if not self.json_rows[index]:
+            return {}
+        try:
+            log_obj = json.loads(self.raw(index))
+        except json.JSONDecodeError:
+            return {}
+        return {k: v for k, v in log_obj.items() if k not in JSON_RESERVED_KEYS}
+    
+    def iter_messages(self) -> Iterator[str]:
+        """Decode messages one at a time without building LogEntry objects."""
+        buffer = self.buffer
+        for start, end in zip(self.message_starts.tolist(), self.message_ends.tolist()):
+            yield buffer[start:end].decode('utf-8')
+    
+    def entry(self, index: int) -> LogEntry:
+        """Materialize one row as a LogEntry."""
+        trace_code = self.trace_codes[index]
+        span_code = self.span_codes[index]
+        return LogEntry(
+            timestamp=self.timestamp(index),
+            level=self.level(index),
+            service=self.service(index),
+            message=self.message(index),
+            trace_id=self.ids[trace_code] if trace_code >= 0 else None,
+            span_id=self.ids[span_code] if span_code >= 0 else None,
+            metadata=self.metadata(index),
+            raw=self.raw(index),
+        )
+    
+    def to_entries(self) -> List[LogEntry]:
+        """Materialize every row as a LogEntry."""
+        return [self.entry(index) for index in range(len(self))]
+    
+    def _compacted(self) -> "LogBatch":
+        """Copy just the referenced text into a fresh buffer (used before concatenation)."""
+        if len(self) and self.message_starts[0] == 0 and self.raw_ends[-1] == len(self.buffer) \
+                and np.all(self.message_starts[1:] == self.raw_ends[:-1]):
+            return self
+        
+        builder_chunks = []
+        starts = np.empty(len(self), dtype=np.int64)
+        message_ends = np.empty(len(self), dtype=np.int64)
+        raw_ends = np.empty(len(self), dtype=np.int64)
+        position = 0
+        for index, (start, end, raw_end) in enumerate(zip(
+            self.message_starts.tolist(), self.message_ends.tolist(), self.raw_ends.tolist()
+        )):
+            builder_chunks.append(self.buffer[start:raw_end])
+            starts[index] = position
+            message_ends[index] = position + (end - start)
+            position += raw_end - start
+            raw_ends[index] = position
+        
+        return LogBatch(
+            timestamps=self.timestamps,
+            tz_offsets=self.tz_offsets,
+            levels=self.levels,
+            service_codes=self.service_codes,
+            trace_codes=self.trace_codes,
+            span_codes=self.span_codes,
+            json_rows=self.json_rows,
+            message_starts=starts,
+            message_ends=message_ends,
+            raw_ends=raw_ends,
+            buffer=b"".join(builder_chunks),
+            services=self.services,
+            ids=self.ids,
+        )
@@ -0,0 +1,102 @@
+"""
+Columnar metric storage for InfraMind.
+Holds parsed metric points as arrays instead of one pydantic object per row.
+"""
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from backend.models.incident import MetricDataPoint, MetricType, series_key
+from backend.models.log_batch import NAIVE_OFFSET, from_epoch_micros
+
+
+class MetricBatch:
+    """
+    Array-backed collection of parsed metric points.
+    
+    Each point has a series code, an int64 wall-clock epoch timestamp in
+    microseconds with its UTC offset (NAIVE_OFFSET when it had no timezone),
+    and a float64 value. Name, tags, unit and declared type are stored once
+    per series, and the tag dicts are shared by every point of the series.
+    MetricDataPoint objects are only created when a caller asks for them.
+    """
+    
+    __slots__ = ("series_codes", "timestamps", "tz_offsets", "values", "names", "tags", "units", "types")
+    
+    def __init__(
+        self,
+        series_codes: np.ndarray,
+        timestamps: np.ndarray,
+        tz_offsets: np.ndarray,
+        values: np.ndarray,
+        names: Sequence[str],
+        tags: Sequence[Dict[str, str]],
+        units: Sequence[Optional[str]],
+        types: Optional[Sequence[Optional[MetricType]]] = None
+    ):
+        self.series_codes = series_codes
+        self.timestamps = timestamps
+        self.tz_offsets = tz_offsets
+        self.values = values
+        self.names = names
+        self.tags = tags
+        self.units = units
+        self.types = types if types is not None else [None] * len(names)
+    
+    @classmethod
+    def empty(cls) -> "MetricBatch":
+        """Create a batch with no points."""
+        return cls(
+            np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32),
+            np.zeros(0), [], [], []
+        )
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def __iter__(self) -> Iterator[MetricDataPoint]:
+        """Iterate points as MetricDataPoint objects, materializing one at a time."""
+        for index in range(len(self)):
+            yield self.point(index)
+    
+    @property
+    def series_count(self) -> int:
+        return len(self.names)
+    
+    def series_keys(self) -> List[str]:
+        """Canonical key of every series, in code order."""
+        return [series_key(name, tags) for name, tags in zip(self.names, self.tags)]
+    
+    def take(self, indices: np.ndarray) -> "MetricBatch":
+        """Select points by index. Series tables are shared."""
+        return MetricBatch(
+            series_codes=self.series_codes[indices],
+            timestamps=self.timestamps[indices],
+            tz_offsets=self.tz_offsets[indices],
+            values=self.values[indices],
+            names=self.names,
+            tags=self.tags,
+            units=self.units,
+            types=self.types,
+        )
+    
+    def point(self, index: int) -> MetricDataPoint:
+        """Materialize one point."""
+        code = self.series_codes[index]
+        return MetricDataPoint.model_construct(
+            timestamp=from_epoch_micros(self.timestamps[index], self.tz_offsets[index]),
+            metric_name=self.names[code],
+            value=float(self.values[index]),
+            unit=self.units[code],
+            tags=self.tags[code],
+            metric_type=self.types[code],
+        )
+    
+    def points(self, indices: Optional[np.ndarray] = None) -> List[MetricDataPoint]:
+        """Materialize the points at the given indexes, or all of them."""
+        indices = range(len(self)) if indices is None else indices.tolist()
+        return [self.point(index) for index in indices]
+    
+    def has_timezones(self) -> bool:
+        """Whether any point's timestamp carried a UTC offset."""
+        return bool((self.tz_offsets != NAIVE_OFFSET).any())
@@ -7,7 +7,14 @@ from datetime import datetime
 from enum import Enum
 
 from backend.models.rca import RootCauseAnalysis
-from backend.models.incident import DeploymentEvent
+from backend.models.incident import (
+    DeploymentEvent,
+    LogTemplate,
+    MetricSeries,
+    OperationLatency,
+    ServiceEdgeStats,
+    TraceCriticalPath,
+)
 
 
 class IncidentStatus(str, Enum):
@@ -57,6 +64,62 @@ class AnalyzeIncidentResponse(BaseModel):
     summary: Optional[str] = Field(None, description="Executive summary")
 
 
+class LogTemplatesResponse(BaseModel):
+    """Log templates mined for an incident."""
+    incident_id: str = Field(..., description="Incident identifier")
+    total_templates: int = Field(..., description="Number of templates mined")
+    total_logs: int = Field(..., description="Number of log entries the templates cover")
+    templates: List[LogTemplate] = Field(default=[], description="Templates, most severe and frequent first")
+
+
+class DependencyGraphResponse(BaseModel):
+    """Service dependency graph for an incident, weighted with per-edge stats."""
+    incident_id: str = Field(..., description="Incident identifier")
+    total_edges: int = Field(..., description="Number of service-to-service edges")
+    anomalous_edges: int = Field(..., description="Number of edges flagged as anomalous")
+    edges: List[ServiceEdgeStats] = Field(default=[], description="Edges, busiest first")
+
+
+class LatencyBreakdownResponse(BaseModel):
+    """Where an incident's trace latency was spent."""
+    incident_id: str = Field(..., description="Incident identifier")
+    total_operations: int = Field(..., description="Number of (service, operation) pairs seen")
+    operations: List[OperationLatency] = Field(default=[], description="Operations, most critical-path time first")
+    critical_paths: List[TraceCriticalPath] = Field(default=[], description="Critical paths of the slowest traces")
+
+
+class MetricSeriesResponse(BaseModel):
+    """Downsampled metric series for an incident."""
+    incident_id: str = Field(..., description="Incident identifier")
+    total_series: int = Field(..., description="Number of metric series stored")
+    series: List[MetricSeries] = Field(default=[], description="Series, each reduced with LTTB")
+
+
+class CacheStatsResponse(BaseModel):
+    """LLM response cache statistics."""
+    enabled: bool = Field(..., description="Whether response caching is enabled")
+    memory_entries: int = Field(0, description="Entries currently held in memory")
+    max_entries: int = Field(0, description="Maximum entries held in memory")
+    ttl_seconds: int = Field(0, description="Time to live for each entry")
+    disk_enabled: bool = Field(False, description="Whether the SQLite tier is active")
+    hits: int = Field(0, description="Lookups answered from either tier")
+    memory_hits: int = Field(0, description="Lookups answered from memory")
+    disk_hits: int = Field(0, description="Lookups answered from SQLite")
+    misses: int = Field(0, description="Lookups that required a Gemini call")
+    evictions: int = Field(0, description="Entries evicted from memory by the LRU limit")
+    hit_rate: float = Field(0.0, description="Fraction of lookups that were hits")
+
+
+class QueueStatsResponse(BaseModel):
+    """Background analysis queue statistics."""
+    queued: int = Field(..., description="Analyses waiting for a worker")
+    running: int = Field(..., description="Analyses currently running")
+    completed: int = Field(..., description="Analyses finished since startup")
+    failed: int = Field(..., description="Analyses that raised since startup")
+    max_concurrency: int = Field(..., description="Analyses allowed to run at once")
+    max_queue_size: int = Field(..., description="Analyses allowed to wait")
+
+
 class HealthCheckResponse(BaseModel):
     """Health check response."""
     status: str = Field(..., description="Service status")
@@ -2,10 +2,13 @@
 from .gemini_client import GeminiClient, get_gemini_client
 from .reasoning_engine import ReasoningEngine
 from .prompts import PromptTemplates
+from .context_builder import ContextBuilder, ContextReport
 
 __all__ = [
     "GeminiClient",
     "get_gemini_client",
     "ReasoningEngine",
     "PromptTemplates",
+    "ContextBuilder",
+    "ContextReport",
 ]
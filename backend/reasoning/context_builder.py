@@ -0,0 +1,545 @@
+"""
+Token-budgeted context builder for InfraMind.
+Ranks incident evidence by relevance and packs the most informative lines into the prompt budget.
+"""
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from backend.core.config import get_settings
+from backend.core.exceptions import ContextLengthError
+from backend.models import LogLevel, UnifiedContext
+from backend.models.log_batch import LEVEL_CODES, to_epoch_micros
+from backend.utils.lttb import lttb_indices
+
+logger = logging.getLogger(__name__)
+
+
+# Rough characters per token for Gemini models; errs on the side of overestimating
+CHARS_PER_TOKEN = 4
+
+# Sections in the order they are rendered
+SECTION_HEADINGS = {
+    "deployments": "## DEPLOYMENT EVENTS",
+    "config_changes": "## CONFIGURATION CHANGES",
+    "change_points": "## CHANGE POINTS",
+    "metrics": "## METRICS SUMMARY",
+    "metric_shapes": "## METRIC SHAPES",
+    "log_templates": "## ERROR LOG TEMPLATES",
+    "error_logs": "## ERROR LOGS",
+    "service_edges": "## ANOMALOUS SERVICE CALLS",
+    "latency": "## LATENCY ATTRIBUTION",
+    "traces": "## TRACE ANALYSIS",
+}
+
+# How much each relevance signal contributes to a candidate's score
+WEIGHT_SEVERITY = 0.4
+WEIGHT_PROXIMITY = 0.3
+WEIGHT_RARITY = 0.2
+WEIGHT_LINKAGE = 0.1
+
+SEVERITY_WEIGHTS = {
+    LogLevel.WARNING: 0.4,
+    LogLevel.ERROR: 0.7,
+    LogLevel.CRITICAL: 0.9,
+    LogLevel.FATAL: 1.0,
+}
+
+TRACE_STATUS_WEIGHTS = {"ERROR": 1.0, "TIMEOUT": 0.9}
+
+# Change-point score treated as fully severe
+CHANGE_POINT_FULL_SCORE = 20.0
+
+# A p99 this many times its stored baseline counts as severe
+BASELINE_RATIO_SEVERE = 2.0
+
+# Points per metric sparkline, and the bars they are drawn with; shorter series get none
+SPARKLINE_POINTS = 32
+MIN_SPARKLINE_POINTS = 4
+SPARKLINE_BARS = "▁▂▃▄▅▆▇█"
+
+# Share of the budget raw error logs may take when error templates already summarize them
+ERROR_LOG_SHARE = 0.1
+
+# Smallest plausible cost of one evidence line; bounds how many rows get formatted
+MIN_LINE_TOKENS = 8
+
+# Tokens held back for the note listing omitted evidence
+OMITTED_NOTE_TOKENS = 64
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a piece of text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class ContextReport(BaseModel):
+    """What a context build kept and dropped, per section."""
+    budget_tokens: int
+    used_tokens: int = 0
+    included: Dict[str, int] = Field(default_factory=dict)
+    dropped: Dict[str, int] = Field(default_factory=dict)
+    
+    @property
+    def truncated(self) -> bool:
+        """Whether any evidence was left out."""
+        return any(self.dropped.values())
+
+
+class _Candidate:
+    """One piece of evidence competing for space in the context."""
+    
+    __slots__ = ("section", "score", "order", "text", "tokens")
+    
+    def __init__(self, section: str, score: float, order: Tuple, text: str):
+        self.section = section
+        self.score = score
+        self.order = order
+        self.text = text
+        self.tokens = estimate_tokens(text)
+
+
+class ContextBuilder:
+    """
+    Builds the incident context string within a token budget.
+    
+    Every deployment, config change, change point, metric and its sparkline,
+    error template/log, anomalous service edge, critical-path operation and failing span becomes a
+    candidate scored by severity, proximity to the anomaly onset, rarity and
+    linkage to failing traces. Candidates are added greedily by score until
+    the budget is used up, then rendered per section in timeline order.
+    Raw error logs compete alongside error templates for at most
+    ERROR_LOG_SHARE of the budget. Nothing is added when everything already fits.
+    """
+    
+    def __init__(self, max_tokens: Optional[int] = None):
+        """
+        Initialize context builder.
+        
+        Args:
+            max_tokens: Token budget for the context. Falls back to max_context_length.
+        """
+        self.max_tokens = max_tokens or get_settings().max_context_length
+    
+    def build(self, context: UnifiedContext) -> Tuple[str, ContextReport]:
+        """
+        Render a context within the budget.
+        
+        Args:
+            context: Unified incident context
+        
+        Returns:
+            Tuple of (context string, report of included and dropped evidence)
+        
+        Raises:
+            ContextLengthError: If the budget cannot fit even the incident header
+        """
+        header = [
+            "## INCIDENT TIMELINE",
+            f"Time Range: {context.time_range_start} to {context.time_range_end}",
+            *([f"Estimated Onset: {context.estimated_onset}"] if context.estimated_onset else []),
+            f"Services Involved: {', '.join(context.services_involved)}",
+            f"Total Errors: {context.error_count}\n",
+        ]
+        report = ContextReport(budget_tokens=self.max_tokens)
+        remaining = self.max_tokens - sum(estimate_tokens(line) for line in header)
+        if remaining <= OMITTED_NOTE_TOKENS:
+            raise ContextLengthError(
+                message=f"Context budget of {self.max_tokens} tokens is too small for incident {context.incident_id}",
+                details={"max_tokens": self.max_tokens}
+            )
+        remaining -= OMITTED_NOTE_TOKENS
+        
+        scorer = _Scorer(context)
+        candidates, totals, caps = self._collect(context, scorer, remaining)
+        
+        # Greedy fill: best evidence first, skipping anything that no longer fits
+        chosen: Dict[str, List[_Candidate]] = {}
+        for candidate in sorted(candidates, key=lambda c: c.score, reverse=True):
+            cost = candidate.tokens
+            if candidate.section not in chosen:
+                cost += estimate_tokens(SECTION_HEADINGS[candidate.section]) + 1
+            cap = caps.get(candidate.section)
+            if cost <= remaining and (cap is None or cost <= cap):
+                chosen.setdefault(candidate.section, []).append(candidate)
+                remaining -= cost
+                if cap is not None:
+                    caps[candidate.section] = cap - cost
+        
+        parts = header
+        for section, heading in SECTION_HEADINGS.items():
+            included = chosen.get(section, [])
+            report.included[section] = len(included)
+            report.dropped[section] = totals.get(section, 0) - len(included)
+            if included:
+                parts.append(heading)
+                parts.extend(c.text for c in sorted(included, key=lambda c: c.order))
+                parts.append("")
+        
+        if report.truncated:
+            omitted = ", ".join(
+                f"{count:,} of {totals[section]:,} {section.replace('_', ' ')}"
+                for section, count in report.dropped.items() if count
+            )
+            parts.append("## OMITTED FOR LENGTH")
+            parts.append(f"Lower-ranked evidence left out to fit the context budget: {omitted}")
+        
+        text = "\n".join(parts)
+        report.used_tokens = estimate_tokens(text)
+        return text, report
+    
+    def _collect(
+        self,
+        context: UnifiedContext,
+        scorer: "_Scorer",
+        budget: int
+    ) -> Tuple[List[_Candidate], Dict[str, int], Dict[str, int]]:
+        """
+        Score and format candidates.
+        
+        Returns:
+            Tuple of (candidates, total available per section, token caps of capped sections)
+        """
+        # No more rows than could possibly fit are ever formatted
+        pool_size = max(budget // MIN_LINE_TOKENS, 1)
+        candidates: List[_Candidate] = []
+        totals: Dict[str, int] = {}
+        caps: Dict[str, int] = {}
+        
+        totals["deployments"] = len(context.deployment_events)
+        for index, event in enumerate(context.deployment_events):
+            severity = 0.7 if event.status == "success" else 1.0
+            linkage = 1.0 if event.service in scorer.failing_services else 0.0
+            candidates.append(_Candidate(
+                "deployments",
+                scorer.score(severity, scorer.proximity(event.timestamp), 1.0, linkage),
+                (to_epoch_micros(event.timestamp), index),
+                f"[{event.timestamp}] {event.service} deployed version {event.version} "
+                f"(status: {event.status})"
+            ))
+        
+        totals["config_changes"] = len(context.config_changes)
+        for index, change in enumerate(context.config_changes):
+            candidates.append(_Candidate(
+                "config_changes",
+                scorer.score(0.7, scorer.proximity(change.timestamp), 1.0, 0.0),
+                (to_epoch_micros(change.timestamp), index),
+                f"[{change.timestamp}] {change.file_path}: {change.key} = "
+                f"{change.old_value} → {change.new_value}"
+            ))
+        
+        totals["change_points"] = len(context.change_points)
+        for index, point in enumerate(context.change_points):
+            label = f"{point.series} error rate" if point.kind == "error_rate" else point.series
+            relative = f" ({point.magnitude / abs(point.before):+.0%})" if point.before else ""
+            candidates.append(_Candidate(
+                "change_points",
+                scorer.score(min(point.score / CHANGE_POINT_FULL_SCORE, 1.0), scorer.proximity(point.timestamp), 1.0, 0.0),
+                (to_epoch_micros(point.timestamp), index),
+                f"[{point.timestamp}] {label}: {point.before:g} → {point.after:g}{relative}, score {point.score:g}"
+            ))
+        
+        totals["metrics"] = len(context.metrics)
+        baseline_days = get_settings().metric_baseline_days
+        for index, metric in enumerate(context.metrics):
+            severity = 1.0 if metric.anomaly_detected else min(abs(metric.change_percent or 0) / 100, 0.5)
+            anomaly = " ⚠️ ANOMALY" if metric.anomaly_detected else ""
+            change = f" ({metric.change_percent:+.1f}%)" if metric.change_percent else ""
+            tail = f", p95: {metric.p95_value:g}, p99: {metric.p99_value:g}" if metric.p95_value is not None else ""
+            if metric.baseline_avg is not None:
+                tail += (
+                    f"; {baseline_days}-day baseline avg: {metric.baseline_avg:g}, "
+                    f"p99: {metric.baseline_p99:g} over {metric.baseline_samples:,} samples"
+                )
+                if metric.p99_value is not None and metric.baseline_p99 and metric.baseline_p99 > 0:
+                    ratio = metric.p99_value / metric.baseline_p99
+                    tail += f"; p99 is {ratio:.1f}× baseline"
+                    if ratio >= BASELINE_RATIO_SEVERE:
+                        severity = max(severity, 0.8)
+            proximity = 0.5
+            if metric.anomalies:
+                top = metric.anomalies[0]
+                proximity = scorer.proximity(top.start_time)
+                anomaly += (
+                    f" from {top.start_time} to {top.end_time}, peak {top.peak_value:g} "
+                    f"vs baseline {top.baseline_value:g} ({top.severity:.1f}σ)"
+                )
+                if len(metric.anomalies) > 1:
+                    anomaly += f", {len(metric.anomalies) - 1} more interval(s)"
+            candidates.append(_Candidate(
+                "metrics",
+                scorer.score(severity, proximity, 1.0, 0.0),
+                (index,),
+                f"{metric.series_key}: {metric.current_value} "
+                f"(min: {metric.min_value}, max: {metric.max_value}, "
+                f"avg: {metric.avg_value}{tail}){change}{anomaly}"
+            ))
+        
+        candidates.extend(self._shape_candidates(context, scorer, totals))
+        
+        # Templates summarize the error logs, so the raw lines get a bounded share next to them
+        error_templates = [t for t in context.log_templates if t.level in SEVERITY_WEIGHTS]
+        log_pool_size = pool_size
+        if error_templates:
+            totals["log_templates"] = len(error_templates)
+            candidates.extend(self._template_candidates(error_templates, scorer, pool_size))
+            caps["error_logs"] = int(budget * ERROR_LOG_SHARE)
+            log_pool_size = max(caps["error_logs"] // MIN_LINE_TOKENS, 1)
+        if len(context.logs):
+            candidates.extend(self._log_candidates(context, scorer, log_pool_size, totals))
+        
+        # Only unhealthy edges; the aggregate stands in for the spans behind it
+        anomalous_edges = [edge for edge in context.service_edges if edge.anomaly_detected]
+        totals["service_edges"] = len(anomalous_edges)
+        for index, edge in enumerate(anomalous_edges):
+            severity = 1.0 if edge.error_count else 0.7
+            linkage = 1.0 if edge.callee in scorer.failing_services else 0.0
+            candidates.append(_Candidate(
+                "service_edges",
+                scorer.score(severity, 0.5, 1.0, linkage),
+                (index,),
+                f"{edge.caller} → {edge.callee}: {edge.call_count:,} calls, "
+                f"{edge.error_count:,} errors ({edge.error_rate:.1%}), "
+                f"p50 {edge.p50_ms:g}ms, p95 {edge.p95_ms:g}ms, p99 {edge.p99_ms:g}ms "
+                f"⚠️ {edge.anomaly_reason}"
+            ))
+        
+        candidates.extend(self._latency_candidates(context, scorer, pool_size, totals))
+        
+        error_traces = [t for t in context.traces if t.status != "OK"]
+        totals["traces"] = len(error_traces)
+        candidates.extend(self._trace_candidates(error_traces, scorer, pool_size))
+        
+        return candidates, totals, caps
+    
+    def _shape_candidates(
+        self,
+        context: UnifiedContext,
+        scorer: "_Scorer",
+        totals: Dict[str, int]
+    ) -> List[_Candidate]:
+        """One sparkline per metric, reduced with LTTB so spikes and dips keep their shape."""
+        columns: Dict[str, Tuple[List[int], List[float]]] = {}
+        for point in context.metric_data_points:
+            micros, values = columns.setdefault(point.series_key, ([], []))
+            micros.append(to_epoch_micros(point.timestamp))
+            values.append(point.value)
+        columns = {name: column for name, column in columns.items() if len(column[0]) >= MIN_SPARKLINE_POINTS}
+        totals["metric_shapes"] = len(columns)
+        anomalous = {metric.series_key for metric in context.metrics if metric.anomaly_detected}
+        
+        candidates = []
+        for index, (name, (micros, values)) in enumerate(columns.items()):
+            order = np.argsort(micros, kind='stable')
+            x = np.asarray(micros, dtype=np.int64)[order]
+            y = np.asarray(values, dtype=np.float64)[order]
+            kept = lttb_indices(np.array([0]), np.array([len(y)]), x - x[0], y, SPARKLINE_POINTS)
+            y = y[kept]
+            low, high = float(np.nanmin(y)), float(np.nanmax(y))
+            span = high - low
+            levels = np.zeros(len(y), dtype=np.intp) if not span else np.rint(
+                (np.nan_to_num(y, nan=low) - low) / span * (len(SPARKLINE_BARS) - 1)
+            ).astype(np.intp)
+            severity = 0.9 if name in anomalous else 0.3
+            candidates.append(_Candidate(
+                "metric_shapes",
+                scorer.score(severity, 0.5, 1.0, 0.0),
+                (index,),
+                f"{name}: {''.join(SPARKLINE_BARS[level] for level in levels)} "
+                f"(range {low:g} to {high:g} over {len(micros):,} points)"
+            ))
+        return candidates
+    
+    def _template_candidates(self, templates, scorer: "_Scorer", pool_size: int) -> List[_Candidate]:
+        scored = []
+        for index, template in enumerate(templates):
+            rarity = 1.0 / (1.0 + math.log10(max(template.count, 1)))
+            linkage = 1.0 if scorer.failing_services.intersection(template.services) else 0.0
+            score = scorer.score(
+                SEVERITY_WEIGHTS[template.level], scorer.proximity(template.first_seen), rarity, linkage
+            )
+            scored.append((score, index, template))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        
+        candidates = []
+        for score, index, template in scored[:pool_size]:
+            examples = "; ".join(", ".join(values) for values in template.sample_values[:3])
+            candidates.append(_Candidate(
+                "log_templates",
+                score,
+                (index,),
+                f"[{template.first_seen} → {template.last_seen}] [{template.level.value}] "
+                f"{', '.join(template.services)}: {template.template} × {template.count:,}"
+                + (f" (e.g. {examples})" if examples else "")
+            ))
+        return candidates
+    
+    def _log_candidates(
+        self,
+        context: UnifiedContext,
+        scorer: "_Scorer",
+        pool_size: int,
+        totals: Dict[str, int]
+    ) -> List[_Candidate]:
+        """Rank error logs on the arrays, then format only the best pool_size rows."""
+        logs = context.logs.filter(context.logs.error_mask())
+        totals["error_logs"] = len(logs)
+        if not len(logs):
+            return []
+        
+        severity = np.zeros(len(LEVEL_CODES))
+        for level, weight in SEVERITY_WEIGHTS.items():
+            severity[LEVEL_CODES[level]] = weight
+        linked_codes = [code for code, value in enumerate(logs.ids) if value in scorer.failing_trace_ids]
+        linkage = np.where(
+            np.isin(logs.trace_codes, linked_codes), 1.0, np.where(logs.trace_codes >= 0, 0.3, 0.0)
+        )
+        
+        # Rarity of each exact (service, message); compared as raw bytes to skip decoding
+        buffer = logs.buffer
+        keys = [
+            (service, buffer[start:end])
+            for service, start, end in zip(
+                logs.service_codes.tolist(), logs.message_starts.tolist(), logs.message_ends.tolist()
+            )
+        ]
+        frequency = Counter(keys)
+        rarity = 1.0 / np.fromiter((frequency[key] for key in keys), dtype=np.float64, count=len(keys))
+        
+        scores = (
+            WEIGHT_SEVERITY * severity[logs.levels]
+            + WEIGHT_PROXIMITY * scorer.proximity_array(logs.timestamps)
+            + WEIGHT_RARITY * rarity
+            + WEIGHT_LINKAGE * linkage
+        )
+        if len(logs) > pool_size:
+            pool = np.argpartition(-scores, pool_size - 1)[:pool_size]
+        else:
+            pool = np.arange(len(logs))
+        
+        return [
+            _Candidate(
+                "error_logs",
+                float(scores[i]),
+                (int(logs.timestamps[i]), i),
+                f"[{logs.timestamp(i)}] [{logs.level(i)}] {logs.service(i)}: {logs.message(i)}"
+            )
+            for i in pool.tolist()
+        ]
+    
+    def _latency_candidates(
+        self,
+        context: UnifiedContext,
+        scorer: "_Scorer",
+        pool_size: int,
+        totals: Dict[str, int]
+    ) -> List[_Candidate]:
+        """Operations ranked by their share of critical-path time, plus the slowest trace's path."""
+        operations = [op for op in context.operation_latency if op.critical_path_ms > 0]
+        critical_total = sum(op.critical_path_ms for op in operations)
+        totals["latency"] = len(operations) + min(len(context.critical_paths), 1)
+        
+        scored = []
+        for index, op in enumerate(operations):
+            share = op.critical_path_ms / critical_total
+            linkage = 1.0 if op.service in scorer.failing_services else 0.0
+            scored.append((scorer.score(share, 0.5, 1.0, linkage), index, share, op))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        
+        candidates = []
+        for score, index, share, op in scored[:pool_size]:
+            candidates.append(_Candidate(
+                "latency",
+                score,
+                (1, index),
+                f"{op.service}.{op.operation}: {op.critical_path_ms:,.1f}ms on critical paths "
+                f"({share:.0%}), self time {op.self_time_ms:,.1f}ms over {op.span_count:,} spans"
+            ))
+        
+        if context.critical_paths:
+            slowest = context.critical_paths[0]
+            steps = " → ".join(
+                f"{segment.service}.{segment.operation} {segment.duration_ms:g}ms"
+                for segment in slowest.segments
+                if segment.duration_ms >= slowest.duration_ms * 0.01
+            )
+            candidates.append(_Candidate(
+                "latency",
+                scorer.score(1.0, 0.5, 1.0, 1.0 if slowest.trace_id in scorer.failing_trace_ids else 0.0),
+                (0, 0),
+                f"Slowest trace {slowest.trace_id} ({slowest.duration_ms:g}ms) critical path: {steps}"
+            ))
+        return candidates
+    
+    def _trace_candidates(self, traces, scorer: "_Scorer", pool_size: int) -> List[_Candidate]:
+        frequency = Counter((trace.service, trace.operation) for trace in traces)
+        scored = []
+        for index, trace in enumerate(traces):
+            score = scorer.score(
+                TRACE_STATUS_WEIGHTS.get(trace.status, 0.6),
+                scorer.proximity(trace.start_time),
+                1.0 / frequency[(trace.service, trace.operation)],
+                1.0 if trace.trace_id in scorer.error_log_trace_ids else 0.0
+            )
+            scored.append((score, index, trace))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        
+        candidates = []
+        for score, index, trace in scored[:pool_size]:
+            text = (
+                f"[{trace.start_time}] {trace.service}.{trace.operation} "
+                f"({trace.duration_ms}ms) - {trace.status}"
+            )
+            if trace.error:
+                text += f"\n  Error: {trace.error}"
+            candidates.append(_Candidate("traces", score, (to_epoch_micros(trace.start_time), index), text))
+        return candidates
+
+
+class _Scorer:
+    """Incident-wide facts that relevance scores are measured against."""
+    
+    def __init__(self, context: UnifiedContext):
+        failing_traces = [t for t in context.traces if t.status != "OK"]
+        self.failing_trace_ids = {t.trace_id for t in failing_traces}
+        self.failing_services = {t.service for t in failing_traces}
+        
+        logs = context.logs
+        error_rows = logs.error_mask() if len(logs) else np.zeros(0, dtype=bool)
+        codes = np.unique(logs.trace_codes[error_rows]) if len(logs) else []
+        self.error_log_trace_ids = {logs.ids[code] for code in codes if code >= 0}
+        if len(logs):
+            self.failing_services.update(logs.filter(error_rows).service_names())
+        
+        # Onset: the change-point estimate, else the first error seen in logs or traces
+        onsets = [to_epoch_micros(t.start_time) for t in failing_traces]
+        if error_rows.any():
+            onsets.append(int(logs.timestamps[error_rows].min()))
+        if context.estimated_onset:
+            self.onset = to_epoch_micros(context.estimated_onset)
+        else:
+            self.onset = min(onsets) if onsets else to_epoch_micros(context.time_range_start)
+        
+        # Evidence a tenth of the incident window away from the onset scores ~0.37
+        window = to_epoch_micros(context.time_range_end) - to_epoch_micros(context.time_range_start)
+        self.scale = max(window / 10, 60_000_000)
+    
+    def proximity(self, timestamp: datetime) -> float:
+        return math.exp(-abs(to_epoch_micros(timestamp) - self.onset) / self.scale)
+    
+    def proximity_array(self, micros: np.ndarray) -> np.ndarray:
+        return np.exp(-np.abs(micros - self.onset) / self.scale)
+    
+    @staticmethod
+    def score(severity: float, proximity: float, rarity: float, linkage: float) -> float:
+        return (
+            WEIGHT_SEVERITY * severity
+            + WEIGHT_PROXIMITY * proximity
+            + WEIGHT_RARITY * rarity
+            + WEIGHT_LINKAGE * linkage
+        )
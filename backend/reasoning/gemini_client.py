@@ -5,11 +5,13 @@ Handles all interactions with Google's Gemini API.
 from google import genai
 from google.genai import types
 from typing import Optional, Dict, Any
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import before_sleep_log, retry, stop_after_attempt, wait_exponential
+import asyncio
 import logging
 
 from backend.core.config import settings
 from backend.core.exceptions import GeminiAPIError, ConfigurationError
+from backend.reasoning.response_cache import ResponseCache, get_response_cache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +22,13 @@ class GeminiClient:
     Provides retry logic, error handling, and response formatting.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[ResponseCache] = None):
         """
         Initialize Gemini client.
         
         Args:
             api_key: Optional API key. Falls back to settings if not provided.
+            cache: Optional response cache. Falls back to the shared cache if enabled.
         """
         self.api_key = api_key or settings.gemini_api_key
         if not self.api_key:
@@ -37,13 +40,10 @@ class GeminiClient:
         self.client = genai.Client(api_key=self.api_key)
         
         self.model_name = settings.gemini_model
+        self.timeout_seconds = settings.request_timeout_seconds
+        self.cache = cache or get_response_cache()
         logger.info(f"Initialized Gemini client with model: {self.model_name}")
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        reraise=True
-    )
     async def generate_content(
         self,
         prompt: str,
@@ -52,7 +52,13 @@ class GeminiClient:
         max_output_tokens: Optional[int] = None,
     ) -> str:
         """
-        Generate content using Gemini API with retry logic.
+        Generate content using Gemini API with caching and retry logic.
+        
+        Identical requests (same model, instructions, prompt, temperature and
+        token limit) are answered from the response cache when enabled.
+        Otherwise the SDK's async client is used, so the event loop keeps
+        serving other requests during the round trip. Each attempt is bounded
+        by request_timeout_seconds.
         
         Args:
             prompt: The user prompt to send to Gemini
@@ -66,6 +72,35 @@ class GeminiClient:
         Raises:
             GeminiAPIError: If API call fails after retries
         """
+        if self.cache is None:
+            return await self._generate(prompt, system_instruction, temperature, max_output_tokens)
+        
+        key = make_cache_key(self.model_name, prompt, system_instruction, temperature, max_output_tokens)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            logger.info(f"Returning cached Gemini response ({len(cached)} characters)")
+            return cached
+        
+        text = await self._generate(prompt, system_instruction, temperature, max_output_tokens)
+        await self.cache.aset(key, text)
+        return text
+    
+    # tenacity wraps coroutines with AsyncRetrying, so backoff waits use
+    # asyncio.sleep and never block the event loop
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True
+    )
+    async def _generate(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        max_output_tokens: Optional[int]
+    ) -> str:
+        """Call the Gemini API once per attempt, retrying on failure."""
         try:
             logger.info(f"Generating content with Gemini (temp={temperature})")
             
@@ -77,10 +112,13 @@ class GeminiClient:
             )
             
             # Generate content
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-                config=config
+            response = await asyncio.wait_for(
+                self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=prompt,
+                    config=config
+                ),
+                timeout=self.timeout_seconds
             )
             
             # Extract text from response
@@ -93,6 +131,16 @@ class GeminiClient:
             logger.info(f"Successfully generated {len(response.text)} characters")
             return response.text
             
+        except asyncio.TimeoutError:
+            logger.error(f"Gemini API call timed out after {self.timeout_seconds}s")
+            raise GeminiAPIError(
+                f"Gemini API call timed out after {self.timeout_seconds}s",
+                details={
+                    "model": self.model_name,
+                    "prompt_length": len(prompt),
+                    "error_type": "TimeoutError"
+                }
+            )
         except Exception as e:
             logger.error(f"Gemini API error: {str(e)}")
             raise GeminiAPIError(
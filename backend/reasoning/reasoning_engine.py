@@ -8,7 +8,9 @@ from datetime import datetime
 
 from backend.reasoning.gemini_client import GeminiClient
 from backend.reasoning.prompts import PromptTemplates
+from backend.reasoning.context_builder import ContextBuilder, estimate_tokens
 from backend.models import UnifiedContext, RootCauseAnalysis, ReasoningStep, CausalLink, Evidence, FixSuggestion
+from backend.core.config import get_settings
 from backend.core.exceptions import GeminiAPIError, ValidationError
 
 logger = logging.getLogger(__name__)
@@ -28,6 +30,7 @@ class ReasoningEngine:
         """
         self.gemini_client = gemini_client or GeminiClient()
         self.prompt_templates = PromptTemplates()
+        self.max_context_length = get_settings().max_context_length
     
     async def analyze_incident(
         self,
@@ -53,20 +56,24 @@ class ReasoningEngine:
         logger.info(f"Starting RCA for incident {context.incident_id}")
         
         try:
-            # Generate context string
-            context_string = context.to_context_string()
-            logger.debug(f"Context string length: {len(context_string)} characters")
+            # Get system prompt
+            system_prompt = self.prompt_templates.get_rca_system_prompt()
             
-            # Get appropriate prompt
-            if focus_area:
-                prompt = self.prompt_templates.get_focused_analysis_prompt(
-                    context_string, focus_area
+            # Generate context string within what the prompt leaves of the budget
+            overhead = estimate_tokens(self._build_prompt("", focus_area)) + estimate_tokens(system_prompt)
+            context_string, report = ContextBuilder(
+                max_tokens=max(self.max_context_length - overhead, 1)
+            ).build(context)
+            logger.debug(f"Context string length: {len(context_string)} characters")
+            if report.truncated:
+                dropped = {section: count for section, count in report.dropped.items() if count}
+                logger.info(
+                    f"Context trimmed to ~{report.used_tokens} of {report.budget_tokens} tokens; "
+                    f"dropped {dropped}"
                 )
-            else:
-                prompt = self.prompt_templates.get_rca_analysis_prompt(context_string)
             
-            # Get system prompt
-            system_prompt = self.prompt_templates.get_rca_system_prompt()
+            # Get appropriate prompt
+            prompt = self._build_prompt(context_string, focus_area)
             
             # Call Gemini
             logger.info("Calling Gemini for RCA...")
@@ -104,6 +111,12 @@ class ReasoningEngine:
             logger.error(f"RCA analysis failed: {e}")
             raise
     
+    def _build_prompt(self, context_string: str, focus_area: Optional[str]) -> str:
+        """Get the analysis prompt, focused if a focus area is given."""
+        if focus_area:
+            return self.prompt_templates.get_focused_analysis_prompt(context_string, focus_area)
+        return self.prompt_templates.get_rca_analysis_prompt(context_string)
+    
     def _parse_rca_response(self, response: str) -> Dict[str, Any]:
         """
         Parse Gemini's response into structured data with robust error handling.
@@ -0,0 +1,218 @@
+"""
+LLM response cache for InfraMind.
+Caches Gemini responses in a TTL-bounded LRU, optionally backed by SQLite.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from backend.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    model: str,
+    prompt: str,
+    system_instruction: Optional[str],
+    temperature: float,
+    max_output_tokens: Optional[int]
+) -> str:
+    """
+    Build a stable cache key from everything that affects a generation.
+    
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        [model, system_instruction, prompt, temperature, max_output_tokens],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for generated text.
+    
+    The memory tier is an LRU with per-entry expiry. The optional SQLite tier
+    survives restarts; disk hits are promoted back into memory.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: int,
+        max_entries: int = 256,
+        db_path: Optional[str] = None
+    ):
+        """
+        Initialize response cache.
+        
+        Args:
+            ttl_seconds: Time to live for each entry
+            max_entries: Maximum entries kept in memory
+            db_path: SQLite file for the persistent tier, or None for memory only
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        if db_path:
+            self._open_db(db_path)
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Cache key from make_cache_key
+        
+        Returns:
+            Cached text, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._entries[key]
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+            
+            self.misses += 1
+            return None
+    
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response in every tier.
+        
+        Args:
+            key: Cache key from make_cache_key
+            value: Generated text
+        """
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, value, expires_at)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist cached response: {e}")
+    
+    async def aget(self, key: str) -> Optional[str]:
+        """Async get; SQLite lookups run in a worker thread."""
+        if self._db is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+    
+    async def aset(self, key: str, value: str) -> None:
+        """Async set; SQLite writes run in a worker thread."""
+        if self._db is None:
+            self.set(key, value)
+        else:
+            await asyncio.to_thread(self.set, key, value)
+    
+    def clear(self) -> None:
+        """Drop every cached response from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and sizes."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": True,
+            "memory_entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_enabled": self._db is not None,
+            "hits": self.memory_hits + self.disk_hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+    
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        """Insert into the memory tier, evicting least recently used entries."""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def _open_db(self, db_path: str) -> None:
+        """Open the SQLite tier and drop expired rows."""
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+            logger.info(f"Opened LLM response cache at {db_path}")
+        except sqlite3.Error as e:
+            logger.warning(f"Disk cache unavailable ({db_path}): {e}; using memory only")
+            self._db = None
+
+
+# Singleton instance
+_cache_instance: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get or create the shared response cache.
+    
+    Returns:
+        ResponseCache instance, or None when caching is disabled
+    """
+    global _cache_instance
+    settings = get_settings()
+    if not settings.enable_cache:
+        return None
+    if _cache_instance is None:
+        _cache_instance = ResponseCache(
+            ttl_seconds=settings.cache_ttl_seconds,
+            max_entries=settings.cache_max_entries,
+            db_path=settings.cache_db_path or None
+        )
+    return _cache_instance
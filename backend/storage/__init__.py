@@ -0,0 +1,26 @@
+"""Storage module for persisting incidents and metric baselines."""
+from .baseline_store import (
+    BaselineStats,
+    BaselineStore,
+    MemoryBaselineStore,
+    SQLiteBaselineStore,
+    get_baseline_store,
+)
+from .incident_store import (
+    IncidentStore,
+    MemoryIncidentStore,
+    SQLiteIncidentStore,
+    get_incident_store,
+)
+
+__all__ = [
+    "BaselineStats",
+    "BaselineStore",
+    "MemoryBaselineStore",
+    "SQLiteBaselineStore",
+    "get_baseline_store",
+    "IncidentStore",
+    "MemoryIncidentStore",
+    "SQLiteIncidentStore",
+    "get_incident_store",
+]
@@ -0,0 +1,347 @@
+"""
+Metric baseline storage for InfraMind.
+Keeps mergeable per-series statistics by day so each incident is compared with the series' recent history.
+"""
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+from backend.core.config import get_settings
+from backend.utils.tdigest import TDigest
+
+logger = logging.getLogger(__name__)
+
+
+DAY_MICROS = 86_400_000_000
+
+# Compression of the per-day t-digests; about half as many centroids are stored
+DIGEST_COMPRESSION = 50.0
+
+
+class BaselineStats:
+    """
+    Mergeable statistics of one series: count, mean and M2 for the variance
+    (Welford/Chan), plus a t-digest for quantiles.
+    """
+    
+    __slots__ = ("count", "mean", "m2", "digest")
+    
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0, digest: Optional[TDigest] = None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.digest = digest or TDigest(DIGEST_COMPRESSION)
+    
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> "BaselineStats":
+        """Statistics of a batch of values."""
+        digest = TDigest(DIGEST_COMPRESSION)
+        digest.update(values)
+        mean = float(values.mean())
+        return cls(len(values), mean, float(((values - mean) ** 2).sum()), digest)
+    
+    @property
+    def std(self) -> float:
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+    
+    def quantile(self, q: float) -> float:
+        return self.digest.quantile(q)
+    
+    def merge(self, other: "BaselineStats") -> "BaselineStats":
+        """
+        Fold another batch's statistics into these.
+        
+        Returns:
+            These statistics, for chaining
+        """
+        if other.count:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.count = count
+            self.digest.merge(other.digest)
+        return self
+
+
+class BaselineStore(ABC):
+    """
+    Storage interface for metric baselines.
+    
+    Statistics are kept per series key and calendar day (UTC wall clock), so
+    a baseline covers whole days before an incident and old days can be
+    dropped. A baseline is the merge of the days in the window ending the day
+    before the incident's series begins, so an incident is never compared
+    with its own points. Each source (an incident) adds its points once, so
+    re-analyzing it does not count them again.
+    """
+    
+    def __init__(self, days: int = 30):
+        """
+        Initialize the store.
+        
+        Args:
+            days: Days of history a baseline covers; older days are dropped
+        """
+        self.days = days
+    
+    def baselines(self, keys: Sequence[str], start_micros: np.ndarray) -> Dict[str, BaselineStats]:
+        """
+        Look up the baseline of each series.
+        
+        Args:
+            keys: Series keys
+            start_micros: Wall-clock epoch microseconds of each series' first point
+        
+        Returns:
+            Merged statistics by series key, for series with any history
+        """
+        found = {}
+        for key, start in zip(keys, start_micros.tolist()):
+            last_day = start // DAY_MICROS - 1
+            merged = BaselineStats()
+            for stats in self._load(key, last_day - self.days + 1, last_day):
+                merged.merge(stats)
+            if merged.count:
+                found[key] = merged
+        return found
+    
+    def update(
+        self,
+        source: str,
+        keys: Sequence[str],
+        codes: np.ndarray,
+        micros: np.ndarray,
+        values: np.ndarray
+    ) -> bool:
+        """
+        Add a source's points to the baselines of their series and days.
+        
+        Args:
+            source: Identifier of the points' origin, e.g. the incident ID
+            keys: Series key of each code
+            codes: Series code of each point
+            micros: Wall-clock epoch microseconds of each point
+            values: Value of each point
+        
+        Returns:
+            False if the source's points were already added
+        """
+        finite = np.isfinite(values)
+        codes, days, values = codes[finite], micros[finite] // DAY_MICROS, values[finite]
+        if not len(values):
+            return False
+        
+        # One batch of statistics per (series, day)
+        order = np.lexsort((days, codes))
+        sorted_codes, sorted_days, sorted_values = codes[order], days[order], values[order]
+        first = np.flatnonzero(np.concatenate((
+            [True], (np.diff(sorted_codes) != 0) | (np.diff(sorted_days) != 0)
+        )))
+        bounds = np.append(first, len(order))
+        batches = {
+            (keys[sorted_codes[start]], int(sorted_days[start])): BaselineStats.from_values(sorted_values[start:end])
+            for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist())
+        }
+        last_day = int(sorted_days.max())
+        return self._merge(source, last_day, batches, last_day - self.days)
+    
+    @abstractmethod
+    def _load(self, key: str, first_day: int, last_day: int) -> Iterable[BaselineStats]:
+        """Stored statistics of a series for each day in [first_day, last_day]."""
+    
+    @abstractmethod
+    def _merge(
+        self,
+        source: str,
+        day: int,
+        batches: Dict[Tuple[str, int], BaselineStats],
+        expire_before: int
+    ) -> bool:
+        """
+        Merge batches into the stored days unless source was already merged,
+        recording it with its last day, then drop days and sources before
+        expire_before. Returns whether the batches were merged.
+        """
+
+
+class MemoryBaselineStore(BaselineStore):
+    """Process-local store; used when no database path is configured."""
+    
+    def __init__(self, days: int = 30):
+        super().__init__(days)
+        self._days: Dict[Tuple[str, int], BaselineStats] = {}
+        self._sources: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def _load(self, key: str, first_day: int, last_day: int) -> List[BaselineStats]:
+        with self._lock:
+            return [
+                stats for (stored_key, day), stats in self._days.items()
+                if stored_key == key and first_day <= day <= last_day
+            ]
+    
+    def _merge(
+        self,
+        source: str,
+        day: int,
+        batches: Dict[Tuple[str, int], BaselineStats],
+        expire_before: int
+    ) -> bool:
+        with self._lock:
+            if source in self._sources:
+                return False
+            self._sources[source] = day
+            for slot, batch in batches.items():
+                stored = self._days.get(slot)
+                self._days[slot] = batch if stored is None else BaselineStats().merge(stored).merge(batch)
+            for slot in [slot for slot in self._days if slot[1] < expire_before]:
+                del self._days[slot]
+            for name in [name for name, last in self._sources.items() if last < expire_before]:
+                del self._sources[name]
+            return True
+
+
+class SQLiteBaselineStore(BaselineStore):
+    """
+    SQLite-backed store shared by every worker process on the host.
+    
+    One row per series and day holds the count, mean, M2 and a serialized
+    t-digest, so a 30-day baseline is at most 30 small rows per series.
+    Updates read and rewrite rows inside an immediate transaction, so
+    concurrent workers never lose each other's points, and the transaction
+    records the source so two workers cannot both add it.
+    """
+    
+    def __init__(self, db_path: str, days: int = 30, busy_timeout_ms: int = 5000):
+        """
+        Initialize SQLite store.
+        
+        Args:
+            db_path: Path to the database file
+            days: Days of history a baseline covers; older days are dropped
+            busy_timeout_ms: How long a write waits for another process's lock
+        """
+        super().__init__(days)
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+        logger.info(f"Opened metric baseline store at {db_path}")
+    
+    def _load(self, key: str, first_day: int, last_day: int) -> List[BaselineStats]:
+        rows = self._connection().execute(
+            "SELECT count, mean, m2, digest FROM metric_baselines "
+            "WHERE series_key = ? AND day BETWEEN ? AND ?",
+            (key, first_day, last_day)
+        ).fetchall()
+        return [self._from_row(row) for row in rows]
+    
+    def _merge(
+        self,
+        source: str,
+        day: int,
+        batches: Dict[Tuple[str, int], BaselineStats],
+        expire_before: int
+    ) -> bool:
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            recorded = db.execute(
+                "INSERT OR IGNORE INTO metric_baseline_sources (source, day) VALUES (?, ?)",
+                (source, day)
+            ).rowcount
+            if not recorded:
+                db.execute("COMMIT")
+                return False
+            for (key, day), batch in batches.items():
+                row = db.execute(
+                    "SELECT count, mean, m2, digest FROM metric_baselines WHERE series_key = ? AND day = ?",
+                    (key, day)
+                ).fetchone()
+                stats = self._from_row(row).merge(batch) if row else batch
+                db.execute(
+                    "INSERT OR REPLACE INTO metric_baselines (series_key, day, count, mean, m2, digest) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, day, stats.count, stats.mean, stats.m2, stats.digest.to_bytes())
+                )
+            db.execute("DELETE FROM metric_baselines WHERE day < ?", (expire_before,))
+            db.execute("DELETE FROM metric_baseline_sources WHERE day < ?", (expire_before,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return True
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Transactions are managed explicitly so updates can take the write lock up front
+            db = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            db.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            db.execute("PRAGMA synchronous = NORMAL")
+            self._local.db = db
+        return db
+    
+    def _init_schema(self) -> None:
+        db = self._connection()
+        db.execute("PRAGMA journal_mode = WAL")
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS metric_baselines (
+                series_key TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                mean REAL NOT NULL,
+                m2 REAL NOT NULL,
+                digest BLOB NOT NULL,
+                PRIMARY KEY (series_key, day)
+            ) WITHOUT ROWID
+            """
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_metric_baselines_day ON metric_baselines (day)")
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS metric_baseline_sources (
+                source TEXT PRIMARY KEY,
+                day INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+    
+    @staticmethod
+    def _from_row(row: Tuple) -> BaselineStats:
+        count, mean, m2, digest = row
+        return BaselineStats(count, mean, m2, TDigest.from_bytes(digest))
+
+
+# Singleton instance
+_store_instance: Optional[BaselineStore] = None
+
+
+def get_baseline_store() -> BaselineStore:
+    """
+    Get or create the configured metric baseline store.
+    
+    Returns:
+        SQLiteBaselineStore when metric_baseline_db_path is set, else MemoryBaselineStore
+    """
+    global _store_instance
+    if _store_instance is None:
+        settings = get_settings()
+        if settings.metric_baseline_db_path:
+            _store_instance = SQLiteBaselineStore(settings.metric_baseline_db_path, settings.metric_baseline_days)
+        else:
+            logger.warning("metric_baseline_db_path is empty; metric baselines are kept in memory only")
+            _store_instance = MemoryBaselineStore(settings.metric_baseline_days)
+    return _store_instance
@@ -0,0 +1,386 @@
+"""
+Incident storage for InfraMind.
+Persists incident records and analysis results in SQLite, with an in-memory fallback.
+"""
+import base64
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from pydantic_core import to_jsonable_python
+
+from backend.core.config import get_settings
+from backend.models.schemas import IncidentStatus
+
+logger = logging.getLogger(__name__)
+
+
+# Fields kept in plain, indexable columns
+COLUMN_FIELDS = ("status", "created_at", "completed_at", "error", "total_logs", "demo_mode")
+
+# Large fields stored as zlib-compressed JSON
+BLOB_FIELDS = ("request", "rca", "log_templates", "service_edges", "latency", "metric_series")
+
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def encode_cursor(created_at: datetime, incident_id: str) -> str:
+    """Build an opaque keyset-pagination cursor from the last row of a page."""
+    raw = json.dumps([created_at.strftime(_TIMESTAMP_FORMAT), incident_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, incident_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(created_at), str(incident_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+class IncidentStore(ABC):
+    """
+    Storage interface for incident records.
+    
+    A record is a dict with any of COLUMN_FIELDS and BLOB_FIELDS. Listing is
+    ordered by (created_at, incident_id) and paginated by keyset cursors.
+    """
+    
+    @abstractmethod
+    def create(self, incident_id: str, record: Dict[str, Any]) -> None:
+        """Insert a record, replacing any existing one with the same ID."""
+    
+    @abstractmethod
+    def get(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        """Return a record, or None if it does not exist."""
+    
+    @abstractmethod
+    def update(self, incident_id: str, **fields: Any) -> bool:
+        """Update some fields of a record. Returns False if it does not exist."""
+    
+    @abstractmethod
+    def delete(self, incident_id: str) -> bool:
+        """Delete a record. Returns False if it did not exist."""
+    
+    @abstractmethod
+    def list(
+        self,
+        limit: int = 10,
+        status: Optional[IncidentStatus] = None,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List record summaries (without blob fields).
+        
+        Args:
+            limit: Maximum records to return
+            status: Only return records with this status
+            cursor: Cursor from a previous page; takes precedence over offset
+            offset: Records to skip when no cursor is given
+        
+        Returns:
+            Tuple of (records with incident_id, cursor for the next page or None)
+        """
+    
+    @abstractmethod
+    def count(self, status: Optional[IncidentStatus] = None) -> int:
+        """Count records, optionally with a given status."""
+    
+    def __contains__(self, incident_id: str) -> bool:
+        return self.get(incident_id) is not None
+
+
+class MemoryIncidentStore(IncidentStore):
+    """Process-local store; used when no database path is configured."""
+    
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def create(self, incident_id: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._records.pop(incident_id, None)
+            self._records[incident_id] = {
+                "status": IncidentStatus.PENDING,
+                "created_at": datetime.now(),
+                **record
+            }
+    
+    def get(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(incident_id)
+        return dict(record) if record is not None else None
+    
+    def update(self, incident_id: str, **fields: Any) -> bool:
+        with self._lock:
+            record = self._records.get(incident_id)
+            if record is None:
+                return False
+            record.update(fields)
+            return True
+    
+    def delete(self, incident_id: str) -> bool:
+        with self._lock:
+            return self._records.pop(incident_id, None) is not None
+    
+    def list(
+        self,
+        limit: int = 10,
+        status: Optional[IncidentStatus] = None,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        rows = sorted(
+            (
+                (record["created_at"].strftime(_TIMESTAMP_FORMAT), incident_id, record)
+                for incident_id, record in self._records.items()
+                if status is None or record["status"] == status
+            ),
+            key=lambda row: row[:2]
+        )
+        if cursor:
+            after = decode_cursor(cursor)
+            rows = [row for row in rows if row[:2] > after]
+        else:
+            rows = rows[offset:]
+        
+        page = [
+            {"incident_id": incident_id, **{k: record.get(k) for k in COLUMN_FIELDS}}
+            for _, incident_id, record in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit and page:
+            next_cursor = encode_cursor(page[-1]["created_at"], page[-1]["incident_id"])
+        return page, next_cursor
+    
+    def count(self, status: Optional[IncidentStatus] = None) -> int:
+        if status is None:
+            return len(self._records)
+        return sum(1 for record in self._records.values() if record["status"] == status)
+
+
+class SQLiteIncidentStore(IncidentStore):
+    """
+    SQLite-backed store shared by every worker process on the host.
+    
+    Uses WAL mode so readers never block the writer, indexes status and
+    created_at for filtering and keyset pagination, and keeps request/RCA
+    payloads zlib-compressed. Each thread gets its own connection.
+    """
+    
+    def __init__(self, db_path: str, busy_timeout_ms: int = 5000):
+        """
+        Initialize SQLite store.
+        
+        Args:
+            db_path: Path to the database file
+            busy_timeout_ms: How long a write waits for another process's lock
+        """
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+        logger.info(f"Opened incident store at {db_path}")
+    
+    def create(self, incident_id: str, record: Dict[str, Any]) -> None:
+        fields = self._to_row({"status": IncidentStatus.PENDING, "created_at": datetime.now(), **record})
+        columns = ", ".join(["incident_id", *fields])
+        placeholders = ", ".join("?" * (len(fields) + 1))
+        with self._connection() as db:
+            db.execute(
+                f"INSERT OR REPLACE INTO incidents ({columns}) VALUES ({placeholders})",
+                (incident_id, *fields.values())
+            )
+    
+    def get(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            f"SELECT {', '.join(COLUMN_FIELDS + BLOB_FIELDS)} FROM incidents WHERE incident_id = ?",
+            (incident_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._from_row(dict(zip(COLUMN_FIELDS + BLOB_FIELDS, row)))
+    
+    def update(self, incident_id: str, **fields: Any) -> bool:
+        if not fields:
+            return incident_id in self
+        values = self._to_row(fields)
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        with self._connection() as db:
+            cursor = db.execute(
+                f"UPDATE incidents SET {assignments} WHERE incident_id = ?",
+                (*values.values(), incident_id)
+            )
+        return cursor.rowcount > 0
+    
+    def delete(self, incident_id: str) -> bool:
+        with self._connection() as db:
+            cursor = db.execute("DELETE FROM incidents WHERE incident_id = ?", (incident_id,))
+        return cursor.rowcount > 0
+    
+    def list(
+        self,
+        limit: int = 10,
+        status: Optional[IncidentStatus] = None,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        clauses = []
+        params: List[Any] = []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(IncidentStatus(status).value)
+        if cursor:
+            clauses.append("(created_at, incident_id) > (?, ?)")
+            params.extend(decode_cursor(cursor))
+        
+        query = f"SELECT incident_id, {', '.join(COLUMN_FIELDS)} FROM incidents"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at, incident_id LIMIT ?"
+        params.append(limit + 1)
+        if not cursor and offset:
+            query += " OFFSET ?"
+            params.append(offset)
+        
+        rows = self._connection().execute(query, params).fetchall()
+        page = [
+            self._from_row(dict(zip(("incident_id",) + COLUMN_FIELDS, row)))
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit and page:
+            next_cursor = encode_cursor(page[-1]["created_at"], page[-1]["incident_id"])
+        return page, next_cursor
+    
+    def count(self, status: Optional[IncidentStatus] = None) -> int:
+        if status is None:
+            row = self._connection().execute("SELECT COUNT(*) FROM incidents").fetchone()
+        else:
+            row = self._connection().execute(
+                "SELECT COUNT(*) FROM incidents WHERE status = ?", (IncidentStatus(status).value,)
+            ).fetchone()
+        return row[0]
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000)
+            db.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            db.execute("PRAGMA synchronous = NORMAL")
+            self._local.db = db
+        return db
+    
+    def _init_schema(self) -> None:
+        db = self._connection()
+        db.execute("PRAGMA journal_mode = WAL")
+        with db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS incidents (
+                    incident_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    completed_at TEXT,
+                    error TEXT,
+                    total_logs INTEGER,
+                    demo_mode INTEGER,
+                    request BLOB,
+                    rca BLOB,
+                    log_templates BLOB,
+                    service_edges BLOB,
+                    latency BLOB,
+                    metric_series BLOB
+                )
+                """
+            )
+            # Databases created by older versions lack the newer blob columns
+            existing = {row[1] for row in db.execute("PRAGMA table_info(incidents)")}
+            for name in BLOB_FIELDS:
+                if name not in existing:
+                    db.execute(f"ALTER TABLE incidents ADD COLUMN {name} BLOB")
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_incidents_created "
+                "ON incidents (created_at, incident_id)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_incidents_status_created "
+                "ON incidents (status, created_at, incident_id)"
+            )
+    
+    @staticmethod
+    def _to_row(fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert record fields to column values."""
+        row = {}
+        for name, value in fields.items():
+            if name in BLOB_FIELDS:
+                row[name] = None if value is None else zlib.compress(
+                    json.dumps(to_jsonable_python(value)).encode('utf-8')
+                )
+            elif name == "status":
+                row[name] = IncidentStatus(value).value
+            elif name in ("created_at", "completed_at"):
+                row[name] = value.strftime(_TIMESTAMP_FORMAT) if value is not None else None
+            elif name in COLUMN_FIELDS:
+                row[name] = value
+            else:
+                raise ValueError(f"Unknown incident field: {name}")
+        return row
+    
+    @staticmethod
+    def _from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert column values back to record fields, omitting empty ones."""
+        record = {}
+        for name, value in row.items():
+            if value is None:
+                continue
+            if name in BLOB_FIELDS:
+                record[name] = json.loads(zlib.decompress(value))
+            elif name == "status":
+                record[name] = IncidentStatus(value)
+            elif name in ("created_at", "completed_at"):
+                record[name] = datetime.strptime(value, _TIMESTAMP_FORMAT)
+            elif name == "demo_mode":
+                record[name] = bool(value)
+            else:
+                record[name] = value
+        return record
+
+
+# Singleton instance
+_store_instance: Optional[IncidentStore] = None
+
+
+def get_incident_store() -> IncidentStore:
+    """
+    Get or create the configured incident store.
+    
+    Returns:
+        SQLiteIncidentStore when incident_db_path is set, else MemoryIncidentStore
+    """
+    global _store_instance
+    if _store_instance is None:
+        settings = get_settings()
+        if settings.incident_db_path:
+            _store_instance = SQLiteIncidentStore(settings.incident_db_path)
+        else:
+            logger.warning("incident_db_path is empty; incidents are kept in memory only")
+            _store_instance = MemoryIncidentStore()
+    return _store_instance
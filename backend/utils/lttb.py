@@ -0,0 +1,74 @@
+"""
+Largest-Triangle-Three-Buckets downsampling for InfraMind.
+Reduces time series to a few visually faithful points, many series at a time.
+"""
+import numpy as np
+
+
+def lttb_indices(starts: np.ndarray, counts: np.ndarray, x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Choose the points LTTB keeps from each of many series.
+    
+    The series lie one after another in x and y, each sorted by x. A series
+    longer than threshold keeps its first and last points plus one point per
+    bucket in between: the one forming the largest triangle with the point
+    kept from the previous bucket and the mean of the next bucket. Buckets
+    depend on the previous choice, so the loop runs once per bucket, with
+    every series handled together inside it.
+    
+    Args:
+        starts: Index of each series' first point
+        counts: Number of points in each series
+        x: Point positions (e.g. epoch microseconds), sorted within each series
+        y: Point values
+        threshold: Points to keep per series (at least 3 for any reduction)
+    
+    Returns:
+        Sorted indexes of the kept points
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    reduce = counts > threshold if threshold >= 3 else np.zeros(len(counts), dtype=bool)
+    kept = [np.flatnonzero(np.repeat(~reduce, counts))]
+    if not reduce.any():
+        return kept[0]
+    
+    first = starts[reduce]
+    n = counts[reduce]
+    last = first + n - 1
+    buckets = threshold - 2
+    
+    # Bucket b of a series covers [edges[b], edges[b + 1]); the first and last points stand alone
+    every = (n - 2) / buckets
+    edges = first[:, None] + 1 + np.floor(np.arange(buckets + 1)[None, :] * every[:, None]).astype(np.intp)
+    edges[:, -1] = last
+    
+    # Mean of every bucket, from running sums; the last bucket is followed by the last point
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = edges[:, 1:] - edges[:, :-1]
+    mean_x = (x_sums[edges[:, 1:]] - x_sums[edges[:, :-1]]) / sizes
+    mean_y = (y_sums[edges[:, 1:]] - y_sums[edges[:, :-1]]) / sizes
+    next_x = np.concatenate((mean_x[:, 1:], x[last][:, None]), axis=1)
+    next_y = np.concatenate((mean_y[:, 1:], y[last][:, None]), axis=1)
+    
+    chosen = np.empty((len(first), buckets), dtype=np.intp)
+    previous = first
+    for bucket in range(buckets):
+        lo = edges[:, bucket]
+        size = sizes[:, bucket]
+        offsets = np.cumsum(size) - size
+        candidates = np.repeat(lo - offsets, size) + np.arange(size.sum())
+        
+        ax, ay = np.repeat(x[previous], size), np.repeat(y[previous], size)
+        area = np.abs(
+            np.repeat(x[previous] - next_x[:, bucket], size) * (y[candidates] - ay)
+            - (ax - x[candidates]) * np.repeat(next_y[:, bucket] - y[previous], size)
+        )
+        area[np.isnan(area)] = -1.0  # A NaN value is never chosen over a number
+        best = np.maximum.reduceat(area, offsets)
+        slot = np.minimum.reduceat(np.where(area == np.repeat(best, size), np.arange(len(area)), len(area)), offsets)
+        previous = chosen[:, bucket] = candidates[slot]
+    
+    kept.extend((first, chosen.ravel(), last))
+    return np.sort(np.concatenate(kept))
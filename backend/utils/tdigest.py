@@ -0,0 +1,156 @@
+"""
+t-digest quantile sketch for InfraMind.
+Estimates latency percentiles in bounded memory, and digests can be merged.
+"""
+import math
+import struct
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+# Serialized header: compression, count, min, max
+_HEADER = struct.Struct("<dqdd")
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning & Ertl).
+    
+    Values are buffered and periodically merged into weighted centroids,
+    which stay small near the tails so extreme quantiles keep their accuracy.
+    Memory is O(compression) no matter how many values are added, and
+    digests built separately (per worker, per file) can be merged.
+    """
+    
+    def __init__(self, compression: float = 100.0):
+        """
+        Initialize an empty digest.
+        
+        Args:
+            compression: Accuracy/size trade-off; about compression / 2 centroids are kept
+        """
+        self.compression = compression
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._buffer: List[float] = []
+        self._buffer_limit = max(int(compression * 5), 32)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def add(self, value: float) -> None:
+        """Add one value."""
+        self._buffer.append(value)
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+    
+    def update(self, values: Iterable[float]) -> None:
+        """Add many values; a numpy array is merged in one pass."""
+        if isinstance(values, np.ndarray):
+            values = values.astype(np.float64, copy=False).ravel()
+            if not len(values):
+                return
+            self._compress()
+            self._means = np.concatenate([self._means, values])
+            self._weights = np.concatenate([self._weights, np.ones(len(values))])
+            self.count += len(values)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self._merge_centroids()
+            return
+        for value in values:
+            self.add(value)
+    
+    def merge(self, other: "TDigest") -> "TDigest":
+        """
+        Fold another digest into this one.
+        
+        Returns:
+            This digest, for chaining
+        """
+        other._compress()
+        if other.count:
+            self._compress()
+            self._means = np.concatenate([self._means, other._means])
+            self._weights = np.concatenate([self._weights, other._weights])
+            self.count += other.count
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._merge_centroids()
+        return self
+    
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the value at quantile q.
+        
+        Args:
+            q: Quantile between 0 and 1
+        
+        Returns:
+            Estimated value, or NaN for an empty digest
+        """
+        self._compress()
+        if not self.count:
+            return math.nan
+        q = min(max(q, 0.0), 1.0)
+        
+        # Each centroid's mean sits at the middle of its weight
+        centers = np.cumsum(self._weights) - self._weights / 2
+        positions = np.concatenate([[0.0], centers, [float(self.count)]])
+        values = np.concatenate([[self.min], self._means, [self.max]])
+        return float(np.interp(q * self.count, positions, values))
+    
+    def percentiles(self, qs: Iterable[float]) -> List[float]:
+        """Estimate several quantiles at once."""
+        return [self.quantile(q) for q in qs]
+    
+    def to_bytes(self) -> bytes:
+        """Serialize the digest compactly: a fixed header and zlib-compressed centroids."""
+        self._compress()
+        header = _HEADER.pack(self.compression, self.count, self.min, self.max)
+        return header + zlib.compress(np.concatenate([self._means, self._weights]).tobytes())
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TDigest":
+        """Rebuild a digest serialized by to_bytes()."""
+        compression, count, minimum, maximum = _HEADER.unpack_from(data)
+        digest = cls(compression)
+        centroids = np.frombuffer(zlib.decompress(data[_HEADER.size:]), dtype=np.float64)
+        digest._means, digest._weights = np.split(centroids.copy(), 2)
+        digest.count, digest.min, digest.max = count, minimum, maximum
+        return digest
+    
+    def _compress(self) -> None:
+        """Merge buffered values into the centroids."""
+        if not self._buffer:
+            return
+        self._means = np.concatenate([self._means, np.asarray(self._buffer, dtype=np.float64)])
+        self._weights = np.concatenate([self._weights, np.ones(len(self._buffer))])
+        self._buffer = []
+        self._merge_centroids()
+    
+    def _merge_centroids(self) -> None:
+        """Sort centroids and combine neighbours that fall in the same unit of the k1 scale."""
+        order = np.argsort(self._means, kind='stable')
+        means = self._means[order]
+        weights = self._weights[order]
+        
+        # k1(q) = δ/2π · asin(2q - 1): units are narrow at the tails and wide in the middle
+        total = weights.sum()
+        centers = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * centers - 1, -1.0, 1.0))
+        cluster = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.diff(cluster, prepend=-1))
+        
+        merged_weights = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(means * weights, starts) / merged_weights
+        self._weights = merged_weights
@@ -0,0 +1,10 @@
+"""
+Shared test setup: settings that would otherwise come from .env, with
+in-memory storage so tests never touch the data/ databases.
+"""
+import os
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+os.environ.setdefault("INCIDENT_DB_PATH", "")
+os.environ.setdefault("METRIC_BASELINE_DB_PATH", "")
+os.environ.setdefault("CACHE_DB_PATH", "")
@@ -0,0 +1,92 @@
+"""
+Tests that metric baselines exclude the incident's own points and count each incident once.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.api.routes import incident as incident_routes
+from backend.ingestion import data_unifier
+from backend.ingestion.metrics_parser import MetricsParser
+from backend.models import AnalyzeIncidentRequest, MetricDataPoint
+from backend.models.schemas import MetricFileData
+from backend.reasoning.context_builder import ContextBuilder
+from backend.storage.baseline_store import MemoryBaselineStore, SQLiteBaselineStore
+
+START = datetime(2026, 1, 10, 12)
+
+
+def _csv(day_offset, values):
+    start = START + timedelta(days=day_offset)
+    rows = [
+        f"{(start + timedelta(minutes=i)).isoformat()},latency_ms,api,{value}"
+        for i, value in enumerate(values)
+    ]
+    return "timestamp,metric,service,value\n" + "\n".join(rows)
+
+
+def _points(day_offset, values):
+    start = START + timedelta(days=day_offset)
+    return [
+        MetricDataPoint(
+            timestamp=start + timedelta(minutes=i), metric_name="latency_ms", value=value, tags={"service": "api"}
+        )
+        for i, value in enumerate(values)
+    ]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBaselineStore()
+    return SQLiteBaselineStore(str(tmp_path / "baselines.db"))
+
+
+def test_summaries_do_not_add_to_the_baseline(store):
+    parser = MetricsParser(baseline_store=store)
+    points = _points(0, [100.0] * 30)
+    
+    for _ in range(3):
+        assert parser.create_summaries(points)[0].baseline_samples is None
+
+
+def test_baseline_covers_only_days_before_the_series(store):
+    parser = MetricsParser(baseline_store=store)
+    assert parser.record_baseline("incident-1", _points(0, [100.0] * 30))
+    
+    same_day = parser.create_summaries(_points(0, [200.0] * 30))[0]
+    next_day = parser.create_summaries(_points(1, [200.0] * 30))[0]
+    
+    assert same_day.baseline_samples is None
+    assert next_day.baseline_samples == 30
+    assert next_day.baseline_avg == 100.0
+
+
+def test_source_is_recorded_once(store):
+    parser = MetricsParser(baseline_store=store)
+    points = _points(0, [100.0] * 30)
+    
+    assert parser.record_baseline("incident-1", points)
+    assert not parser.record_baseline("incident-1", points)
+    assert parser.record_baseline("incident-2", points)
+    
+    assert parser.create_summaries(_points(1, [100.0] * 30))[0].baseline_samples == 60
+
+
+def test_repeated_analysis_builds_identical_context(monkeypatch):
+    store = MemoryBaselineStore()
+    monkeypatch.setattr(data_unifier, "get_baseline_store", lambda: store)
+    MetricsParser(baseline_store=store).record_baseline("history", _points(-1, [100.0] * 30))
+    
+    request = AnalyzeIncidentRequest(
+        incident_id="inc-1",
+        metric_files=[MetricFileData(content=_csv(0, [100.0] * 20 + [400.0] * 10))]
+    )
+    rendered = []
+    for _ in range(2):
+        context = incident_routes._build_context(request)
+        context.incident_id = request.incident_id
+        rendered.append(ContextBuilder().build(context)[0])
+    
+    assert "30-day baseline avg: 100" in rendered[0]
+    assert rendered[0] == rendered[1]
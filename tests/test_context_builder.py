@@ -0,0 +1,53 @@
+"""
+Tests for budgeted evidence selection in the context builder.
+"""
+from datetime import datetime, timedelta
+
+from backend.models import LogEntry, LogLevel, UnifiedContext
+from backend.models.incident import LogTemplate, OperationLatency
+from backend.reasoning.context_builder import ERROR_LOG_SHARE, ContextBuilder, estimate_tokens
+
+
+T0 = datetime(2024, 1, 1, 10)
+
+
+def test_latency_ranks_all_operations_before_truncating():
+    # The heaviest operation comes last, behind more rows than the pool can hold
+    operations = [
+        OperationLatency(service="api", operation=f"op{i}", span_count=1, total_ms=1.0, self_time_ms=1.0, critical_path_ms=1.0)
+        for i in range(400)
+    ]
+    operations.append(OperationLatency(
+        service="db", operation="query", span_count=1, total_ms=5000.0, self_time_ms=5000.0, critical_path_ms=5000.0
+    ))
+    context = UnifiedContext(
+        incident_id="latency", time_range_start=T0, time_range_end=T0, operation_latency=operations
+    )
+    
+    text, report = ContextBuilder(max_tokens=600).build(context)
+    
+    assert "db.query: 5,000.0ms" in text
+    assert report.dropped["latency"] > 0
+
+
+def test_error_logs_share_budget_with_templates():
+    logs = [
+        LogEntry(timestamp=T0 + timedelta(seconds=i), level=LogLevel.ERROR, service="api", message=f"timeout calling db after {i}ms")
+        for i in range(500)
+    ]
+    template = LogTemplate(
+        template_id="t1", template="timeout calling db after <*>ms", count=500,
+        first_seen=T0, last_seen=T0 + timedelta(seconds=499), level=LogLevel.ERROR, services=["api"]
+    )
+    context = UnifiedContext(
+        incident_id="logs", time_range_start=T0, time_range_end=T0 + timedelta(minutes=10),
+        logs=logs, log_templates=[template], error_count=500
+    )
+    budget = 2000
+    
+    text, report = ContextBuilder(max_tokens=budget).build(context)
+    
+    assert report.included["log_templates"] == 1
+    assert report.included["error_logs"] > 0
+    log_lines = [line for line in text.split("\n") if "[ERROR] api:" in line]
+    assert sum(estimate_tokens(line) for line in log_lines) <= budget * ERROR_LOG_SHARE
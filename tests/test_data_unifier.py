@@ -0,0 +1,33 @@
+"""
+Tests for time-window filtering in the unified context.
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.ingestion import DataUnifier
+from backend.models import LogEntry, LogLevel
+
+
+@pytest.fixture
+def utc_minus_five(monkeypatch):
+    monkeypatch.setenv("TZ", "EST+05")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_window_without_onset_uses_local_wall_clock(utc_minus_five):
+    now = datetime.now()
+    logs = [
+        LogEntry(timestamp=now - timedelta(minutes=minutes), level=LogLevel.INFO, service="api", message=f"m{minutes}")
+        for minutes in (5, 120)
+    ]
+    
+    context = DataUnifier().create_unified_context(
+        logs=logs, metrics=[], traces=[], configs=[], deployments=[], time_window_minutes=30
+    )
+    
+    assert [entry.message for entry in context.logs] == ["m5"]
@@ -0,0 +1,90 @@
+"""
+Tests for streaming decompression limits and multi-member input.
+"""
+import bz2
+import gzip
+import lzma
+import os
+
+import pytest
+import zstandard
+
+from backend.core.exceptions import FileSizeError, ParsingError
+from backend.ingestion.decompression import decompress_stream
+
+PLAIN = b"".join(f"2026-01-01T00:00:{i % 60:02d}Z INFO request {i} served\n".encode() for i in range(20000))
+
+
+def _chunks(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def _decompress(data, chunk_size=4096, **limits):
+    limits.setdefault("max_output_bytes", 1 << 30)
+    return b"".join(decompress_stream(_chunks(data, chunk_size), name="test", **limits))
+
+
+def _zstd_stream(data, **params):
+    """A zstd frame written by the streaming API, without the content size in its header."""
+    compressor = zstandard.ZstdCompressor(**params).compressobj()
+    return compressor.compress(data) + compressor.flush()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_plain_input_passes_through(chunk_size):
+    assert _decompress(PLAIN[:5000], chunk_size) == PLAIN[:5000]
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, bz2.compress, lzma.compress, zstandard.compress])
+def test_compressed_input_round_trips(compress):
+    assert _decompress(compress(PLAIN)) == PLAIN
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, zstandard.compress])
+def test_bomb_exceeding_ratio_is_rejected(compress):
+    bomb = compress(bytes(64 * 1024 * 1024))
+    
+    with pytest.raises(FileSizeError, match="decompression ratio"):
+        for _ in decompress_stream(_chunks(bomb, 4096), name="bomb", max_output_bytes=1 << 30, max_ratio=100):
+            pass
+
+
+def test_output_size_limit_applies_to_plain_input():
+    with pytest.raises(FileSizeError):
+        _decompress(PLAIN, max_output_bytes=1000)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 65536])
+def test_concatenated_zstd_frames_are_decoded_back_to_back(chunk_size):
+    first, second = PLAIN[:300000], PLAIN[300000:]
+    skippable = (0x184D2A50).to_bytes(4, "little") + (5).to_bytes(4, "little") + b"skip!"
+    data = (
+        zstandard.compress(first)
+        + skippable
+        + _zstd_stream(second, write_checksum=True)
+        + _zstd_stream(b"")
+    )
+    
+    assert _decompress(data, chunk_size) == PLAIN
+
+
+def test_concatenated_gzip_members_are_decoded_back_to_back():
+    assert _decompress(gzip.compress(PLAIN[:1000]) + gzip.compress(PLAIN[1000:])) == PLAIN
+
+
+def test_incompressible_zstd_blocks_round_trip():
+    data = os.urandom(300000)
+    assert _decompress(_zstd_stream(data, write_checksum=True), 1000) == data
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, bz2.compress, lzma.compress, zstandard.compress, _zstd_stream])
+def test_truncated_input_is_rejected(compress):
+    data = compress(PLAIN)
+    
+    with pytest.raises(ParsingError, match="Truncated"):
+        _decompress(data[:len(data) // 2])
+
+
+def test_garbage_after_zstd_frame_is_rejected():
+    with pytest.raises(ParsingError, match="Corrupt"):
+        _decompress(zstandard.compress(PLAIN) + b"not a zstd frame")
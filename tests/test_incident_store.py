@@ -0,0 +1,91 @@
+"""
+Tests for incident listing, keyset pagination and SQLite schema migration.
+"""
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import IncidentStatus
+from backend.storage.incident_store import MemoryIncidentStore, SQLiteIncidentStore
+
+START = datetime(2026, 1, 1, 12)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryIncidentStore()
+    else:
+        store = SQLiteIncidentStore(str(tmp_path / "incidents.db"))
+    # Two incidents share each creation time, so ties are broken by ID
+    for number in range(10):
+        store.create(f"inc-{number}", {
+            "status": IncidentStatus.COMPLETED if number % 2 else IncidentStatus.FAILED,
+            "created_at": START + timedelta(minutes=number // 2),
+            "request": {"number": number}
+        })
+    return store
+
+
+def _ids(page):
+    return [record["incident_id"] for record in page]
+
+
+def test_cursor_pages_cover_every_record_once(store):
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.list(limit=3, cursor=cursor)
+        seen.extend(_ids(page))
+        if cursor is None:
+            break
+    
+    assert seen == [f"inc-{number}" for number in range(10)]
+
+
+def test_status_filter_applies_across_pages(store):
+    first, cursor = store.list(limit=3, status=IncidentStatus.COMPLETED)
+    second, last_cursor = store.list(limit=3, status=IncidentStatus.COMPLETED, cursor=cursor)
+    
+    assert _ids(first) == ["inc-1", "inc-3", "inc-5"]
+    assert _ids(second) == ["inc-7", "inc-9"]
+    assert last_cursor is None
+    assert store.count(IncidentStatus.COMPLETED) == 5
+    assert all("request" not in record for record in first + second)
+
+
+def test_cursor_takes_precedence_over_offset(store):
+    _, cursor = store.list(limit=2)
+    
+    page, _ = store.list(limit=2, cursor=cursor, offset=5)
+    
+    assert _ids(page) == ["inc-2", "inc-3"]
+    assert _ids(store.list(limit=2, offset=5)[0]) == ["inc-5", "inc-6"]
+
+
+def test_malformed_cursor_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.list(cursor="not-a-cursor")
+
+
+def test_database_without_blob_columns_is_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE incidents (incident_id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at TEXT NOT NULL, "
+        "completed_at TEXT, error TEXT, total_logs INTEGER, demo_mode INTEGER, request BLOB, rca BLOB)"
+    )
+    db.execute(
+        "INSERT INTO incidents (incident_id, status, created_at) VALUES (?, ?, ?)",
+        ("old", "completed", "2026-01-01T12:00:00.000000")
+    )
+    db.commit()
+    db.close()
+    
+    store = SQLiteIncidentStore(path)
+    assert store.update("old", log_templates=[{"template": "t"}], metric_series=[], latency={"operations": []})
+    
+    record = store.get("old")
+    assert record["status"] == IncidentStatus.COMPLETED
+    assert record["log_templates"] == [{"template": "t"}]
+    assert record["latency"] == {"operations": []}
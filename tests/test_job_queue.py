@@ -0,0 +1,82 @@
+"""
+Tests for the background analysis queue and the async submission paths.
+"""
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api.main import app
+from backend.api.routes import incident as incident_routes
+from backend.core import job_queue
+from backend.core.exceptions import QueueFullError
+from backend.core.job_queue import JobQueue
+from backend.models import IncidentStatus
+from backend.storage import get_incident_store
+
+
+@pytest.mark.asyncio
+async def test_shutdown_returns_running_and_waiting_jobs():
+    queue = JobQueue(max_concurrency=1, max_queue_size=1)
+    started = asyncio.Event()
+    
+    async def blocked():
+        started.set()
+        await asyncio.Event().wait()
+    
+    queue.submit("running", blocked)
+    await started.wait()
+    queue.submit("waiting", blocked)
+    with pytest.raises(QueueFullError):
+        queue.submit("rejected", blocked)
+    
+    assert await queue.shutdown() == ["running", "waiting"]
+    assert queue.stats()["queued"] == 0
+
+
+def test_async_submissions_are_rejected_without_touching_records(monkeypatch):
+    monkeypatch.setattr(job_queue, "_analysis_queue", JobQueue(max_concurrency=1, max_queue_size=1, name="analysis"))
+    started = threading.Event()
+    
+    async def blocked(*args, **kwargs):
+        started.set()
+        await asyncio.Event().wait()
+    
+    monkeypatch.setattr(incident_routes, "_analyze", blocked)
+    store = get_incident_store()
+    completed = {
+        "status": IncidentStatus.COMPLETED,
+        "created_at": datetime(2026, 1, 1),
+        "request": {},
+        "rca": {"summary": "stored"}
+    }
+    store.create("queue-done", completed)
+    
+    def submit(incident_id):
+        return client.post(
+            "/api/v1/incidents/analyze", params={"async_mode": True}, json={"incident_id": incident_id}
+        )
+    
+    with TestClient(app) as client:
+        assert submit("queue-running").status_code == 202
+        assert started.wait(5)
+        assert submit("queue-waiting").status_code == 202
+        
+        # The queue is full: a resubmitted completed incident keeps its result
+        assert submit("queue-done").status_code == 503
+        stored = store.get("queue-done")
+        assert stored["status"] == IncidentStatus.COMPLETED
+        assert stored["rca"] == {"summary": "stored"}
+        
+        # Incidents still pending or running cannot be resubmitted
+        assert submit("queue-waiting").status_code == 409
+        assert submit("queue-running").status_code == 409
+    
+    # Shutting down marks the unfinished analyses failed
+    for incident_id in ("queue-running", "queue-waiting"):
+        assert store.get(incident_id)["status"] == IncidentStatus.FAILED
+    
+    for incident_id in ("queue-done", "queue-running", "queue-waiting"):
+        store.delete(incident_id)
@@ -0,0 +1,25 @@
+"""
+Tests that streams parsed through one LogParser keep separate timestamp state.
+"""
+from backend.ingestion.log_parser import LogParser
+
+
+def _lines(template, count):
+    return [(template.format(i) + "\n").encode() for i in range(count)]
+
+
+def test_interleaved_streams_do_not_share_timestamp_state():
+    parser = LogParser()
+    shared = parser.timestamp_parser
+    iso = parser.parse_stream(_lines("2026-01-01T10:00:{0:02d}Z ERROR iso {0}", 20))
+    syslog = parser.parse_stream(_lines("Jan  2 11:00:{0:02d} host app: INFO syslog", 20))
+    
+    entries = []
+    for pair in zip(iso, syslog):
+        entries.extend(pair)
+    
+    assert parser.timestamp_parser is shared
+    assert len(entries) == 40
+    assert all(entry.timestamp.tzinfo is not None for entry in entries[0::2])
+    assert all(entry.timestamp.month == 1 and entry.timestamp.day == 2 for entry in entries[1::2])
+    assert entries[2].timestamp.second == 1 and entries[3].timestamp.second == 1
@@ -0,0 +1,29 @@
+"""
+Tests for switching the rolling detectors off in metric summaries.
+"""
+from datetime import datetime, timedelta
+
+from backend.ingestion.metrics_parser import MetricsParser
+from backend.models import MetricDataPoint
+
+START = datetime(2026, 1, 1)
+
+
+def _step_series():
+    values = [10.0 + (i % 3) * 0.1 for i in range(120)] + [50.0 + (i % 3) * 0.1 for i in range(120)]
+    return [
+        MetricDataPoint(timestamp=START + timedelta(seconds=10 * i), metric_name="latency_ms", value=value)
+        for i, value in enumerate(values)
+    ]
+
+
+def test_detectors_off_keeps_statistics_and_skips_intervals():
+    points = _step_series()
+    
+    full = MetricsParser(run_detectors=True).create_summaries(points)[0]
+    fast = MetricsParser(run_detectors=False).create_summaries(points)[0]
+    
+    assert full.change_points
+    assert fast.change_points == [] and fast.anomalies == [] and fast.anomalous_points is None
+    for field in ("min_value", "max_value", "avg_value", "std_dev", "p50_value", "p95_value", "p99_value", "sample_count"):
+        assert getattr(fast, field) == getattr(full, field)
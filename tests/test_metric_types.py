@@ -0,0 +1,35 @@
+"""
+Regression tests for counter and histogram derivation in metric summaries.
+"""
+from datetime import datetime, timedelta
+
+from backend.ingestion.metrics_parser import MetricsParser
+from backend.models import MetricDataPoint
+
+START = datetime(2026, 1, 1)
+
+
+def _points(name, values, **tags):
+    return [
+        MetricDataPoint(timestamp=START + timedelta(seconds=10 * i), metric_name=name, value=value, tags=tags)
+        for i, value in enumerate(values)
+    ]
+
+
+def test_counter_is_summarized_as_rate_with_reset():
+    summaries = MetricsParser().create_summaries(_points("req_total", [0, 10, 20, 5, 15]))
+    
+    assert [summary.metric_name for summary in summaries] == ["rate(req_total)"]
+    assert summaries[0].sample_count == 4
+    assert summaries[0].min_value == 0.5
+    assert summaries[0].max_value == 1.0
+
+
+def test_single_sample_counter_gets_no_summary():
+    cpu = _points("cpu", [10, 11, 12, 13, 14])
+    counter = _points("req_total", [5])
+    
+    for points in (cpu + counter, counter + cpu):
+        summaries = MetricsParser().create_summaries(points)
+        assert [(summary.metric_name, summary.sample_count) for summary in summaries] == [("cpu", 5)]
+        assert summaries[0].min_value == 10 and summaries[0].max_value == 14
@@ -0,0 +1,30 @@
+"""
+Regression tests for parallel log ingestion.
+"""
+import json
+
+from backend.ingestion.log_parser import LogParser
+from backend.ingestion.parallel_parser import ParallelParser
+
+
+def _json_logs(count: int) -> bytes:
+    lines = [
+        json.dumps({
+            "timestamp": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+            "level": "ERROR" if i % 10 == 0 else "INFO",
+            "message": f"request {i} handled",
+        })
+        for i in range(count)
+    ]
+    return "\n".join(lines).encode("utf-8")
+
+
+def test_parallel_json_logs_match_serial_parse():
+    data = _json_logs(2000)
+    parser = ParallelParser(workers=2, chunk_size_bytes=10000, threshold_bytes=0)
+    
+    parallel = list(parser.parse_logs(data, source="api", file_format="json"))
+    serial = LogParser().parse_file(data.decode("utf-8"), source="api")
+    
+    assert len(parallel) == len(serial) == 2000
+    assert [entry.message for entry in parallel] == [entry.message for entry in serial]
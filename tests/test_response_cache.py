@@ -0,0 +1,99 @@
+"""
+Tests for the two-tier LLM response cache.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from backend.reasoning import response_cache
+from backend.reasoning.response_cache import ResponseCache, make_cache_key
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(time=clock))
+    return clock
+
+
+def test_key_depends_on_every_generation_input():
+    base = make_cache_key("model", "prompt", "system", 0.2, 1024)
+    
+    assert base == make_cache_key("model", "prompt", "system", 0.2, 1024)
+    assert len({
+        base,
+        make_cache_key("other", "prompt", "system", 0.2, 1024),
+        make_cache_key("model", "prompt!", "system", 0.2, 1024),
+        make_cache_key("model", "prompt", None, 0.2, 1024),
+        make_cache_key("model", "prompt", "system", 0.3, 1024),
+        make_cache_key("model", "prompt", "system", 0.2, None),
+    }) == 6
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.set("a", "first")
+    
+    clock.now += 59
+    assert cache.get("a") == "first"
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_hits_are_promoted_and_expire(clock, tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(ttl_seconds=60, db_path=path).set("a", "stored")
+    
+    cache = ResponseCache(ttl_seconds=60, max_entries=1, db_path=path)
+    assert cache.get("a") == "stored"
+    assert cache.get("a") == "stored"
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["memory_entries"]) == (1, 1, 1)
+    
+    # Evicted from memory, the entry is still on disk until it expires
+    cache.set("b", "other")
+    assert cache.get("a") == "stored"
+    clock.now += 60
+    assert ResponseCache(ttl_seconds=60, db_path=path).get("a") is None
+
+
+def test_stats_count_hits_and_misses(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.get("a")
+    cache.set("a", "1")
+    cache.get("a")
+    cache.get("a")
+    
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    assert stats["disk_enabled"] is False
+
+
+def test_clear_empties_both_tiers(clock, tmp_path):
+    cache = ResponseCache(ttl_seconds=60, db_path=str(tmp_path / "cache.db"))
+    cache.set("a", "1")
+    cache.clear()
+    
+    assert cache.get("a") is None
@@ -0,0 +1,48 @@
+"""
+Tests that spooled metric uploads parse the same as their text.
+"""
+from tempfile import SpooledTemporaryFile
+
+import numpy as np
+import pytest
+
+from backend.api import uploads
+from backend.api.routes.incident import _parse_spooled_metrics
+from backend.ingestion import DataUnifier
+
+CSV = "timestamp,metric,service,value\n" + "\n".join(
+    f"2026-01-01T00:{i:02d}:00Z,latency_ms,api,{i * 1.5}" for i in range(60)
+)
+EPOCH_CSV = "timestamp,metric,value,host\n1767225600,cpu,1.5,a\n1767225660,cpu,2.5,b\n"
+JSON = '{"metrics": [' + ",".join(
+    f'{{"timestamp": "2026-01-01T00:{i:02d}:00Z", "metric": "cpu", "value": {i}, "tags": {{"host": "a"}}}}'
+    for i in range(60)
+) + "]}"
+JSON_LIST = '[{"timestamp": "2026-01-01T00:00:00Z", "metric": "cpu", "value": 1}]'
+
+
+def _spool(text):
+    spool = SpooledTemporaryFile(max_size=16)
+    spool.write(text.encode())
+    spool.seek(0)
+    return spool
+
+
+@pytest.mark.parametrize("text", [CSV, "\n\n" + CSV, EPOCH_CSV, JSON, JSON_LIST])
+def test_spooled_metrics_match_text_parse(monkeypatch, text):
+    monkeypatch.setattr(uploads, "SPOOL_READ_SIZE", 7)
+    spooled = _parse_spooled_metrics(_spool(text))
+    parsed = DataUnifier().parse_metrics(text)
+    
+    assert spooled.names == parsed.names and spooled.tags == parsed.tags
+    for column in ("series_codes", "timestamps", "tz_offsets", "values"):
+        assert np.array_equal(getattr(spooled, column), getattr(parsed, column))
+
+
+def test_spooled_lines_keep_every_character(monkeypatch):
+    monkeypatch.setattr(uploads, "SPOOL_READ_SIZE", 3)
+    text = "a,b\r\nccc\n\nlong line here\nend"
+    
+    lines = list(uploads.iter_spooled_lines(_spool(text)))
+    
+    assert lines == ["a,b\r\n", "ccc\n", "\n", "long line here\n", "end"]